@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
-from .models import InstructorProfile, StudentProfile, PendingEmailChange, GoogleCalendarCredentials
+from .models import InstructorProfile, StudentProfile, PendingEmailChange, GoogleCalendarCredentials, EmailRateBucket
 from webpush.models import PushInformation, SubscriptionInfo
 
 User = get_user_model()
@@ -85,11 +85,16 @@ class SubscriptionInfoAdmin(admin.ModelAdmin):
     endpoint_preview.short_description = "Endpoint"
 
 
+@admin.register(EmailRateBucket)
+class EmailRateBucketAdmin(admin.ModelAdmin):
+    list_display = ("name", "tokens", "updated_at")
+
+
 @admin.register(GoogleCalendarCredentials)
 class GoogleCalendarCredentialsAdmin(admin.ModelAdmin):
-    list_display = ("id", "user", "calendar_enabled", "has_refresh_token", "token_expiry", "updated_at")
+    list_display = ("id", "user", "calendar_enabled", "has_refresh_token", "token_expiry", "invalidated_at", "last_synced_at", "updated_at")
     search_fields = ("user__username", "user__email")
-    list_filter = ("calendar_enabled",)
+    list_filter = ("calendar_enabled", "invalidated_at")
     readonly_fields = ("created_at", "updated_at", "has_refresh_token")
     raw_id_fields = ("user",)
     ordering = ("-updated_at",)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        # Drops cached calendar services when GoogleCalendarCredentials change
+        from utils import calendar_service_cache  # noqa: F401
@@ -32,6 +32,7 @@ class ProfileEmailPreferenceView(GenericAPIView):
         - Email notifications on booking
         - Email notifications on cancellation
         - Email notifications on updates booking
+        - Digest mode (booking notifications grouped per recipient)
         """
         try:
             user = request.user
@@ -40,16 +41,19 @@ class ProfileEmailPreferenceView(GenericAPIView):
             email_on_booking = True
             email_on_cancellation = True
             email_on_update = True
+            notification_digest = False
             
             # Get preferences based on user type
             if user.is_instructor():
                 email_on_booking = user.instructor_profile.email_notifications_on_booking
                 email_on_cancellation = user.instructor_profile.email_notifications_on_cancellation
                 email_on_update = user.instructor_profile.email_notifications_on_update
+                notification_digest = user.instructor_profile.notification_digest
             elif user.is_student():
                 email_on_booking = user.student_profile.email_notifications_on_booking
                 email_on_cancellation = user.student_profile.email_notifications_on_cancellation
                 email_on_update = user.student_profile.email_notifications_on_update
+                notification_digest = user.student_profile.notification_digest
 
             return Response({
                 'id': user.id,
@@ -59,6 +63,7 @@ class ProfileEmailPreferenceView(GenericAPIView):
                 'email_on_booking': email_on_booking,
                 'email_on_cancellation': email_on_cancellation,
                 'email_on_update': email_on_update,
+                'notification_digest': notification_digest,
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -106,6 +106,8 @@ def save_google_calendar_credentials(user, token_data, google_email=None):
                 'access_token': access_token,
                 'token_expiry': token_expiry,
                 'google_email': google_email,
+                # A new authorization replaces a rejected refresh token
+                'invalidated_at': None,
             }
         )
         
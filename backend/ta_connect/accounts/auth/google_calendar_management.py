@@ -9,6 +9,7 @@ This module provides endpoints for:
 This code is vibe coded most of it by cursor but updated by Karim Bassem.
 """
 
+from django.conf import settings
 from django.shortcuts import redirect
 from django.utils import timezone
 from datetime import timedelta
@@ -142,7 +143,7 @@ class GoogleCalendarConnectView(APIView):
                                 default=f'{SITE_DOMAIN}/api/auth/google/calendar/callback/')
             
             # Exchange code for access token
-            token_url = 'https://oauth2.googleapis.com/token'
+            token_url = settings.GOOGLE_OAUTH_TOKEN_URI
             token_payload = {
                 'client_id': GOOGLE_OAUTH2_CLIENT_ID,
                 'client_secret': GOOGLE_OAUTH2_CLIENT_SECRET,
@@ -174,7 +175,7 @@ class GoogleCalendarConnectView(APIView):
             # Fetch Google account email using access token
             google_email = None
             try:
-                userinfo_url = 'https://www.googleapis.com/oauth2/v3/userinfo'
+                userinfo_url = f'{settings.GOOGLE_API_ROOT_URL}oauth2/v3/userinfo'
                 headers = {'Authorization': f'Bearer {token_data.get("access_token")}'}
                 userinfo_response = requests.get(userinfo_url, headers=headers, timeout=10)
                 if userinfo_response.status_code == 200:
@@ -0,0 +1,124 @@
+import datetime
+import io
+import time
+from contextlib import redirect_stdout
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from accounts.models import GoogleCalendarCredentials, User
+from instructor.models import BookingPolicy, OfficeHourSlot
+from student.models import Booking
+from utils import google_calendar
+from utils.calendar_service_cache import calendar_service_cache
+from utils.fake_google import FakeGoogleServer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the calendar side of the booking confirm, room-change and cancel flows against the '
+        'local fake Google server (utils/fake_google.py) at several injected API latencies. Benchmark '
+        'users and bookings are created in a transaction that is rolled back; nothing reaches Google.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=50, help='Bookings of one slot, each with its own student (default: 50).')
+        parser.add_argument('--latency', default='0,50', help='Comma-separated API latencies to inject, in ms (default: 0,50).')
+
+    def handle(self, *args, **options):
+        booking_count = max(options['bookings'], 1)
+        try:
+            latencies = [int(value) for value in options['latency'].split(',') if value.strip()]
+        except ValueError:
+            raise CommandError('--latency must be comma-separated milliseconds, e.g. 0,50')
+
+        with FakeGoogleServer() as google, override_settings(**google.settings()):
+            rows = []
+            try:
+                # The calendar helpers print every event they touch
+                with transaction.atomic(), redirect_stdout(io.StringIO()):
+                    bookings = self._create_bookings(google, booking_count)
+                    for latency in latencies:
+                        google.latency = latency / 1000
+                        rows.extend(self._run_flows(google, bookings, latency))
+                    raise _Rollback
+            except _Rollback:
+                pass
+            finally:
+                calendar_service_cache.clear()
+
+        self.stdout.write(f"Bookings: {booking_count} (one slot, two calendar events each)")
+        self.stdout.write(f"{'Latency':>8}  {'Flow':<28} {'Time':>9}  {'Requests':>8}  {'Calls':>6}")
+        for latency, flow, elapsed, requests, calls in rows:
+            self.stdout.write(f"{latency:>6}ms  {flow:<28} {elapsed * 1000:>7.0f}ms  {requests:>8}  {calls:>6}")
+
+    def _create_bookings(self, google, booking_count):
+        def connect(user):
+            refresh_token = f"benchmark-refresh-{user.id}"
+            GoogleCalendarCredentials.objects.create(
+                user=user,
+                access_token=google.issue_token(refresh_token),
+                refresh_token=refresh_token,
+                token_expiry=timezone.now() + datetime.timedelta(hours=1),
+            )
+
+        instructor = User.objects.create_user(username='calendar_flows_instructor', email='calendar_flows_instructor@example.com', user_type='instructor')
+        connect(instructor)
+        today = datetime.date.today()
+        slot = OfficeHourSlot.objects.create(
+            instructor=instructor,
+            course_name='Benchmark',
+            day_of_week=today.strftime('%a'),
+            start_time=datetime.time(8, 0),
+            end_time=datetime.time(20, 0),
+            duration_minutes=10,
+            start_date=today,
+            end_date=today + datetime.timedelta(days=30),
+            room='Room 1',
+        )
+        BookingPolicy.objects.create(office_hour_slot=slot, set_student_limit=1)
+
+        bookings = []
+        start = timezone.make_aware(datetime.datetime.combine(today, slot.start_time))
+        for i in range(booking_count):
+            student = User.objects.create_user(username=f"calendar_flows_{i}", email=f"calendar_flows_{i}@example.com", user_type='student')
+            connect(student)
+            bookings.append(Booking.objects.create(
+                student=student,
+                office_hour=slot,
+                date=today,
+                start_time=start + datetime.timedelta(minutes=10 * i),
+                status='confirmed',
+            ))
+        return list(Booking.objects.filter(id__in=[booking.id for booking in bookings]).select_related('student', 'office_hour__instructor'))
+
+    def _run_flows(self, google, bookings, latency):
+        def measure(flow, function):
+            google.reset()
+            start = time.perf_counter()
+            function()
+            return latency, flow, time.perf_counter() - start, google.request_count, len(google.operations)
+
+        def confirm():
+            # As the booking.confirmed.calendar outbox handler does, one booking at a time
+            for booking in bookings:
+                google_calendar.add_booking_to_calendars(booking)
+
+        def cancel_each():
+            for booking in bookings:
+                google_calendar.remove_booking_from_calendars(booking)
+
+        calendar_service_cache.clear()
+        rows = [
+            measure('confirm (per booking)', confirm),
+            measure('room change (per booking)', lambda: [google_calendar.update_booking_calendar_locations(booking, 'Room 2') for booking in bookings]),
+            measure('room change (batched)', lambda: google_calendar.update_bookings_calendar_locations_mass(bookings, 'Room 3')),
+            measure('cancel (per booking)', cancel_each),
+        ]
+        confirm()
+        rows.append(measure('cancel (batched)', lambda: google_calendar.remove_bookings_from_calendars_mass(bookings)))
+        return rows
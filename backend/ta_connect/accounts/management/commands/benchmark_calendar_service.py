@@ -0,0 +1,79 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from accounts.models import GoogleCalendarCredentials, User
+from utils import google_calendar
+from utils.calendar_service_cache import calendar_service_cache
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Micro-benchmark Google Calendar service acquisition: building a service from the stored '
+        'credentials on every call versus get_calendar_service() with the per-user service cache. '
+        'Benchmark users are created in a transaction that is rolled back; no requests are sent.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=500, help='Service acquisitions per run (default: 500).')
+        parser.add_argument('--users', type=int, default=20, help='Distinct users the calls cycle through (default: 20).')
+
+    def handle(self, *args, **options):
+        calls = max(options['calls'], 1)
+        user_count = max(options['users'], 1)
+
+        def rate(acquire, users):
+            start = time.perf_counter()
+            for i in range(calls):
+                acquire(users[i % len(users)])
+            return calls / (time.perf_counter() - start)
+
+        def uncached(user):
+            # What every call did before the cache: decrypt the tokens and build from discovery
+            creds_model = GoogleCalendarCredentials.objects.get(user_id=user.id)
+            creds = Credentials(
+                token=creds_model.access_token,
+                refresh_token=creds_model.refresh_token,
+                token_uri=settings.GOOGLE_OAUTH_TOKEN_URI,
+                client_id=google_calendar.GOOGLE_CLIENT_ID,
+                client_secret=google_calendar.GOOGLE_CLIENT_SECRET,
+            )
+            return build('calendar', 'v3', credentials=creds)
+
+        try:
+            with transaction.atomic():
+                users = []
+                for i in range(user_count):
+                    user = User.objects.create_user(username=f"calendar_benchmark_{i}", email=f"calendar_benchmark_{i}@example.com")
+                    GoogleCalendarCredentials.objects.create(
+                        user=user,
+                        access_token='benchmark-access-token',
+                        refresh_token='benchmark-refresh-token',
+                        token_expiry=timezone.now() + timedelta(hours=1),
+                    )
+                    users.append(user)
+
+                calendar_service_cache.clear()
+                with override_settings(GOOGLE_CALENDAR_SERVICE_CACHE_SIZE=max(user_count, 1)):
+                    uncached_rate = rate(uncached, users)
+                    cached_rate = rate(google_calendar.get_calendar_service, users)
+                    hits, misses = calendar_service_cache.hits, calendar_service_cache.misses
+                calendar_service_cache.clear()
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        self.stdout.write(f"Calls: {calls} across {user_count} users")
+        self.stdout.write(f"Build per call (decrypt + discovery build): {uncached_rate:,.0f} services/s ({1000 / uncached_rate:.2f} ms each)")
+        self.stdout.write(f"Cached service:                             {cached_rate:,.0f} services/s ({1000 / cached_rate:.2f} ms each)")
+        self.stdout.write(f"Cache hits/misses: {hits}/{misses}")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up with the cache: {cached_rate / uncached_rate:.2f}x"))
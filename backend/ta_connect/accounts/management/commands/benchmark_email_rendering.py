@@ -0,0 +1,55 @@
+import time
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from utils.email_sending.batch_renderer import render_many
+from utils.email_sending.booking.send_cancel_booking_email_mass import DEFAULT_CANCELLATION_REASONS
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark mass booking email rendering: render_to_string per recipient versus the '
+        'batch renderer. Nothing is sent.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500, help='Emails to render per run (default: 500).')
+        parser.add_argument(
+            '--template',
+            default='booking_bulk_cancellation_email_Student.html',
+            help='Template to render (default: the bulk cancellation email).',
+        )
+
+    def handle(self, *args, **options):
+        messages = max(options['messages'], 1)
+        template_name = options['template']
+        shared_context = {
+            'instructor_name': 'Jane Doe',
+            'instructor_email': 'jane@example.com',
+            'course_name': 'CS 101',
+            'duration': 10,
+            'room': 'B-204',
+            'frontend_url': 'http://localhost:3000',
+            'cancellation_reason': DEFAULT_CANCELLATION_REASONS['slot_disabled'],
+            'update_reason': 'Room update',
+        }
+        contexts = [
+            {
+                'student_name': f"Student {i}",
+                'student_email': f"student{i}@example.com",
+                'booking_date': 'January 07, 2030',
+                'booking_time': f"{9 + i % 8:02d}:00 AM",
+            }
+            for i in range(messages)
+        ]
+
+        def rate(render):
+            start = time.perf_counter()
+            render()
+            return messages / (time.perf_counter() - start)
+
+        per_recipient = rate(lambda: [render_to_string(template_name, {**shared_context, **context}) for context in contexts])
+        batched = rate(lambda: render_many(template_name, contexts, shared_context))
+
+        self.stdout.write(f"Template: {template_name}, {messages} emails")
+        self.stdout.write(f"render_to_string per recipient: {per_recipient:,.0f} msg/s")
+        self.stdout.write(f"Batch renderer:                 {batched:,.0f} msg/s ({batched / per_recipient:.2f}x)")
@@ -0,0 +1,83 @@
+import base64
+import json
+import os
+import time
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from py_vapid import Vapid
+from pywebpush import WebPusher
+from utils.push_notifications import vapid
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).strip(b'=').decode()
+
+
+def _fake_subscription(origin, index):
+    """A subscription with real receiver keys, so the payload encryption cost is included."""
+    receiver_key = ec.generate_private_key(ec.SECP256R1())
+    public_key = receiver_key.public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    return {
+        'endpoint': f"{origin}/push/{index}",
+        'keys': {'p256dh': _b64(public_key), 'auth': _b64(os.urandom(16))},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Micro-benchmark web push message preparation (payload encryption + VAPID header) '
+        'with a freshly signed header per message versus the per-origin header cache. No requests are sent.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=2000, help='Messages to prepare per run (default: 2000).')
+        parser.add_argument('--origins', type=int, default=3, help='Distinct push service origins (default: 3).')
+
+    def handle(self, *args, **options):
+        messages = max(options['messages'], 1)
+        origins = [f"https://push{i}.example.com" for i in range(max(options['origins'], 1))]
+        subscriptions = [_fake_subscription(origins[i % len(origins)], i) for i in range(min(messages, 50))]
+        data = json.dumps({'head': 'Booking Cancelled', 'body': 'x' * 200}).encode()
+
+        # An ephemeral key keeps the benchmark independent of the deployment's settings
+        key = Vapid()
+        key.generate_keys()
+        private_key = _b64(key.private_key.private_numbers().private_value.to_bytes(32, 'big'))
+        admin_email = 'benchmark@example.com'
+
+        def rate(per_message):
+            start = time.perf_counter()
+            for i in range(messages):
+                per_message(subscriptions[i % len(subscriptions)])
+            return messages / (time.perf_counter() - start)
+
+        def prepare(headers_for):
+            return rate(lambda subscription: WebPusher(subscription)._prepare_send_data(
+                data, headers_for(subscription['endpoint']), ttl=60
+            ))
+
+        def signed(endpoint):
+            return vapid.sign_vapid_headers(endpoint)[0]
+
+        webpush_settings = {'VAPID_PRIVATE_KEY': private_key, 'VAPID_ADMIN_EMAIL': admin_email}
+        with override_settings(WEBPUSH_SETTINGS=webpush_settings):
+            vapid.clear_vapid_headers()
+            try:
+                uncached_rate = prepare(signed)
+                cached_rate = prepare(vapid.get_vapid_headers)
+                header_only_uncached = rate(lambda subscription: signed(subscription['endpoint']))
+                header_only_cached = rate(lambda subscription: vapid.get_vapid_headers(subscription['endpoint']))
+            finally:
+                vapid.clear_vapid_headers()
+
+        self.stdout.write(f"Messages: {messages} across {len(origins)} push service origins")
+        self.stdout.write(f"Full message, signed per message: {uncached_rate:,.0f} msg/s")
+        self.stdout.write(f"Full message, cached header:      {cached_rate:,.0f} msg/s")
+        self.stdout.write(f"Header only, signed per message:  {header_only_uncached:,.0f} headers/s")
+        self.stdout.write(f"Header only, cached:              {header_only_cached:,.0f} headers/s")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up with the cache: {cached_rate / uncached_rate:.2f}x"))
+
@@ -0,0 +1,25 @@
+import json
+from django.core.management.base import BaseCommand
+from utils.email_sending.rate_limiter import get_email_rate_metrics
+
+
+class Command(BaseCommand):
+    help = 'Show the remaining outgoing email budget and the number of emails queued by the rate limiter.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print the metrics as JSON (e.g. for a monitoring check).')
+
+    def handle(self, *args, **options):
+        metrics = get_email_rate_metrics()
+        if options['json']:
+            self.stdout.write(json.dumps(metrics, default=str))
+            return
+
+        if not metrics['buckets']:
+            self.stdout.write("Email rate limiting is disabled.")
+        for name, bucket in metrics['buckets'].items():
+            self.stdout.write(f"Per {name}: {bucket['tokens']:.1f} of {bucket['capacity']} emails available")
+        oldest = metrics['oldest_queued_at']
+        self.stdout.write(
+            f"Queued emails: {metrics['queue_depth']}" + (f" (oldest queued at {oldest})" if oldest else "")
+        )
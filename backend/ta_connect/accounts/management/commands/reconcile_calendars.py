@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from utils.calendar_sync import reconcile_calendars
+from utils.periodic import PeriodicCommandMixin
+
+
+class Command(PeriodicCommandMixin, BaseCommand):
+    help = (
+        'Sync connected Google Calendars incrementally and repair or clear booking event IDs '
+        'of events that were deleted or moved by hand.'
+    )
+    job_label = 'Calendar reconciler'
+    loop_message = 'Reconciling calendars'
+    default_interval = 900
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Reconcile every connected user now, including those synced within the interval.',
+        )
+
+    def get_job(self, options):
+        if options['loop']:
+            interval = max(options['interval'], 1)
+            return lambda: reconcile_calendars(min_interval=interval)
+        return lambda: reconcile_calendars(min_interval=0 if options['all'] else None)
+
+    def report(self, totals):
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {totals['users']} calendars ({totals['full_listings']} full listings, "
+            f"{totals['changes']} changed events): {totals['cleared']} event IDs cleared, "
+            f"{totals['repaired']} repaired, {totals['failed']} failed."
+        ))
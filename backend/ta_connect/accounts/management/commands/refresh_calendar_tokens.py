@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from utils.calendar_tokens import refresh_expiring_tokens
+from utils.periodic import PeriodicCommandMixin
+
+
+class Command(PeriodicCommandMixin, BaseCommand):
+    help = 'Refresh Google Calendar access tokens expiring within the next GOOGLE_TOKEN_REFRESH_LEAD_SECONDS.'
+    job_label = 'Google token refresher'
+    loop_message = 'Refreshing expiring Google tokens'
+    default_interval = 120
+
+    def get_job(self, options):
+        return refresh_expiring_tokens
+
+    def report(self, counts):
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {counts['refreshed']} tokens; {counts['invalid']} invalid, "
+            f"{counts['failed']} failed, {counts['skipped']} skipped."
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from utils.push_notifications.subscription_registry import sweep_push_subscriptions
+
+
+class Command(BaseCommand):
+    help = 'Delete push subscriptions that are orphaned or keep failing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-failures',
+            type=int,
+            default=None,
+            help='Failed sends in a row before a subscription is removed (default: PUSH_SUBSCRIPTION_MAX_FAILURES).',
+        )
+
+    def handle(self, *args, **options):
+        result = sweep_push_subscriptions(max_failures=options['max_failures'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {result['orphaned']} orphaned and {result['failing']} failing push subscriptions."
+        ))
@@ -20,6 +20,8 @@ class User(AbstractUser):
 
     email_verify = models.BooleanField(default=False, verbose_name="Email Verified")
     user_type = models.CharField(max_length=10, choices=USER_TYPE_CHOICES, blank=True, null=True, verbose_name="User Type")
+    # Part of the ETag of responses showing the user's name or email (utils/conditional_get.py)
+    updated_at = models.DateTimeField(default=timezone.now, help_text="Timestamp when the user was last updated")
 
     #functions to check user type
     def is_instructor(self):
@@ -39,6 +41,11 @@ class User(AbstractUser):
     def email_exists(email):
         return User.objects.filter(email=email).exists()
 
+    def save(self, *args, **kwargs):
+        """Update the updated_at timestamp on every save."""
+        self.updated_at = timezone.now()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
     
@@ -61,6 +68,7 @@ class InstructorProfile(models.Model):
     email_notifications_on_booking = models.BooleanField(default=True, verbose_name="Email Notifications on Booking")
     email_notifications_on_cancellation = models.BooleanField(default=True, verbose_name="Email Notifications on Cancellation")
     email_notifications_on_update = models.BooleanField(default=True, verbose_name="Email Notifications on Updates The Booking")
+    notification_digest = models.BooleanField(default=False, verbose_name="Group Booking Notifications Into Digests")
 
     def __str__(self):
         return f"Instructor Profile: {self.user.username}"
@@ -75,6 +83,7 @@ class StudentProfile(models.Model):
     email_notifications_on_booking = models.BooleanField(default=True, verbose_name="Email Notifications on Booking")
     email_notifications_on_cancellation = models.BooleanField(default=True, verbose_name="Email Notifications on Cancellation")
     email_notifications_on_update = models.BooleanField(default=True, verbose_name="Email Notifications on Updates The Booking")
+    notification_digest = models.BooleanField(default=False, verbose_name="Group Booking Notifications Into Digests")
     def __str__(self):
         return f"Student Profile: {self.user.username}"
 
@@ -105,6 +114,24 @@ class PendingEmailChange(models.Model):
         return not self.used and not self.is_expired()
 
 
+class EmailRateBucket(models.Model):
+    """
+    A token bucket limiting outgoing email (see utils/email_sending/rate_limiter.py).
+    One row per limit (e.g. per minute, per day) so every worker process draws from
+    the same budget; rows are locked while tokens are taken.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    tokens = models.FloatField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Email Rate Bucket"
+        verbose_name_plural = "Email Rate Buckets"
+
+    def __str__(self):
+        return f"Email rate bucket '{self.name}' ({self.tokens:.1f} tokens)"
+
+
 class GoogleCalendarCredentials(models.Model):
     """
     Store Google OAuth credentials for Calendar API access.
@@ -121,12 +148,20 @@ class GoogleCalendarCredentials(models.Model):
     # Store the connected Google account email for display in settings
     google_email = models.EmailField(blank=True, null=True, verbose_name="Connected Google Account Email")
     calendar_enabled = models.BooleanField(default=True, verbose_name="Calendar Integration Enabled")
+    # Set when Google rejects the refresh token (invalid_grant); cleared when the user reconnects
+    invalidated_at = models.DateTimeField(blank=True, null=True, verbose_name="Refresh Token Invalidated At")
+    # Calendar API syncToken of the last event listing, so the next reconciliation only fetches changes
+    sync_token = models.TextField(blank=True, null=True, verbose_name="Calendar Sync Token")
+    last_synced_at = models.DateTimeField(blank=True, null=True, verbose_name="Calendar Last Synced At")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Google Calendar Credentials"
         verbose_name_plural = "Google Calendar Credentials"
+        indexes = [
+            models.Index(fields=['token_expiry'], name='idx_gcal_token_expiry'),
+        ]
 
     def __str__(self):
         return f"Google Calendar Credentials for {self.user.username}"
@@ -139,4 +174,4 @@ class GoogleCalendarCredentials(models.Model):
 
     def has_valid_credentials(self):
         """Check if user has valid Google Calendar credentials"""
-        return bool(self.refresh_token) and self.calendar_enabled
\ No newline at end of file
+        return bool(self.refresh_token) and self.calendar_enabled and self.invalidated_at is None
\ No newline at end of file
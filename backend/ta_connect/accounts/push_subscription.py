@@ -3,8 +3,11 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from webpush.models import PushInformation, SubscriptionInfo, Group
-import json
+from utils.push_notifications.subscription_registry import (
+    register_subscription,
+    unregister_subscriptions,
+    get_user_subscription_count,
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -48,67 +51,30 @@ class PushSubscriptionView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Check if subscription already exists for this endpoint
-            existing_subscription = SubscriptionInfo.objects.filter(endpoint=endpoint).first()
-            
-            if existing_subscription:
-                # Update existing subscription
-                existing_subscription.p256dh = p256dh
-                existing_subscription.auth = auth
-                existing_subscription.save()
-                
-                # Check if PushInformation exists for this user
-                push_info = PushInformation.objects.filter(user=request.user).first()
-                if push_info:
-                    # Update to use this subscription
-                    push_info.subscription = existing_subscription
-                    push_info.save()
-                else:
-                    # Create new PushInformation
-                    PushInformation.objects.create(
-                        user=request.user,
-                        subscription=existing_subscription
-                    )
-                
-                logger.info(f"Updated push subscription for user {request.user.id}")
-                return Response({
-                    'success': True,
-                    'message': 'Subscription updated successfully',
-                    'created': False
-                }, status=status.HTTP_200_OK)
-            else:
-                # Create new subscription
-                new_subscription = SubscriptionInfo.objects.create(
-                    endpoint=endpoint,
-                    p256dh=p256dh,
-                    auth=auth,
-                    browser=subscription_data.get('browser', 'unknown')
-                )
-                
-                # Check if user already has PushInformation
-                push_info = PushInformation.objects.filter(user=request.user).first()
-                if push_info:
-                    # Update to use new subscription (delete old one if orphaned)
-                    old_subscription = push_info.subscription
-                    push_info.subscription = new_subscription
-                    push_info.save()
-                    
-                    # Clean up old subscription if no longer used
-                    if old_subscription and not PushInformation.objects.filter(subscription=old_subscription).exists():
-                        old_subscription.delete()
-                else:
-                    # Create new PushInformation
-                    PushInformation.objects.create(
-                        user=request.user,
-                        subscription=new_subscription
-                    )
-                
+            # One subscription per endpoint; the user's other devices stay subscribed
+            subscription, created = register_subscription(
+                user=request.user,
+                endpoint=endpoint,
+                p256dh=p256dh,
+                auth=auth,
+                browser=subscription_data.get('browser', 'unknown'),
+                user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
+            )
+
+            if created:
                 logger.info(f"Created push subscription for user {request.user.id}")
                 return Response({
                     'success': True,
                     'message': 'Subscription saved successfully',
                     'created': True
                 }, status=status.HTTP_201_CREATED)
+
+            logger.info(f"Updated push subscription for user {request.user.id}")
+            return Response({
+                'success': True,
+                'message': 'Subscription updated successfully',
+                'created': False
+            }, status=status.HTTP_200_OK)
             
         except Exception as e:
             logger.error(f"Error creating push subscription: {str(e)}")
@@ -122,30 +88,8 @@ class PushSubscriptionView(APIView):
         Unsubscribe from push notifications.
         """
         try:
-            endpoint = request.data.get('endpoint')
-            
-            if endpoint:
-                # Delete specific subscription
-                subscription = SubscriptionInfo.objects.filter(endpoint=endpoint).first()
-                if subscription:
-                    # Delete associated PushInformation first
-                    PushInformation.objects.filter(
-                        user=request.user,
-                        subscription=subscription
-                    ).delete()
-                    
-                    # Delete subscription if no longer used
-                    if not PushInformation.objects.filter(subscription=subscription).exists():
-                        subscription.delete()
-            else:
-                # Delete all subscriptions for user
-                push_infos = PushInformation.objects.filter(user=request.user)
-                for push_info in push_infos:
-                    subscription = push_info.subscription
-                    push_info.delete()
-                    # Delete subscription if orphaned
-                    if subscription and not PushInformation.objects.filter(subscription=subscription).exists():
-                        subscription.delete()
+            # Without an endpoint every device of the user is unsubscribed
+            unregister_subscriptions(request.user, endpoint=request.data.get('endpoint'))
             
             logger.info(f"Removed push subscription for user {request.user.id}")
             return Response({
@@ -165,13 +109,11 @@ class PushSubscriptionView(APIView):
         Check if user is subscribed to push notifications.
         """
         try:
-            is_subscribed = PushInformation.objects.filter(
-                user=request.user,
-                subscription__isnull=False
-            ).exists()
+            device_count = get_user_subscription_count(request.user)
             
             return Response({
-                'subscribed': is_subscribed
+                'subscribed': device_count > 0,
+                'device_count': device_count
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -41,6 +41,11 @@ get_email_preferences_response = openapi.Schema(
             description='Whether to send email notifications when a booking is updated',
             example=True
         ),
+        'notification_digest': openapi.Schema(
+            type=openapi.TYPE_BOOLEAN,
+            description='Whether booking notifications are grouped into one digest email/push per event type',
+            example=False
+        ),
     },
 )
 
@@ -63,6 +68,11 @@ update_email_preferences_request = openapi.Schema(
             description='Enable/disable email notifications for booking updates',
             example=True
         ),
+        'notification_digest': openapi.Schema(
+            type=openapi.TYPE_BOOLEAN,
+            description='Enable/disable grouping booking notifications into digests',
+            example=True
+        ),
     },
 )
 
@@ -90,11 +100,13 @@ Get email notification preferences for the current authenticated user.
 - `email_on_booking`: Receive emails when students book office hours
 - `email_on_cancellation`: Receive emails when students cancel bookings
 - `email_on_update`: Receive emails when students update their bookings
+- `notification_digest`: Group booking notifications into one digest email/push per event type
 
 **For Students:**
 - `email_on_booking`: Receive emails when booking confirmation is sent
 - `email_on_cancellation`: Receive emails when cancellation confirmation is sent
 - `email_on_update`: Receive emails when booking update confirmation is sent
+- `notification_digest`: Group booking notifications into one digest email/push per event type
 
 **Note:** User must be authenticated and have either an instructor or student profile.
     ''',
@@ -120,6 +132,7 @@ Update email notification preferences for the current authenticated user.
 - `email_on_booking`: Set to `true` to receive booking notifications, `false` to disable
 - `email_on_cancellation`: Set to `true` to receive cancellation notifications, `false` to disable
 - `email_on_update`: Set to `true` to receive booking update notifications, `false` to disable
+- `notification_digest`: Set to `true` to receive booking notifications grouped into digests, `false` to receive them one by one
 
 **Behavior:**
 - Only provided fields will be updated
@@ -9,10 +9,12 @@ class UpdateProfileNotificationsSerializer(serializers.Serializer):
     - email_on_booking: Boolean flag for booking notifications
     - email_on_cancellation: Boolean flag for cancellation notifications
     - email_on_update: Boolean flag for update notifications
+    - notification_digest: Boolean flag to group booking notifications into digests
     """
     email_on_booking = serializers.BooleanField(required=False)
     email_on_cancellation = serializers.BooleanField(required=False)
     email_on_update = serializers.BooleanField(required=False)
+    notification_digest = serializers.BooleanField(required=False)
 
     def validate(self, data):
         """
@@ -53,6 +55,8 @@ class UpdateProfileNotificationsSerializer(serializers.Serializer):
             profile.email_notifications_on_cancellation = validated_data['email_on_cancellation']
         if 'email_on_update' in validated_data:
             profile.email_notifications_on_update = validated_data['email_on_update']
+        if 'notification_digest' in validated_data:
+            profile.notification_digest = validated_data['notification_digest']
         
         profile.save()
         return user
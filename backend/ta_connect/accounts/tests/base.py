@@ -7,9 +7,10 @@ from django.test import override_settings
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 from accounts.models import User, InstructorProfile, StudentProfile
+from utils.testing import BookingFixturesMixin
 
 
-class BaseTestCase(APITestCase):
+class BaseTestCase(BookingFixturesMixin, APITestCase):
     """
     Base test case that provides common setup methods for all tests.
     Inherits from APITestCase which provides:
@@ -0,0 +1,693 @@
+"""
+Tests for the Google Calendar integration utilities.
+Tests cover:
+- Calendar service cache: Per-user LRU of calendar services, rebuilt when credentials change
+- CalendarBatch: Event patches and deletes of many users sent as batch requests, mapped to bookings
+- Google token refresher: Ahead-of-expiry refresh under a per-user lock, invalid_grant handling
+- Calendar reconciliation: Incremental syncToken listing, clearing and repairing booking event IDs
+- Google Calendar contract: Confirm, cancel and room-change flows against the fake Google server
+"""
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+import datetime
+import email
+import json
+import re
+import time
+import uuid
+from unittest.mock import patch
+from types import SimpleNamespace
+import httplib2
+from googleapiclient.errors import HttpError
+from google.auth.exceptions import RefreshError
+from google.oauth2.credentials import Credentials
+from accounts.models import GoogleCalendarCredentials
+from student.models import Booking
+from student.utils.cancel_student_bookings import cancel_student_bookings
+from student.utils.outbox import process_outbox
+from utils import google_calendar
+from utils.calendar_service_cache import CalendarServiceCache, calendar_service_cache
+from utils.calendar_batch import CalendarBatch
+from utils import calendar_tokens
+from utils import calendar_sync
+from utils.fake_google import FakeGoogleServer
+from accounts.tests.base import BaseTestCase
+
+
+class CalendarServiceCacheTestCase(BaseTestCase):
+    """
+    Test cases for the per-user Google Calendar service cache.
+    """
+
+    def setUp(self):
+        super().setUp()
+        calendar_service_cache.clear()
+        self.addCleanup(calendar_service_cache.clear)
+        self.student = self.create_student()
+        self.credentials = GoogleCalendarCredentials.objects.create(
+            user=self.student,
+            access_token='access-token',
+            refresh_token='refresh-token',
+            token_expiry=timezone.now() + datetime.timedelta(hours=1),
+        )
+
+    def test_service_is_reused_while_credentials_are_unchanged(self):
+        """Test a second lookup returns the cached service with one query and no build."""
+        first = google_calendar.get_calendar_service(self.student)
+
+        with patch.object(google_calendar, 'build_calendar_service') as build, self.assertNumQueries(1):
+            second = google_calendar.get_calendar_service(self.student)
+
+        build.assert_not_called()
+        self.assertIsNotNone(first)
+        self.assertIs(first, second)
+        self.assertEqual(second.events().patch(calendarId='primary', eventId='e', body={}).method, 'PATCH')
+
+    def test_saving_credentials_invalidates_service(self):
+        """Test saving or deleting the credentials drops the cached service."""
+        first = google_calendar.get_calendar_service(self.student)
+
+        self.credentials.access_token = 'new-access-token'
+        self.credentials.save()
+        self.assertEqual(len(calendar_service_cache), 0)
+        second = google_calendar.get_calendar_service(self.student)
+        self.assertIsNot(first, second)
+
+        self.credentials.delete()
+        self.assertEqual(len(calendar_service_cache), 0)
+        self.assertIsNone(google_calendar.get_calendar_service(self.student))
+
+    def test_credentials_changed_elsewhere_rebuild_service(self):
+        """Test a newer updated_at (saved by another process) is not served from the cache."""
+        first = google_calendar.get_calendar_service(self.student)
+        GoogleCalendarCredentials.objects.filter(pk=self.credentials.pk).update(
+            updated_at=timezone.now() + datetime.timedelta(seconds=1)
+        )
+
+        self.assertIsNot(google_calendar.get_calendar_service(self.student), first)
+
+    def test_disabled_calendar_is_not_served_from_cache(self):
+        """Test disabling the integration stops returning the cached service."""
+        google_calendar.get_calendar_service(self.student)
+        GoogleCalendarCredentials.objects.filter(pk=self.credentials.pk).update(calendar_enabled=False)
+
+        self.assertIsNone(google_calendar.get_calendar_service(self.student))
+
+    def test_least_recently_used_service_is_evicted(self):
+        """Test the cache keeps at most max_size services, evicting the least recently used."""
+        cache = CalendarServiceCache(max_size=2)
+        cache.put(1, 'v1', 'service-1')
+        cache.put(2, 'v1', 'service-2')
+        cache.get(1, 'v1')
+        cache.put(3, 'v1', 'service-3')
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get(1, 'v1'), 'service-1')
+        self.assertIsNone(cache.get(2, 'v1'))
+        self.assertIsNone(cache.get(1, 'v2'))
+
+
+class FakeBatchHttp:
+    """Answers Google batch requests in-process, recording each part and replying with a status per event ID."""
+
+    def __init__(self, statuses=None):
+        self.statuses = statuses or {}
+        self.batches = 0
+        self.parts = []
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        self.batches += 1
+        message = email.message_from_string(f"Content-Type: {headers['content-type']}\n\n{body}")
+        responses = []
+        for part in message.get_payload():
+            request_line, rest = part.get_payload().split('\n', 1)
+            part_method, path, _ = request_line.split(' ')
+            authorization = re.search(r'^authorization: (.*)$', rest, re.MULTILINE | re.IGNORECASE).group(1)
+            event_id = path.split('?')[0].rsplit('/', 1)[-1]
+            self.parts.append((part_method, event_id, authorization))
+            status = self.statuses.get(event_id, 200)
+            content = json.dumps({'id': event_id} if status == 200 else {'error': {'code': status}})
+            responses.append(
+                f"--BOUNDARY\r\nContent-Type: application/http\r\nContent-ID: <response-{part['Content-ID'][1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n\r\n{content}\r\n"
+            )
+        response = httplib2.Response({'status': '200', 'content-type': 'multipart/mixed; boundary=BOUNDARY'})
+        return response, (''.join(responses) + '--BOUNDARY--').encode()
+
+
+class CalendarBatchTestCase(BaseTestCase):
+    """
+    Test cases for batched Google Calendar event operations.
+    """
+
+    def setUp(self):
+        super().setUp()
+        calendar_service_cache.clear()
+        self.addCleanup(calendar_service_cache.clear)
+        self.instructor = self.create_instructor()
+        self.slot, _ = self.create_office_hour_slot(instructor=self.instructor)
+        self.connect_calendar(self.instructor)
+        self.bookings = []
+        for i in range(3):
+            student = self.create_student(username=f'student{i}', email=f'student{i}@example.com')
+            self.connect_calendar(student)
+            self.bookings.append(self.create_booking(
+                student=student,
+                office_hour_slot=self.slot,
+                start_time=datetime.time(10 + i, 0),
+                student_calendar_event_id=f'student-event-{i}',
+                instructor_calendar_event_id=f'instructor-event-{i}',
+            ))
+
+    def connect_calendar(self, user):
+        GoogleCalendarCredentials.objects.create(
+            user=user,
+            access_token=f'token-{user.username}',
+            refresh_token='refresh-token',
+            token_expiry=timezone.now() + datetime.timedelta(hours=1),
+        )
+
+    def run_with(self, http, function, *args):
+        with patch('utils.calendar_batch.get_thread_http', return_value=http):
+            return function(*args)
+
+    def test_room_change_patches_all_events_in_one_batch(self):
+        """Test every event of a slot is patched in one request, each with its owner's token."""
+        http = FakeBatchHttp()
+        result = self.run_with(http, google_calendar.update_bookings_calendar_locations_mass, Booking.objects.filter(office_hour=self.slot), 'Room 42')
+
+        self.assertEqual(http.batches, 1)
+        self.assertEqual(len(http.parts), 6)
+        self.assertEqual({method for method, _, _ in http.parts}, {'PATCH'})
+        self.assertIn(('PATCH', 'student-event-1', 'Bearer token-student1'), http.parts)
+        self.assertIn(('PATCH', 'instructor-event-1', 'Bearer token-instructor'), http.parts)
+        self.assertEqual(result['updated_count'], 3)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['results'][self.bookings[0].id], (True, True))
+
+    def test_batches_are_split_by_batch_size(self):
+        """Test operations beyond GOOGLE_CALENDAR_BATCH_SIZE go out in further batch requests."""
+        http = FakeBatchHttp()
+        with override_settings(GOOGLE_CALENDAR_BATCH_SIZE=4):
+            self.run_with(http, google_calendar.update_bookings_calendar_locations_mass, self.bookings, 'Room 42')
+
+        self.assertEqual(http.batches, 2)
+        self.assertEqual(len(http.parts), 6)
+
+    def test_failures_are_mapped_to_bookings(self):
+        """Test a failed patch only fails its own booking and calendar."""
+        http = FakeBatchHttp(statuses={'student-event-0': 404, 'instructor-event-0': 500})
+        result = self.run_with(http, google_calendar.update_bookings_calendar_locations_mass, self.bookings, 'Room 42')
+
+        self.assertEqual(result['results'][self.bookings[0].id], (False, False))
+        self.assertEqual(result['results'][self.bookings[1].id], (True, True))
+        self.assertEqual(result['updated_count'], 2)
+        self.assertEqual(result['failed_count'], 1)
+
+    def test_mass_removal_clears_deleted_event_ids(self):
+        """Test batched deletes clear the event IDs of deleted and already-missing events."""
+        http = FakeBatchHttp(statuses={'student-event-0': 410, 'instructor-event-1': 500})
+        results = self.run_with(http, google_calendar.remove_bookings_from_calendars_mass, self.bookings)
+
+        self.assertEqual(http.batches, 1)
+        self.assertEqual(results[self.bookings[0].id], (True, True))
+        self.assertEqual(results[self.bookings[1].id], (True, False))
+        self.bookings[1].refresh_from_db()
+        self.assertIsNone(self.bookings[1].student_calendar_event_id)
+        self.assertEqual(self.bookings[1].instructor_calendar_event_id, 'instructor-event-1')
+
+    def test_users_without_calendar_are_not_sent(self):
+        """Test operations of users without a connected calendar fail without a request."""
+        GoogleCalendarCredentials.objects.filter(user=self.instructor).update(calendar_enabled=False)
+        http = FakeBatchHttp()
+        batch = CalendarBatch()
+        batch.delete(self.instructor, self.bookings[0].id, 'instructor', 'instructor-event-0')
+        batch.delete(self.bookings[0].student, self.bookings[0].id, 'student', 'student-event-0')
+        results = self.run_with(http, batch.execute)
+
+        self.assertEqual(len(http.parts), 1)
+        self.assertFalse(results[(self.bookings[0].id, 'instructor')].ok)
+        self.assertTrue(results[(self.bookings[0].id, 'student')].ok)
+
+    def test_cancel_student_bookings_removes_events_in_one_batch(self):
+        """Test cancelling a slot's bookings deletes all their events in one batch request."""
+        http = FakeBatchHttp()
+        with patch('student.utils.cancel_student_bookings.send_cancel_booking_email_mass', return_value={'failed': []}), \
+             patch('student.utils.cancel_student_bookings.send_booking_cancelled_push_mass', return_value={'success': True, 'sent_count': 0}):
+            message, error = self.run_with(http, cancel_student_bookings, self.slot)
+
+        self.assertIsNone(error)
+        self.assertEqual(http.batches, 1)
+        self.assertEqual({method for method, _, _ in http.parts}, {'DELETE'})
+        self.assertFalse(Booking.objects.filter(office_hour=self.slot, student_calendar_event_id__isnull=False).exists())
+
+
+class GoogleTokenRefresherTestCase(BaseTestCase):
+    """
+    Test cases for refreshing Google Calendar access tokens ahead of expiry.
+    """
+
+    GOOGLE_EXPIRY = datetime.datetime(2030, 1, 1, 12, 0)
+
+    def setUp(self):
+        super().setUp()
+        calendar_service_cache.clear()
+        self.addCleanup(calendar_service_cache.clear)
+        self.student = self.create_student()
+        self.credentials = GoogleCalendarCredentials.objects.create(
+            user=self.student,
+            access_token='old-token',
+            refresh_token='refresh-token',
+            token_expiry=timezone.now() + datetime.timedelta(minutes=5),
+        )
+
+    def fake_refresh(self, error=None):
+        def refresh(credentials, request):
+            if error:
+                raise error
+            credentials.token = 'new-token'
+            credentials.expiry = self.GOOGLE_EXPIRY
+        return patch.object(Credentials, 'refresh', autospec=True, side_effect=refresh)
+
+    def test_expiring_tokens_are_refreshed_with_real_expiry(self):
+        """Test tokens expiring within the lead time are refreshed and store Google's expiry."""
+        later = self.create_instructor()
+        GoogleCalendarCredentials.objects.create(
+            user=later, access_token='later-token', refresh_token='refresh-token',
+            token_expiry=timezone.now() + datetime.timedelta(hours=1),
+        )
+
+        with self.fake_refresh() as refresh:
+            counts = calendar_tokens.refresh_expiring_tokens(lead_seconds=600)
+
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(counts['refreshed'], 1)
+        self.credentials.refresh_from_db()
+        self.assertEqual(self.credentials.access_token, 'new-token')
+        self.assertEqual(self.credentials.token_expiry, self.GOOGLE_EXPIRY.replace(tzinfo=datetime.timezone.utc))
+
+    def test_invalid_grant_marks_credentials_invalid(self):
+        """Test a rejected refresh token invalidates the credentials, which are not retried."""
+        error = RefreshError('invalid_grant: Token has been expired or revoked.', {'error': 'invalid_grant'})
+        with self.fake_refresh(error) as refresh:
+            first = calendar_tokens.refresh_expiring_tokens(lead_seconds=600)
+            second = calendar_tokens.refresh_expiring_tokens(lead_seconds=600)
+
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(first['invalid'], 1)
+        self.assertEqual(second, {'refreshed': 0, 'invalid': 0, 'failed': 0, 'skipped': 0})
+        self.credentials.refresh_from_db()
+        self.assertIsNotNone(self.credentials.invalidated_at)
+        self.assertFalse(self.credentials.has_valid_credentials())
+        self.assertIsNone(google_calendar.get_calendar_service(self.student))
+
+    def test_transient_failure_keeps_credentials_valid(self):
+        """Test other refresh errors are reported without invalidating the credentials."""
+        with self.fake_refresh(RefreshError('Temporary failure', {'error': 'internal_failure'})):
+            counts = calendar_tokens.refresh_expiring_tokens(lead_seconds=600)
+
+        self.assertEqual(counts['failed'], 1)
+        self.credentials.refresh_from_db()
+        self.assertIsNone(self.credentials.invalidated_at)
+
+    def test_token_refreshed_meanwhile_is_not_refreshed_again(self):
+        """Test a refresh re-reads the expiry under the lock and skips tokens already renewed."""
+        with self.fake_refresh() as refresh:
+            calendar_tokens.refresh_access_token(self.student.id, min_valid_seconds=600)
+            calendar_tokens.refresh_access_token(self.student.id, min_valid_seconds=600)
+
+        self.assertEqual(refresh.call_count, 1)
+
+    def test_refresh_in_progress_is_skipped(self):
+        """Test the background job skips a user whose refresh lock is held."""
+        with self.fake_refresh() as refresh, calendar_tokens._user_lock(self.student.id):
+            counts = calendar_tokens.refresh_expiring_tokens(lead_seconds=600)
+
+        refresh.assert_not_called()
+        self.assertEqual(counts['skipped'], 1)
+
+    def test_expired_token_is_refreshed_on_demand(self):
+        """Test get_calendar_service refreshes an expired token through the token manager."""
+        GoogleCalendarCredentials.objects.filter(pk=self.credentials.pk).update(
+            token_expiry=timezone.now() - datetime.timedelta(minutes=1)
+        )
+
+        with self.fake_refresh() as refresh:
+            service = google_calendar.get_calendar_service(self.student)
+
+        self.assertIsNotNone(service)
+        self.assertEqual(refresh.call_count, 1)
+        self.credentials.refresh_from_db()
+        self.assertEqual(self.credentials.access_token, 'new-token')
+
+
+class FakeEventListing:
+    """Serves events().list() pages per syncToken and records each call."""
+
+    def __init__(self, listings):
+        # {sync token or None: list of pages (lists of events), or an exception to raise}
+        self.listings = listings
+        self.calls = []
+
+    def events(self):
+        return self
+
+    def list(self, **kwargs):
+        self.calls.append(kwargs)
+        listing = self.listings[kwargs.get('syncToken')]
+        if isinstance(listing, Exception):
+            raise listing
+        index = int(kwargs.get('pageToken') or 0)
+        response = {'items': listing[index]}
+        if index + 1 < len(listing):
+            response['nextPageToken'] = str(index + 1)
+        else:
+            response['nextSyncToken'] = f'sync-{len(self.calls)}'
+        return SimpleNamespace(execute=lambda: response)
+
+
+class CalendarReconciliationTestCase(BaseTestCase):
+    """
+    Test cases for reconciling booking event IDs with users' calendars.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.student = self.create_student()
+        self.credentials = GoogleCalendarCredentials.objects.create(
+            user=self.student,
+            access_token='access-token',
+            refresh_token='refresh-token',
+            token_expiry=timezone.now() + datetime.timedelta(hours=1),
+        )
+        self.slot, _ = self.create_office_hour_slot()
+        self.kept = self.create_booking(student=self.student, office_hour_slot=self.slot,
+                                        start_time=datetime.time(10, 0), student_calendar_event_id='kept')
+        self.deleted = self.create_booking(student=self.student, office_hour_slot=self.slot,
+                                           start_time=datetime.time(11, 0), student_calendar_event_id='deleted')
+        self.lost = self.create_booking(student=self.student, office_hour_slot=self.slot, start_time=datetime.time(12, 0))
+
+    def marked_event(self, event_id, booking, role='student'):
+        private = {google_calendar.BOOKING_ID_PROPERTY: str(booking.id), google_calendar.BOOKING_ROLE_PROPERTY: role}
+        return {'id': event_id, 'status': 'confirmed', 'extendedProperties': {'private': private}}
+
+    def reconcile(self, listing):
+        with patch('utils.calendar_sync.get_calendar_service', return_value=listing):
+            return calendar_sync.reconcile_user_calendar(self.student)
+
+    def test_full_listing_clears_missing_and_repairs_marked_events(self):
+        """Test the first sync lists every page, clears IDs not in the calendar and restores marked ones."""
+        listing = FakeEventListing({None: [
+            [{'id': 'kept', 'status': 'confirmed'}, {'id': 'unrelated', 'status': 'confirmed'}],
+            [self.marked_event('found', self.lost)],
+        ]})
+        result = self.reconcile(listing)
+
+        self.assertEqual(len(listing.calls), 2)
+        self.assertNotIn('syncToken', listing.calls[0])
+        self.assertEqual(result, {'changes': 3, 'full_listing': True, 'cleared': 1, 'repaired': 1})
+        for booking in (self.kept, self.deleted, self.lost):
+            booking.refresh_from_db()
+        self.assertEqual(self.kept.student_calendar_event_id, 'kept')
+        self.assertIsNone(self.deleted.student_calendar_event_id)
+        self.assertEqual(self.lost.student_calendar_event_id, 'found')
+        self.credentials.refresh_from_db()
+        self.assertEqual(self.credentials.sync_token, 'sync-2')
+
+    def test_full_listing_keeps_event_added_while_listing(self):
+        """Test an event ID stored after the full listing started is not cleared as missing from it."""
+        listing = FakeEventListing({None: [[{'id': 'kept', 'status': 'confirmed'}]]})
+        list_page = listing.list
+
+        def list_while_booking_is_added(**kwargs):
+            # The booking.confirmed.calendar handler adds an event the listing does not include
+            google_calendar.add_booking_to_calendars(self.lost)
+            return list_page(**kwargs)
+
+        listing.list = list_while_booking_is_added
+        with patch('utils.google_calendar.create_booking_event', return_value='new'):
+            result = self.reconcile(listing)
+
+        self.assertEqual(result['cleared'], 1)
+        self.lost.refresh_from_db()
+        self.deleted.refresh_from_db()
+        self.assertEqual(self.lost.student_calendar_event_id, 'new')
+        self.assertIsNone(self.deleted.student_calendar_event_id)
+
+    def test_incremental_sync_only_applies_changes(self):
+        """Test a stored sync token is passed back and only deleted events are cleared."""
+        GoogleCalendarCredentials.objects.filter(pk=self.credentials.pk).update(sync_token='sync-1')
+        listing = FakeEventListing({'sync-1': [[{'id': 'deleted', 'status': 'cancelled'}]]})
+        result = self.reconcile(listing)
+
+        self.assertEqual(listing.calls[0]['syncToken'], 'sync-1')
+        self.assertTrue(listing.calls[0]['showDeleted'])
+        self.assertEqual(result, {'changes': 1, 'full_listing': False, 'cleared': 1, 'repaired': 0})
+        self.kept.refresh_from_db()
+        self.deleted.refresh_from_db()
+        self.assertEqual(self.kept.student_calendar_event_id, 'kept')
+        self.assertIsNone(self.deleted.student_calendar_event_id)
+
+    def test_expired_sync_token_restarts_with_full_listing(self):
+        """Test a 410 on the sync token falls back to listing every event."""
+        GoogleCalendarCredentials.objects.filter(pk=self.credentials.pk).update(sync_token='expired')
+        gone = HttpError(httplib2.Response({'status': '410'}), b'{"error": {"code": 410}}')
+        listing = FakeEventListing({'expired': gone, None: [[{'id': 'kept', 'status': 'confirmed'}]]})
+        result = self.reconcile(listing)
+
+        self.assertTrue(result['full_listing'])
+        self.assertEqual(result['cleared'], 1)
+        self.credentials.refresh_from_db()
+        self.assertEqual(self.credentials.sync_token, 'sync-2')
+
+    def test_user_is_reconciled_once_per_interval(self):
+        """Test a run claims each user so runs within the interval skip them."""
+        listing = FakeEventListing({None: [[]], 'sync-1': [[]]})
+        with patch('utils.calendar_sync.get_calendar_service', return_value=listing):
+            first = calendar_sync.reconcile_calendars(min_interval=900)
+            second = calendar_sync.reconcile_calendars(min_interval=900)
+            forced = calendar_sync.reconcile_calendars(now=timezone.now() + datetime.timedelta(seconds=901), min_interval=900)
+
+        self.assertEqual(first['users'], 1)
+        self.assertEqual(first['full_listings'], 1)
+        self.assertEqual(second['users'], 0)
+        self.assertEqual(forced['users'], 1)
+        self.assertEqual(forced['full_listings'], 0)
+
+    def test_created_events_are_marked_with_their_booking(self):
+        """Test event bodies carry the booking and calendar role for reconciliation."""
+        event = google_calendar.build_booking_event(self.kept, is_instructor=True)
+
+        private = event['extendedProperties']['private']
+        self.assertEqual(private[google_calendar.BOOKING_ID_PROPERTY], str(self.kept.id))
+        self.assertEqual(private[google_calendar.BOOKING_ROLE_PROPERTY], 'instructor')
+
+
+class GoogleCalendarContractTestCase(BaseTestCase):
+    """
+    Test cases running the calendar flows through googleapiclient against a local
+    fake of the Calendar API and token endpoint (utils/fake_google.py).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.google = FakeGoogleServer().start()
+        cls.addClassCleanup(cls.google.stop)
+
+    def setUp(self):
+        super().setUp()
+        settings_override = override_settings(**self.google.settings())
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        calendar_service_cache.clear()
+        self.addCleanup(calendar_service_cache.clear)
+        self.google.latency = 0
+        self.google.reset(failures=True)
+
+        self.instructor = self.create_instructor()
+        self.connect_calendar(self.instructor)
+        self.slot, _ = self.create_office_hour_slot(instructor=self.instructor, room='Room 1')
+        self.bookings = []
+        for i in range(3):
+            student = self.create_student(username=f'student{i}', email=f'student{i}@example.com')
+            self.connect_calendar(student)
+            self.bookings.append(self.create_booking(student=student, office_hour_slot=self.slot,
+                                                     start_time=datetime.time(9, 10 * i)))
+
+    def connect_calendar(self, user, expired=False):
+        refresh_token = f'refresh-{uuid.uuid4().hex}'
+        GoogleCalendarCredentials.objects.create(
+            user=user,
+            access_token=self.google.issue_token(refresh_token),
+            refresh_token=refresh_token,
+            token_expiry=timezone.now() + datetime.timedelta(hours=-1 if expired else 1),
+        )
+        return refresh_token
+
+    def calendar(self, user):
+        refresh_token = GoogleCalendarCredentials.objects.get(user=user).refresh_token
+        return self.google.events(refresh_token)
+
+    def confirm_all(self):
+        for booking in self.bookings:
+            google_calendar.add_booking_to_calendars(booking)
+            booking.refresh_from_db()
+
+    def test_confirm_inserts_marked_events_in_both_calendars(self):
+        """Test confirming a booking creates its events in the student's and the instructor's calendar."""
+        booking = self.bookings[0]
+        student_event_id, instructor_event_id = google_calendar.add_booking_to_calendars(booking)
+
+        student_event = self.calendar(booking.student)[student_event_id]
+        instructor_event = self.calendar(self.instructor)[instructor_event_id]
+        self.assertEqual(student_event['location'], 'Room 1')
+        self.assertEqual(instructor_event['extendedProperties']['private'], {
+            google_calendar.BOOKING_ID_PROPERTY: str(booking.id),
+            google_calendar.BOOKING_ROLE_PROPERTY: 'instructor',
+        })
+        booking.refresh_from_db()
+        self.assertEqual(booking.student_calendar_event_id, student_event_id)
+        self.assertEqual(booking.instructor_calendar_event_id, instructor_event_id)
+
+    def test_room_change_patches_every_event_in_one_request(self):
+        """Test a room change through the time slot endpoint patches all events with one batch request."""
+        self.confirm_all()
+        self.google.reset()
+        self.authenticate_user(self.instructor)
+
+        response = self.client.patch(reverse('time-slots-detail', kwargs={'slot_id': self.slot.id}), {
+            'course_name': self.slot.course_name,
+            'day_of_week': self.slot.day_of_week,
+            'start_time': self.slot.start_time.isoformat(),
+            'end_time': self.slot.end_time.isoformat(),
+            'duration_minutes': self.slot.duration_minutes,
+            'start_date': self.slot.start_date.isoformat(),
+            'end_date': self.slot.end_date.isoformat(),
+            'room': 'Room 42',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.google.request_count, 1)
+        self.assertEqual([method for method, _ in self.google.operations], ['PATCH'] * 6)
+        for booking in self.bookings:
+            self.assertEqual(self.calendar(booking.student)[booking.student_calendar_event_id]['location'], 'Room 42')
+        self.assertEqual({event['location'] for event in self.calendar(self.instructor).values()}, {'Room 42'})
+
+    def test_cancel_deletes_events_and_clears_ids(self):
+        """Test cancelling a slot's bookings deletes every event with one batch request."""
+        self.confirm_all()
+        self.google.delete_event(
+            GoogleCalendarCredentials.objects.get(user=self.bookings[0].student).refresh_token,
+            self.bookings[0].student_calendar_event_id,
+        )
+        self.google.reset()
+
+        message, error = cancel_student_bookings(self.slot)
+
+        self.assertIsNone(error)
+        self.assertEqual(self.google.request_count, 1)
+        self.assertEqual(self.calendar(self.instructor), {})
+        for booking in self.bookings:
+            booking.refresh_from_db()
+            self.assertTrue(booking.is_cancelled)
+            # The event the student deleted by hand (410) counts as removed too
+            self.assertIsNone(booking.student_calendar_event_id)
+            self.assertIsNone(booking.instructor_calendar_event_id)
+
+    def test_reschedule_moves_events_to_the_new_time_on_confirm(self):
+        """Test a rescheduled booking loses its old events and gets new ones at the new time when confirmed again."""
+        booking = self.bookings[0]
+        confirm_url = reverse('instructor-confirm-booking', kwargs={'pk': booking.id})
+        self.authenticate_user(self.instructor)
+        self.assertEqual(self.client.post(confirm_url).status_code, 200)
+        process_outbox()
+        booking.refresh_from_db()
+        old_event_ids = (booking.student_calendar_event_id, booking.instructor_calendar_event_id)
+
+        self.authenticate_user(booking.student)
+        response = self.client.patch(reverse('booking_detail', kwargs={'pk': booking.id}), {
+            'new_date': (booking.date + datetime.timedelta(days=1)).isoformat(),
+            'new_time': '09:30:00',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        process_outbox()
+        booking.refresh_from_db()
+        self.assertIsNone(booking.student_calendar_event_id)
+        self.assertEqual(self.calendar(booking.student), {})
+        self.assertEqual(self.calendar(self.instructor), {})
+
+        self.authenticate_user(self.instructor)
+        self.assertEqual(self.client.post(confirm_url).status_code, 200)
+        process_outbox()
+
+        booking.refresh_from_db()
+        self.assertNotIn(booking.student_calendar_event_id, old_event_ids)
+        for user, event_id in ((booking.student, booking.student_calendar_event_id),
+                               (self.instructor, booking.instructor_calendar_event_id)):
+            events = self.calendar(user)
+            self.assertEqual(list(events), [event_id])
+            self.assertEqual(datetime.datetime.fromisoformat(events[event_id]['start']['dateTime']), booking.start_time)
+
+    def test_injected_errors_are_reported_per_booking(self):
+        """Test a failing batch part only fails its own booking."""
+        self.confirm_all()
+        failing = self.bookings[1]
+        self.google.fail(status=503, path=failing.student_calendar_event_id)
+        self.google.fail(status=503, path=failing.instructor_calendar_event_id)
+
+        result = google_calendar.update_bookings_calendar_locations_mass(self.bookings, 'Room 42')
+
+        self.assertEqual(result['failed_count'], 1)
+        self.assertEqual(result['results'][failing.id], (False, False))
+        self.assertEqual(result['results'][self.bookings[0].id], (True, True))
+        self.assertEqual(self.calendar(failing.student)[failing.student_calendar_event_id]['location'], 'Room 1')
+
+    def test_expired_token_is_refreshed_through_token_endpoint(self):
+        """Test an expired access token is refreshed before the calendar call."""
+        student = self.create_student(username='expired', email='expired@example.com')
+        self.connect_calendar(student, expired=True)
+        booking = self.create_booking(student=student, office_hour_slot=self.slot, start_time=datetime.time(9, 40))
+        old_token = GoogleCalendarCredentials.objects.get(user=student).access_token
+
+        student_event_id, _ = google_calendar.add_booking_to_calendars(booking)
+
+        self.assertIn(student_event_id, self.calendar(student))
+        credentials = GoogleCalendarCredentials.objects.get(user=student)
+        self.assertNotEqual(credentials.access_token, old_token)
+        self.assertGreater(credentials.token_expiry, timezone.now() + datetime.timedelta(minutes=50))
+
+    def test_revoked_refresh_token_invalidates_credentials(self):
+        """Test invalid_grant from the token endpoint marks the credentials invalid."""
+        student = self.create_student(username='revoked', email='revoked@example.com')
+        self.google.revoke(self.connect_calendar(student, expired=True))
+
+        self.assertIsNone(google_calendar.get_calendar_service(student))
+        self.assertIsNotNone(GoogleCalendarCredentials.objects.get(user=student).invalidated_at)
+
+    def test_reconciliation_clears_events_deleted_in_calendar(self):
+        """Test the incremental sync picks up an event the user deleted after the first listing."""
+        self.confirm_all()
+        booking = self.bookings[0]
+        self.assertEqual(calendar_sync.reconcile_user_calendar(booking.student)['full_listing'], True)
+
+        refresh_token = GoogleCalendarCredentials.objects.get(user=booking.student).refresh_token
+        self.google.delete_event(refresh_token, booking.student_calendar_event_id)
+        result = calendar_sync.reconcile_user_calendar(booking.student)
+
+        self.assertEqual(result, {'changes': 1, 'full_listing': False, 'cleared': 1, 'repaired': 0})
+        booking.refresh_from_db()
+        self.assertIsNone(booking.student_calendar_event_id)
+
+    def test_latency_applies_per_request(self):
+        """Test injected latency is paid once per HTTP request, so a batch costs one delay."""
+        self.confirm_all()
+        self.google.latency = 0.2
+
+        start = time.perf_counter()
+        google_calendar.update_bookings_calendar_locations_mass(self.bookings, 'Room 42')
+        elapsed = time.perf_counter() - start
+
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertLess(elapsed, 0.2 * 6)
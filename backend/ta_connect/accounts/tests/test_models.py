@@ -8,7 +8,14 @@ Tests cover:
 from django.test import TestCase
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
+from io import StringIO
+from datetime import timedelta
+from django.core.management import call_command
+from django.utils import timezone
+from webpush.models import PushInformation, SubscriptionInfo
 from accounts.models import User, InstructorProfile, StudentProfile
+from student.models import PushSubscriptionHealth
+from utils.push_notifications.subscription_registry import record_delivery_results, sweep_push_subscriptions
 from accounts.tests.base import BaseTestCase
 
 
@@ -564,3 +571,55 @@ class GoogleCalendarCredentialsModelTestCase(BaseTestCase):
         
         self.assertIsNone(credentials.google_email)
 
+
+
+class PushSubscriptionHealthModelTestCase(BaseTestCase):
+    """
+    Test cases for push subscription health tracking and the sweep_push_subscriptions command.
+    """
+
+    def _subscription(self, user, endpoint):
+        subscription = SubscriptionInfo.objects.create(browser='chrome', endpoint=endpoint, auth='auth', p256dh='p256dh')
+        if user is not None:
+            PushInformation.objects.create(user=user, subscription=subscription)
+        return subscription
+
+    def test_record_delivery_results(self):
+        """Test successes are timestamped, failures counted and gone endpoints deleted."""
+        user = self.create_user()
+        ok = self._subscription(user, 'https://push.example.com/ok')
+        failing = self._subscription(user, 'https://push.example.com/failing')
+        gone = self._subscription(user, 'https://push.example.com/gone')
+
+        record_delivery_results(succeeded_ids=[ok.id], gone_ids=[gone.id], failed_ids=[failing.id])
+        record_delivery_results(failed_ids=[failing.id])
+
+        self.assertIsNotNone(PushSubscriptionHealth.objects.get(subscription=ok).last_success_at)
+        self.assertEqual(PushSubscriptionHealth.objects.get(subscription=failing).consecutive_failures, 2)
+        self.assertFalse(SubscriptionInfo.objects.filter(id=gone.id).exists())
+
+    def test_sweep_removes_orphaned_and_failing_subscriptions(self):
+        """Test the sweep keeps subscriptions that have not failed, however long they were idle."""
+        user = self.create_user()
+        live = self._subscription(user, 'https://push.example.com/live')
+        self._subscription(None, 'https://push.example.com/orphan')
+        failing = self._subscription(user, 'https://push.example.com/failing')
+        idle = self._subscription(user, 'https://push.example.com/idle')
+        record_delivery_results(succeeded_ids=[live.id])
+        PushSubscriptionHealth.objects.create(subscription=failing, consecutive_failures=5)
+        PushSubscriptionHealth.objects.create(subscription=idle)
+        PushSubscriptionHealth.objects.filter(subscription=idle).update(created_at=timezone.now() - timedelta(days=365))
+
+        result = sweep_push_subscriptions(max_failures=5)
+
+        self.assertEqual(result, {'orphaned': 1, 'failing': 1})
+        self.assertEqual(sorted(SubscriptionInfo.objects.values_list('id', flat=True)), [live.id, idle.id])
+
+    def test_sweep_push_subscriptions_command(self):
+        """Test the command reports what it removed."""
+        self._subscription(None, 'https://push.example.com/orphan')
+
+        out = StringIO()
+        call_command('sweep_push_subscriptions', stdout=out)
+
+        self.assertIn('Removed 1 orphaned', out.getvalue())
@@ -0,0 +1,69 @@
+"""
+Tests for the web push utilities.
+Tests cover:
+- VAPID header cache: One signed header per push service origin until near expiry
+"""
+from django.test import override_settings
+import base64
+from unittest.mock import patch
+from webpush.models import PushInformation, SubscriptionInfo
+from utils.push_notifications import vapid
+from utils.push_notifications.push_fanout import send_push_fanout
+from accounts.tests.base import BaseTestCase
+
+
+class VapidHeaderCacheTestCase(BaseTestCase):
+    """
+    Test cases for the per-origin VAPID header cache.
+    """
+
+    def setUp(self):
+        super().setUp()
+        key = vapid.Vapid()
+        key.generate_keys()
+        private_key = key.private_key.private_numbers().private_value.to_bytes(32, 'big')
+        webpush_settings = {
+            'VAPID_PRIVATE_KEY': base64.urlsafe_b64encode(private_key).strip(b'=').decode(),
+            'VAPID_ADMIN_EMAIL': 'admin@example.com',
+        }
+        settings_override = override_settings(WEBPUSH_SETTINGS=webpush_settings)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        vapid.clear_vapid_headers()
+        self.addCleanup(vapid.clear_vapid_headers)
+
+    def test_headers_are_reused_per_origin(self):
+        """Test endpoints on the same push service share one signature."""
+        with patch.object(vapid, 'sign_vapid_headers', wraps=vapid.sign_vapid_headers) as sign:
+            first = vapid.get_vapid_headers('https://fcm.googleapis.com/fcm/send/a')
+            second = vapid.get_vapid_headers('https://fcm.googleapis.com/fcm/send/b')
+            other = vapid.get_vapid_headers('https://updates.push.services.mozilla.com/wpush/v2/c')
+
+        self.assertEqual(sign.call_count, 2)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(first['Authorization'].startswith('vapid t='))
+
+    def test_headers_are_resigned_near_expiry(self):
+        """Test a header inside the refresh window is signed again."""
+        with override_settings(VAPID_HEADER_TTL_SECONDS=600, VAPID_HEADER_REFRESH_SECONDS=900), \
+             patch.object(vapid, 'sign_vapid_headers', wraps=vapid.sign_vapid_headers) as sign:
+            vapid.get_vapid_headers('https://fcm.googleapis.com/fcm/send/a')
+            vapid.get_vapid_headers('https://fcm.googleapis.com/fcm/send/a')
+
+        self.assertEqual(sign.call_count, 2)
+
+    def test_fanout_sends_cached_headers(self):
+        """Test the fan-out sends the cached header for each endpoint's origin instead of VAPID claims."""
+        student = self.create_student()
+        subscription = SubscriptionInfo.objects.create(
+            browser='chrome', endpoint='https://fcm.googleapis.com/fcm/send/a', auth='auth', p256dh='p256dh'
+        )
+        PushInformation.objects.create(user=student, subscription=subscription)
+
+        with patch('utils.push_notifications.push_fanout.webpush') as webpush:
+            send_push_fanout([(student, {'head': 'Hi'})])
+
+        kwargs = webpush.call_args.kwargs
+        self.assertNotIn('vapid_claims', kwargs)
+        self.assertEqual(kwargs['headers'], vapid.get_vapid_headers(subscription.endpoint))
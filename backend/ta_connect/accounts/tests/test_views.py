@@ -11,6 +11,8 @@ from django.contrib.auth.tokens import default_token_generator
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 from accounts.models import User
+from student.models import PushSubscriptionHealth
+from webpush.models import PushInformation, SubscriptionInfo
 from accounts.tests.base import BaseTestCase
 from unittest.mock import patch
 
@@ -553,3 +555,85 @@ class DeleteAccountViewTestCase(BaseTestCase):
         # Verify user was NOT deleted
         self.assertTrue(User.objects.filter(id=user.id).exists())
 
+
+
+class PushSubscriptionViewTestCase(BaseTestCase):
+    """
+    Test cases for the push subscription endpoint (POST/GET/DELETE /api/auth/push/subscribe/).
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('push-subscribe')
+
+    def _subscribe(self, endpoint, p256dh='p256dh', auth='auth'):
+        return self.client.post(self.url, {
+            'endpoint': endpoint,
+            'keys': {'p256dh': p256dh, 'auth': auth},
+            'browser': 'chrome',
+        }, format='json')
+
+    def test_subscribe_keeps_every_device(self):
+        """Test subscribing from a second device keeps the first one."""
+        user, token = self.create_and_authenticate_user()
+
+        first = self._subscribe('https://push.example.com/laptop')
+        second = self._subscribe('https://push.example.com/phone')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(PushInformation.objects.filter(user=user).count(), 2)
+
+        response = self.client.get(self.url)
+        self.assertTrue(response.data['subscribed'])
+        self.assertEqual(response.data['device_count'], 2)
+
+    def test_subscribe_same_endpoint_is_deduplicated(self):
+        """Test re-subscribing an endpoint refreshes its keys instead of adding a row."""
+        user, token = self.create_and_authenticate_user()
+
+        self._subscribe('https://push.example.com/laptop')
+        response = self._subscribe('https://push.example.com/laptop', p256dh='new-key')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['created'])
+        subscription = SubscriptionInfo.objects.get(endpoint='https://push.example.com/laptop')
+        self.assertEqual(subscription.p256dh, 'new-key')
+        self.assertEqual(PushInformation.objects.filter(user=user).count(), 1)
+        self.assertTrue(PushSubscriptionHealth.objects.filter(subscription=subscription).exists())
+
+    def test_subscribe_moves_endpoint_to_new_user(self):
+        """Test a browser used by another account now notifies only the new user."""
+        other = self.create_user(username='other', email='other@example.com')
+        subscription = SubscriptionInfo.objects.create(
+            browser='chrome', endpoint='https://push.example.com/shared', auth='auth', p256dh='p256dh'
+        )
+        PushInformation.objects.create(user=other, subscription=subscription)
+        user, token = self.create_and_authenticate_user()
+
+        self._subscribe('https://push.example.com/shared')
+
+        self.assertFalse(PushInformation.objects.filter(user=other).exists())
+        self.assertTrue(PushInformation.objects.filter(user=user, subscription=subscription).exists())
+
+    def test_unsubscribe_one_device(self):
+        """Test unsubscribing by endpoint removes only that device."""
+        user, token = self.create_and_authenticate_user()
+        self._subscribe('https://push.example.com/laptop')
+        self._subscribe('https://push.example.com/phone')
+
+        response = self.client.delete(self.url, {'endpoint': 'https://push.example.com/phone'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(SubscriptionInfo.objects.values_list('endpoint', flat=True)),
+            ['https://push.example.com/laptop']
+        )
+
+    def test_subscribe_validation_missing_keys(self):
+        """Test subscribing without keys (400 Bad Request)."""
+        self.create_and_authenticate_user()
+
+        response = self.client.post(self.url, {'endpoint': 'https://push.example.com/x'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
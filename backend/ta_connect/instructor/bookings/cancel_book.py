@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import status
@@ -5,13 +6,11 @@ from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from student.models import Booking
-from student.sendBookingEmail import send_booking_cancelled_email #the same email function used in student cancel booking
 from student.serializers.cancel_book_serializer import CancelBookingSerializer #the same serializer used in student cancel booking
 from accounts.permissions import IsInstructor
 from instructor.schemas.cancel_booking_schemas import cancel_booking_instructor_swagger
 from utils.error_formatter import format_serializer_errors
-from utils.push_notifications.booking.send_booking_cancelled import send_booking_cancelled_push
-from utils.google_calendar import remove_booking_from_calendars
+from student.utils.booking_side_effects import enqueue_booking_cancelled
 
 class InstructorCancelBookingView(GenericAPIView):
     """
@@ -57,15 +56,6 @@ class InstructorCancelBookingView(GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Remove calendar events before cancellation
-        try:
-            student_deleted, instructor_deleted = remove_booking_from_calendars(booking)
-            if student_deleted or instructor_deleted:
-                print(f"Calendar events removed - Student: {student_deleted}, Instructor: {instructor_deleted}")
-        except Exception as e:
-            # Log error but don't fail the cancellation
-            print(f"Failed to remove calendar events: {e}")
-
         # Validate and cancel the booking
         serializer = self.get_serializer(
             instance=booking,
@@ -80,35 +70,10 @@ class InstructorCancelBookingView(GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        cancelled_booking = serializer.save()
-
-        # Send email notification to the student and the instructor
-        try:
-            send_booking_cancelled_email(
-                student=booking.student,
-                instructor=request.user,
-                slot=booking.office_hour,
-                booking_date=booking.date,
-                booking_time=booking.start_time
-            )
-        except Exception as e:
-            # Log error but don't fail the cancellation
-            print(f"Failed to send cancellation email: {e}")
-
-        # Send push notification (cancelled by instructor)
-        try:
-            send_booking_cancelled_push(
-                student=booking.student,
-                instructor=request.user,
-                slot=booking.office_hour,
-                booking_date=booking.date,
-                booking_time=booking.start_time,
-                booking_id=booking.id,
-                cancelled_by='instructor'
-            )
-        except Exception as e:
-            # Log error but don't fail the cancellation
-            print(f"Failed to send cancellation push notification: {e}")
+        # Calendar removal, emails and push notifications are queued with the cancellation
+        with transaction.atomic():
+            cancelled_booking = serializer.save()
+            enqueue_booking_cancelled(cancelled_booking, cancelled_by='instructor')
 
         return Response({
             'success': True,
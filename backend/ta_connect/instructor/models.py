@@ -4,6 +4,7 @@ from django.utils import timezone
 import datetime
 from encrypted_model_fields.fields import EncryptedCharField
 from core.models import BaseModel
+from student.utils.booking_intervals import BookingIntervals
 # Create your models here.
 class OfficeHourSlot(BaseModel):
     # use AUTH_USER_MODEL to avoid direct import and migration pitfalls
@@ -38,25 +39,9 @@ class OfficeHourSlot(BaseModel):
         
         # Get active bookings for this slot and date
         bookings = self.bookings.filter(date=check_date, is_cancelled=False)
-        
-        if exclude_booking_id:
-            bookings = bookings.exclude(id=exclude_booking_id)
-        
-        if not bookings.exists():
-            return True
+        intervals = BookingIntervals.from_bookings(bookings, self.duration_minutes, exclude_booking_id)
 
-        for booking in bookings:
-            # Existing booking times
-            b_start = booking.start_time
-            # If booking.end_time is not set (legacy records), calculate it
-            b_end = booking.end_time if booking.end_time else b_start + datetime.timedelta(minutes=self.duration_minutes)
-            
-            # Check overlap: (StartA < EndB) and (EndA > StartB)
-            # If the requested slot starts before the existing one ends AND ends after the existing one starts
-            if check_start_time < b_end and check_end_time > b_start:
-                return False
-        
-        return True
+        return not intervals.overlaps(check_start_time, check_end_time)
 
     class Meta:
         indexes = [
@@ -64,6 +49,8 @@ class OfficeHourSlot(BaseModel):
             models.Index(fields=['instructor', 'start_date', 'end_date'], name='idx_slot_instructor_dates'),
             models.Index(fields=['day_of_week', 'status'], name='idx_slot_day_status'),
             models.Index(fields=['created_at'], name='idx_slot_created_at'),
+            # Keyset pagination of an instructor's slot lists
+            models.Index(fields=['instructor', 'start_date', 'start_time', 'id'], name='idx_slot_instructor_keyset'),
         ]
 
     def __str__(self):
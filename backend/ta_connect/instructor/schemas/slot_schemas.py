@@ -1,4 +1,5 @@
 from drf_yasg import openapi
+from utils.pagination import KEYSET_PAGINATION_PARAMETERS
 
 url_data_slots_response = openapi.Schema(
     type=openapi.TYPE_OBJECT,
@@ -49,6 +50,7 @@ get_user_slots_response = openapi.Schema(
                 }
             )
         ),
+        'next_cursor': openapi.Schema(type=openapi.TYPE_STRING, nullable=True, description='Cursor for the next page, null on the last page'),
         'error': openapi.Schema(type=openapi.TYPE_STRING, description='Error message if request fails'),
     },
     description='Response containing office hour slots and their associated bookings'
@@ -87,6 +89,7 @@ get_instructor_data_response = openapi.Response(
                     }
                 )
             ),
+            'next_cursor': openapi.Schema(type=openapi.TYPE_STRING, nullable=True, description='Cursor for the next page, null on the last page'),
             'error': openapi.Schema(type=openapi.TYPE_STRING, description='Error message if request fails'),
         }
     )
@@ -115,9 +118,11 @@ search_instructors_response = openapi.Response(
 
 # Swagger decorator configurations
 get_user_slots_swagger = {
-    'operation_description': 'Get all office hour slots for the logged-in instructor.',
+    'operation_description': 'Get all office hour slots for the logged-in instructor, paginated by (start_date, start_time, id).',
+    'manual_parameters': KEYSET_PAGINATION_PARAMETERS,
     'responses': {
         200: get_user_slots_response,
+        304: 'Not Modified - collection unchanged since the If-None-Match ETag',
         500: 'Internal server error'
     }
 }
@@ -152,7 +157,7 @@ get_user_bookings_swagger = {
             required=False,
             example='confirmed'
         )
-    ],
+    ] + KEYSET_PAGINATION_PARAMETERS,
     'responses': {
         200: openapi.Response(
             description='Bookings retrieved successfully',
@@ -197,11 +202,13 @@ get_user_bookings_swagger = {
                                 'created_at': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
                             }
                         )
-                    )
+                    ),
+                    'next_cursor': openapi.Schema(type=openapi.TYPE_STRING, nullable=True, description='Cursor for the next page, null on the last page'),
                 }
             )
         ),
-        400: 'Bad Request - Invalid date format',
+        304: 'Not Modified - collection unchanged since the If-None-Match ETag',
+        400: 'Bad Request - Invalid date format or cursor',
         500: 'Internal server error'
     }
 }
@@ -233,9 +240,10 @@ get_instructor_data_swagger = {
             type=openapi.TYPE_INTEGER,
             required=True
         )
-    ],
+    ] + KEYSET_PAGINATION_PARAMETERS,
     'responses': {
         200: get_instructor_data_response,
+        304: 'Not Modified - collection unchanged since the If-None-Match ETag',
         404: 'Instructor not found',
         500: 'Internal server error'
     }
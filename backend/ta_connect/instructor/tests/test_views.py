@@ -8,11 +8,18 @@ Tests cover:
 from rest_framework import status
 from django.urls import reverse
 from django.utils import timezone
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 import datetime
+from unittest.mock import patch
 from accounts.models import User
 from instructor.models import OfficeHourSlot, BookingPolicy
 from student.models import Booking
 from instructor.tests.base import BaseTestCase
+from utils.pagination import KeysetPagination
+
+# Authentication + ETag aggregate + the projected booking query; must not grow with the result size
+MAX_BOOKING_LIST_QUERIES = 3
 
 
 class GetUserSlotsViewTestCase(BaseTestCase):
@@ -53,6 +60,87 @@ class GetUserSlotsViewTestCase(BaseTestCase):
         self.assertEqual(len(response.data['slots']), 1)
         self.assertEqual(response.data['slots'][0]['course_name'], 'Course 1')
     
+    def test_get_slots_keyset_pagination(self):
+        """Test walking the slot list page by page with next_cursor."""
+        instructor, token = self.create_and_authenticate_instructor()
+        today = datetime.date.today()
+        for i in range(3):
+            self.create_office_hour_slot(
+                instructor=instructor,
+                course_name=f'Course {i}',
+                start_date=today + datetime.timedelta(days=i)
+            )
+
+        seen = []
+        cursor = None
+        for _ in range(3):
+            params = {'page_size': 1}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get(self.get_slots_url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['slots']), 1)
+            seen.append(response.data['slots'][0]['course_name'])
+            cursor = response.data['next_cursor']
+
+        self.assertEqual(seen, ['Course 0', 'Course 1', 'Course 2'])
+        self.assertIsNone(cursor)
+
+    def test_get_slots_unpaginated_without_cursor_or_page_size(self):
+        """Test clients that send no pagination parameters still get every slot."""
+        instructor, token = self.create_and_authenticate_instructor()
+        today = datetime.date.today()
+        for i in range(3):
+            self.create_office_hour_slot(instructor=instructor, course_name=f'Course {i}', start_date=today + datetime.timedelta(days=i))
+
+        with patch.object(KeysetPagination, 'page_size', 1):
+            response = self.client.get(self.get_slots_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([slot['course_name'] for slot in response.data['slots']], ['Course 0', 'Course 1', 'Course 2'])
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_get_slots_cursor_stable_across_inserts(self):
+        """Test a cursor keeps its position when earlier rows are inserted."""
+        instructor, token = self.create_and_authenticate_instructor()
+        today = datetime.date.today()
+        self.create_office_hour_slot(instructor=instructor, course_name='Course A', start_date=today + datetime.timedelta(days=2))
+        self.create_office_hour_slot(instructor=instructor, course_name='Course B', start_date=today + datetime.timedelta(days=3))
+
+        response = self.client.get(self.get_slots_url, {'page_size': 1})
+        cursor = response.data['next_cursor']
+
+        # Insert a slot that sorts before the cursor position
+        self.create_office_hour_slot(instructor=instructor, course_name='Course Early', start_date=today)
+
+        response = self.client.get(self.get_slots_url, {'page_size': 1, 'cursor': cursor})
+        self.assertEqual(response.data['slots'][0]['course_name'], 'Course B')
+
+    def test_get_slots_invalid_cursor(self):
+        """Test a malformed cursor returns 400 Bad Request."""
+        instructor, token = self.create_and_authenticate_instructor()
+
+        response = self.client.get(self.get_slots_url, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_get_slots_conditional_get(self):
+        """Test an unchanged slot list returns 304 until a slot changes."""
+        instructor, token = self.create_and_authenticate_instructor()
+        slot, policy = self.create_office_hour_slot(instructor=instructor)
+
+        response = self.client.get(self.get_slots_url)
+        etag = response['ETag']
+
+        response = self.client.get(self.get_slots_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        policy.set_student_limit = 3
+        policy.save()
+
+        response = self.client.get(self.get_slots_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
     def test_get_slots_security_unauthenticated(self):
         """Test accessing slots without authentication (401 Unauthorized)."""
         self.client.credentials()
@@ -90,7 +178,7 @@ class GetUserBookingsViewTestCase(BaseTestCase):
         student2 = self.create_student(username='student2', email='student2@example.com')
         
         booking1 = self.create_booking(office_hour_slot=slot, student=student1)
-        booking2 = self.create_booking(office_hour_slot=slot, student=student2)
+        booking2 = self.create_booking(office_hour_slot=slot, student=student2, date=datetime.date.today() + datetime.timedelta(days=2))
         
         response = self.client.get(self.get_bookings_url)
         
@@ -98,6 +186,41 @@ class GetUserBookingsViewTestCase(BaseTestCase):
         self.assertIn('bookings', response.data)
         self.assertGreaterEqual(len(response.data['bookings']), 2)
     
+    def test_get_bookings_etag_changes_with_student_profile(self):
+        """Test a change to a booked student's email invalidates the booking list ETag."""
+        instructor, token = self.create_and_authenticate_instructor()
+        slot, policy = self.create_office_hour_slot(instructor=instructor)
+        student = self.create_student(username='student1', email='student1@example.com')
+        self.create_booking(office_hour_slot=slot, student=student)
+
+        etag = self.client.get(self.get_bookings_url)['ETag']
+        response = self.client.get(self.get_bookings_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        student.email = 'renamed@example.com'
+        student.save()
+
+        response = self.client.get(self.get_bookings_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_get_bookings_query_count_is_constant(self):
+        """Test the booking list stays within a fixed number of queries regardless of size."""
+        instructor, token = self.create_and_authenticate_instructor()
+        slot, policy = self.create_office_hour_slot(instructor=instructor)
+
+        for i in range(8):
+            student = self.create_student(username=f'student_q{i}', email=f'student_q{i}@example.com')
+            self.create_booking(office_hour_slot=slot, student=student, date=datetime.date.today() + datetime.timedelta(days=i + 1))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.get_bookings_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['bookings']), 8)
+        self.assertIn('username', response.data['bookings'][0]['student'])
+        self.assertLessEqual(len(queries), MAX_BOOKING_LIST_QUERIES)
+    
     def test_get_bookings_filter_by_status_pending(self):
         """Test filtering bookings by pending status."""
         instructor, token = self.create_and_authenticate_instructor()
@@ -111,7 +234,7 @@ class GetUserBookingsViewTestCase(BaseTestCase):
         pending_booking.status = 'pending'
         pending_booking.save()
         
-        confirmed_booking = self.create_booking(office_hour_slot=slot, student=student2)
+        confirmed_booking = self.create_booking(office_hour_slot=slot, student=student2, date=datetime.date.today() + datetime.timedelta(days=2))
         confirmed_booking.status = 'confirmed'
         confirmed_booking.save()
         
@@ -134,7 +257,7 @@ class GetUserBookingsViewTestCase(BaseTestCase):
         confirmed_booking.status = 'confirmed'
         confirmed_booking.save()
         
-        pending_booking = self.create_booking(office_hour_slot=slot, student=student2)
+        pending_booking = self.create_booking(office_hour_slot=slot, student=student2, date=datetime.date.today() + datetime.timedelta(days=2))
         pending_booking.status = 'pending'
         pending_booking.save()
         
@@ -520,6 +643,23 @@ class InstructorDataViewTestCase(BaseTestCase):
         self.assertIn('slots', response.data)
         self.assertEqual(len(response.data['slots']), 1)
     
+    def test_get_instructor_data_etag_changes_with_profile(self):
+        """Test a change to the instructor's name or email invalidates the ETag."""
+        instructor = self.create_instructor(username='test_instructor')
+        self.create_office_hour_slot(instructor=instructor)
+        url = reverse('get-instructor-data', kwargs={'user_id': instructor.id})
+
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        instructor.first_name = 'Renamed'
+        instructor.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['full_name'], 'Renamed')
+        self.assertNotEqual(response['ETag'], etag)
+
     def test_get_instructor_data_not_found(self):
         """Test getting non-existent instructor (404 Not Found)."""
         url = reverse('get-instructor-data', kwargs={'user_id': 99999})  # Fixed: use hyphen
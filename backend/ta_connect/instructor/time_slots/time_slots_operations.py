@@ -13,6 +13,7 @@ from accounts.permissions import IsInstructor
 from instructor.serializers.time_slots_serializer import TimeSlotSerializer
 from utils.error_formatter import format_serializer_errors
 from student.utils.cancel_student_bookings import cancel_student_bookings
+from student.utils.availability_cache import slot_availability_keys, invalidate_availability_keys
 from student.models import Booking
 from utils.email_sending.booking.send_update_booking_email_mass import send_update_booking_email_mass
 from utils.push_notifications.booking.send_booking_update import send_booking_update_push_mass
@@ -122,7 +123,11 @@ class TimeSlotDetailView(GenericAPIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
+        # Cached availability of the old schedule, dropped once the slot is saved
+        stale_availability_keys = slot_availability_keys(time_slot)
+
         updated_slot = serializer.save()
+        invalidate_availability_keys(stale_availability_keys)
 
         # Cancel affected bookings based on which critical fields were changed
         critical_fields_changed = getattr(updated_slot, 'critical_fields_changed', [])
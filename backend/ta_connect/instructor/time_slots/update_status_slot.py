@@ -8,6 +8,7 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from instructor.schemas.time_slot_schemas import update_status_time_slot_response
 from student.utils.cancel_student_bookings import cancel_student_bookings
+from student.utils.availability_cache import slot_availability_keys, invalidate_availability_keys
 
 @swagger_auto_schema(
     method='POST',
@@ -41,9 +42,13 @@ def update_time_slot_status(request, slot_id):
 
         time_slot = get_object_or_404(OfficeHourSlot, id=slot_id, instructor=user)
 
+        # Cached availability under the current slot version, dropped once the status flips
+        stale_availability_keys = slot_availability_keys(time_slot)
+
         try:  # making a try and except to handle database errors       
             time_slot.status = not time_slot.status
             time_slot.save()
+            invalidate_availability_keys(stale_availability_keys)
         except Exception as e:
             return Response({'error': f'Failed to update time slot'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
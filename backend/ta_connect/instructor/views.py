@@ -9,6 +9,10 @@ from accounts.models import User
 from student.models import Booking
 from instructor.serializers.get_user_booking_serializer import GetUserBookingSerializer
 from instructor.serializers.booking_analytics_serializer import BookingAnalyticsSerializer
+from student.serializers.booking_list_serializer import BookingListSerializer
+from student.utils.booking_projection import get_instructor_bookings, INSTRUCTOR_BOOKING_ORDERING, BOOKING_LIST_VERSION_FIELDS
+from utils.pagination import KeysetPagination, InvalidCursor
+from utils.conditional_get import collection_etag, is_not_modified, not_modified_response, set_etag
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .schemas.slot_schemas import (
@@ -18,9 +22,14 @@ from .schemas.slot_schemas import (
     get_instructor_data_swagger
 )
 from django.db.models import Q, Count
-from student.utils.complete_book import complete_booking
 from utils.error_formatter import format_serializer_errors
 
+# Keyset ordering for slot lists, backed by idx_slot_instructor_keyset
+SLOT_ORDERING = ('start_date', 'start_time', 'id')
+
+# Timestamps whose maximum changes whenever a rendered slot row changes (used for ETags)
+SLOT_LIST_VERSION_FIELDS = ('updated_at', 'policy__updated_at')
+
 # Create your views here.
 class GetUserSlotsView(GenericAPIView):
     permission_classes = [IsInstructor]
@@ -30,9 +39,15 @@ class GetUserSlotsView(GenericAPIView):
         try:
             user = request.user
 
-            slots = OfficeHourSlot.objects.filter(instructor=user)
-            books = Booking.objects.filter(office_hour__in=slots)
-            return Response({
+            slots = OfficeHourSlot.objects.filter(instructor=user).select_related('policy')
+
+            etag = collection_etag(slots, request, SLOT_LIST_VERSION_FIELDS)
+            if is_not_modified(request, etag):
+                return not_modified_response(etag)
+
+            paginator = KeysetPagination(ordering=SLOT_ORDERING)
+            slots = paginator.paginate_queryset(slots, request)
+            response = Response({
                 'slots': [
                     {
                         'id': slot.id,
@@ -51,8 +66,12 @@ class GetUserSlotsView(GenericAPIView):
                         'set_student_limit': slot.policy.set_student_limit if hasattr(slot, 'policy') else None,
                     } for slot in slots
                 ],
+                'next_cursor': paginator.next_cursor,
             }, status=200)
+            return set_etag(response, etag)
         
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': f'An error occurred'}, status=500)
 
@@ -77,61 +96,28 @@ class GetUserBookingView(GenericAPIView):
             start_date = serializer.validated_data.get('start_date')
             end_date = serializer.validated_data.get('end_date')
 
-            # Get all slots for the instructor
-            slots = OfficeHourSlot.objects.filter(instructor=user)
+            books = get_instructor_bookings(
+                user,
+                booking_status=booking_status,
+                start_date=start_date,
+                end_date=end_date,
+            )
 
-            # Start with base query
-            books = Booking.objects.filter(office_hour__in=slots)
+            etag = collection_etag(books, request, BOOKING_LIST_VERSION_FIELDS)
+            if is_not_modified(request, etag):
+                return not_modified_response(etag)
 
-            # Filter bookings based on date range if provided
-            if start_date and end_date:
-                books = books.filter(date__range=(start_date, end_date))
-            elif start_date:
-                books = books.filter(date__gte=start_date)
-            elif end_date:
-                books = books.filter(date__lte=end_date)
-            
-            # Filter by status if provided
-            if booking_status:
-                books = books.filter(status=booking_status)
-            
-            for book in books:
-                if not book.is_completed:
-                    success, msg = complete_booking(book)
-                
-            return Response({
-                'bookings': [
-                    {
-                        'id': book.id,
-                        'student': {
-                            'id': book.student.id,
-                            'username': book.student.username,
-                            'email': book.student.email,
-                            'first_name': book.student.first_name,
-                            'last_name': book.student.last_name,
-                        },
-                        'office_hour': {
-                            'id': book.office_hour.id,
-                            'course_name': book.office_hour.course_name,
-                            'section': book.office_hour.section,
-                            'day_of_week': book.office_hour.day_of_week,
-                            'start_time': book.office_hour.start_time.strftime('%H:%M:%S') if book.office_hour.start_time else None,
-                            'end_time': book.office_hour.end_time.strftime('%H:%M:%S') if book.office_hour.end_time else None,
-                            'duration_minutes': book.office_hour.duration_minutes,
-                            'room': book.office_hour.room,
-                            'status': book.office_hour.status,
-                        },
-                        'date': book.date.strftime('%Y-%m-%d') if book.date else None,
-                        'start_time': book.start_time.isoformat() if book.start_time else None,
-                        'description': book.book_description if book.book_description else None,
-                        'is_cancelled': book.is_cancelled,
-                        'is_completed': book.is_completed,
-                        'status': book.status,
-                        'created_at': book.created_at.isoformat() if book.created_at else None,
-                    } for book in books
-                ]
+            paginator = KeysetPagination(ordering=INSTRUCTOR_BOOKING_ORDERING)
+            books = paginator.paginate_queryset(books, request)
+
+            response = Response({
+                'bookings': BookingListSerializer(books, many=True).data,
+                'next_cursor': paginator.next_cursor,
             }, status=200)
+            return set_etag(response, etag)
         
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             print(f"Error: {str(e)}")
             return Response({'error': f'An error occurred'}, status=500)
@@ -187,6 +173,15 @@ class InstructorDataView(GenericAPIView):
         """
         try:
             instructor = User.objects.get(id=user_id, user_type='instructor')
+            slots = OfficeHourSlot.objects.filter(instructor=instructor).select_related('policy')
+
+            # The instructor's name and email are part of the response
+            etag = collection_etag(slots, request, SLOT_LIST_VERSION_FIELDS, extra_version=instructor.updated_at)
+            if is_not_modified(request, etag):
+                return not_modified_response(etag)
+
+            paginator = KeysetPagination(ordering=SLOT_ORDERING)
+            slots = paginator.paginate_queryset(slots, request)
             data = {
                 'id': instructor.id,
                 'username': instructor.username,
@@ -207,13 +202,16 @@ class InstructorDataView(GenericAPIView):
                         'location': slot.room,  # Add location as alias for room
                         'capacity': slot.policy.set_student_limit if hasattr(slot, 'policy') and slot.policy else 1,  # Add capacity
                         'status': slot.status,
-                    } for slot in OfficeHourSlot.objects.filter(instructor=instructor)
-                ]
+                    } for slot in slots
+                ],
+                'next_cursor': paginator.next_cursor,
             }
-            return Response(data, status=200)
+            return set_etag(Response(data, status=200), etag)
 
         except User.DoesNotExist:
             return Response({'error': 'Instructor not found'}, status=404)
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': 'An error occurred'}, status=500)
 
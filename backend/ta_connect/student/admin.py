@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
-from .models import Booking
+from django.utils import timezone
+from .models import Booking, OutboxMessage, NotificationDigestItem, PushSubscriptionHealth
 from django.db import connection
 from django.db.utils import OperationalError, ProgrammingError
 import logging
@@ -14,6 +15,32 @@ class BookingAdmin(admin.ModelAdmin):
     date_hierarchy = "date"
     readonly_fields = ("created_at", "end_time", "updated_at")
 
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "topic", "status", "attempts", "available_at", "processed_at", "created_at")
+    list_filter = ("status", "topic")
+    search_fields = ("topic", "last_error")
+    readonly_fields = ("created_at", "updated_at", "processed_at")
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected messages")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status="pending").update(
+            status="pending", attempts=0, available_at=timezone.now(), updated_at=timezone.now()
+        )
+        self.message_user(request, f"Requeued {updated} messages.")
+
+class NotificationDigestItemAdmin(admin.ModelAdmin):
+    list_display = ("id", "recipient", "event_type", "channel", "booking_id", "created_at", "sent_at")
+    list_filter = ("event_type", "channel", "sent_at")
+    search_fields = ("recipient__username", "recipient__email")
+    readonly_fields = ("created_at", "updated_at", "sent_at")
+
+class PushSubscriptionHealthAdmin(admin.ModelAdmin):
+    list_display = ("id", "subscription", "last_success_at", "last_failure_at", "consecutive_failures", "created_at")
+    list_filter = ("last_success_at",)
+    readonly_fields = ("created_at", "updated_at")
+    raw_id_fields = ("subscription",)
+
 def _table_exists(table_name: str) -> bool:
     try:
         return table_name in connection.introspection.table_names()
@@ -27,3 +54,12 @@ else:
         "Skipping admin registration for Booking because table 'student_booking' does not exist. "
         "Run migrations (manage.py makemigrations && manage.py migrate) to create the table."
     )
+
+if _table_exists("student_outboxmessage"):
+    admin.site.register(OutboxMessage, OutboxMessageAdmin)
+
+if _table_exists("student_notificationdigestitem"):
+    admin.site.register(NotificationDigestItem, NotificationDigestItemAdmin)
+
+if _table_exists("student_pushsubscriptionhealth"):
+    admin.site.register(PushSubscriptionHealth, PushSubscriptionHealthAdmin)
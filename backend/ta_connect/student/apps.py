@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class StudentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'student'
+
+    def ready(self):
+        # Registers the booking side-effect handlers with the outbox
+        from student.utils import booking_side_effects  # noqa: F401
+        # Registers the handler sending emails queued by the email rate limiter
+        from utils.email_sending import rate_limiter  # noqa: F401
@@ -6,19 +6,21 @@ from rest_framework import status
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
-from student.utils.complete_book import complete_booking
 from student.models import Booking
-from student.sendBookingEmail import send_booking_cancelled_email,send_booking_update_email, send_booking_pending_email
-from utils.push_notifications.booking.send_booking_cancelled import send_booking_cancelled_push
-from utils.push_notifications.booking.send_booking_pending import send_booking_pending_push
-from utils.google_calendar import remove_booking_from_calendars
+from django.db import transaction
+from student.utils.booking_side_effects import enqueue_booking_pending, enqueue_booking_rescheduled, enqueue_booking_cancelled
 from instructor.models import OfficeHourSlot
 from accounts.permissions import IsStudent
 from student.serializers.create_book_serializer import CreateBookingSerializer
 from student.serializers.update_book_serializer import UpdateBookingSerializer
 from student.serializers.cancel_book_serializer import CancelBookingSerializer
-from student.serializers.available_times_serializer import AvailableTimesSerializer
-from student.utils.calculate_available_times import get_available_times
+from student.serializers.available_times_serializer import AvailableTimesSerializer, AvailableTimesRangeSerializer
+from student.serializers.booking_list_serializer import BookingListSerializer
+from student.utils.calculate_available_times import get_available_times, get_available_times_range
+from student.utils.book_is_time_available import BookingConflictError
+from student.utils.booking_projection import get_student_bookings, STUDENT_BOOKING_ORDERING, BOOKING_LIST_VERSION_FIELDS
+from utils.pagination import KeysetPagination, InvalidCursor
+from utils.conditional_get import collection_etag, is_not_modified, not_modified_response, set_etag
 from utils.error_formatter import format_serializer_errors
 from student.schemas.booking_schemas import (
     create_booking_swagger,
@@ -52,40 +54,23 @@ class BookingCreateView(GenericAPIView):
                 date_from = date.fromisoformat(date_from)
                 date_to = date.fromisoformat(date_to)
 
-            bookings = Booking.objects.filter(student=request.user, date__range=[date_from, date_to]).order_by('-date', '-start_time')
+            bookings = get_student_bookings(request.user, date_from, date_to)
 
-            for booking in bookings:
-                if not booking.is_completed:
-                    success, message = complete_booking(booking)
+            # Let polling clients skip the list build when nothing changed
+            etag = collection_etag(bookings, request, BOOKING_LIST_VERSION_FIELDS)
+            if is_not_modified(request, etag):
+                return not_modified_response(etag)
 
-            return Response({
-                'bookings': [
-                    {
-                        'id': booking.id,
-                        'instructor': {
-                            'id': booking.office_hour.instructor.id,
-                            'full_name': booking.office_hour.instructor.full_name,
-                            'email': booking.office_hour.instructor.email,
-                        },
-                        'course_name': booking.office_hour.course_name,
-                        'section': booking.office_hour.section,
-                        'room': booking.office_hour.room,
-                        'date': booking.date,
-                        'start_time': booking.start_time.isoformat() if booking.start_time else None,
-                        'end_time': booking.end_time.isoformat() if booking.end_time else None,
-                        'book_description': booking.book_description,
-                        'is_cancelled': booking.is_cancelled,
-                        'is_completed': booking.is_completed,
-                        'status': booking.status,
-                        'office_hour': {
-                            'id': booking.office_hour.id,
-                            'start_date': booking.office_hour.start_date,
-                            'end_date': booking.office_hour.end_date,
-                            'day_of_week': booking.office_hour.day_of_week,
-                        }
-                    } for booking in bookings
-                ]
+            paginator = KeysetPagination(ordering=STUDENT_BOOKING_ORDERING)
+            bookings = paginator.paginate_queryset(bookings, request)
+
+            response = Response({
+                'bookings': BookingListSerializer(bookings, many=True).data,
+                'next_cursor': paginator.next_cursor,
             }, status=status.HTTP_200_OK)
+            return set_etag(response, etag)
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             print(f"Error fetching bookings: {e}")
             return Response({'error': "something went wrong!"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -108,31 +93,11 @@ class BookingCreateView(GenericAPIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            booking = serializer.save()
-
-            # Send booking pending emails
-            send_booking_pending_email(
-                student=request.user,
-                instructor=slot.instructor,
-                slot=slot,
-                booking_date=booking.date,
-                booking_time=booking.start_time,  # Use actual DateTimeField from booking
-                booking_id=booking.id
-            )
-
-            # Send push notifications
-            try:
-                send_booking_pending_push(
-                    student=request.user,
-                    instructor=slot.instructor,
-                    slot=slot,
-                    booking_date=serializer.validated_data['date'],
-                    booking_time=serializer.validated_data['start_time'],
-                    booking_id=booking.id
-                )
-            except Exception as e:
-                # Log but don't fail the booking
-                print(f"Failed to send push notification: {e}")
+            # Pending emails and push notifications are queued in the same transaction
+            # and delivered by the outbox worker
+            with transaction.atomic():
+                booking = serializer.save()
+                enqueue_booking_pending(booking)
 
             return Response({
                 'slot_id': slot.id,
@@ -143,6 +108,8 @@ class BookingCreateView(GenericAPIView):
                 'message': f"Successfully booked slot {slot.id} on {serializer.validated_data['date']} at {serializer.validated_data['start_time']}."
             }, status=status.HTTP_201_CREATED)
         
+        except BookingConflictError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             print(f"Error in booking: {e}")
             return Response(
@@ -163,6 +130,8 @@ class BookingDetailView(GenericAPIView):
         if self.request.method == 'DELETE':
             return CancelBookingSerializer
         if self.request.method == 'GET':
+            if 'date_from' in self.request.query_params or 'date_to' in self.request.query_params:
+                return AvailableTimesRangeSerializer
             return AvailableTimesSerializer
         return super().get_serializer_class()
 
@@ -180,37 +149,21 @@ class BookingDetailView(GenericAPIView):
         #!these old values before update are not used currently but may be useful in the future
         old_date = booking.date
         old_time = booking.start_time
+        old_event_ids = (booking.student_calendar_event_id, booking.instructor_calendar_event_id)
 
         serializer = self.get_serializer(instance=booking, data=request.data, context={'request': request})
 
         if not serializer.is_valid():
             return Response(format_serializer_errors(serializer.errors), status=status.HTTP_400_BAD_REQUEST)
 
-        updated_booking = serializer.save()
-
-        #send email notifications
-        send_booking_pending_email(
-            student=request.user,
-            instructor=booking.office_hour.instructor,
-            slot=booking.office_hour,
-            booking_date=updated_booking.date,
-            booking_time=updated_booking.start_time,  # DateTimeField (UTC)
-            booking_id=updated_booking.id
-        )
-
-        # Send push notifications
         try:
-            send_booking_pending_push(
-                student=request.user,
-                instructor=booking.office_hour.instructor,
-                slot=booking.office_hour,
-                booking_date=updated_booking.date,
-                booking_time=updated_booking.start_time,
-                booking_id=updated_booking.id
-            )
-        except Exception as e:
-            print(f"Failed to send push notification: {e}")
-        
+            with transaction.atomic():
+                updated_booking = serializer.save()
+                # Queue the old time's calendar removal and the pending notifications for the new time
+                enqueue_booking_rescheduled(updated_booking, *old_event_ids)
+        except BookingConflictError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
         return Response({
             'success': True, 
             'booking_id': updated_booking.id, 
@@ -228,15 +181,6 @@ class BookingDetailView(GenericAPIView):
 
         booking = get_object_or_404(Booking, id=pk, student=request.user)
 
-        # Remove calendar events before cancellation
-        try:
-            student_deleted, instructor_deleted = remove_booking_from_calendars(booking)
-            if student_deleted or instructor_deleted:
-                print(f"Calendar events removed - Student: {student_deleted}, Instructor: {instructor_deleted}")
-        except Exception as e:
-            # Log error but don't fail the cancellation
-            print(f"Failed to remove calendar events: {e}")
-
         serializer = self.get_serializer(
             instance=booking, 
             data={'is_cancelled': True}, 
@@ -247,30 +191,10 @@ class BookingDetailView(GenericAPIView):
         if not serializer.is_valid():
             return Response(format_serializer_errors(serializer.errors), status=status.HTTP_400_BAD_REQUEST)
 
-        cancelled_booking = serializer.save()
-
-        #send email notifications
-        send_booking_cancelled_email(
-            student=request.user,
-            instructor=booking.office_hour.instructor,
-            slot=booking.office_hour,
-            booking_date=booking.date,
-            booking_time=booking.start_time
-        )
-
-        # Send push notifications (cancelled by student)
-        try:
-            send_booking_cancelled_push(
-                student=request.user,
-                instructor=booking.office_hour.instructor,
-                slot=booking.office_hour,
-                booking_date=booking.date,
-                booking_time=booking.start_time,
-                booking_id=booking.id,
-                cancelled_by='student'
-            )
-        except Exception as e:
-            print(f"Failed to send push notification: {e}")
+        # Calendar removal, emails and push notifications are queued with the cancellation
+        with transaction.atomic():
+            cancelled_booking = serializer.save()
+            enqueue_booking_cancelled(cancelled_booking, cancelled_by='student')
 
         return Response({
             'success': True,
@@ -281,7 +205,8 @@ class BookingDetailView(GenericAPIView):
     @swagger_auto_schema(**available_times_swagger)
     def get(self, request, pk):
         '''
-        Get available times for a specific office hour slot with a date input
+        Get available times for a specific office hour slot with a date input,
+        or for every slot date in a range with date_from/date_to inputs.
         'pk' here refers to the OfficeHourSlot ID.
         '''
         try:
@@ -304,6 +229,21 @@ class BookingDetailView(GenericAPIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
+            # Range request: availability for every slot date between date_from and date_to
+            if 'date_from' in serializer.validated_data:
+                date_from = serializer.validated_data['date_from']
+                date_to = serializer.validated_data['date_to']
+                available_times = get_available_times_range(slot, date_from, date_to)
+
+                return Response({
+                    'slot_id': slot.id,
+                    'date_from': date_from,
+                    'date_to': date_to,
+                    'available_times': {
+                        date_obj.isoformat(): times for date_obj, times in available_times.items()
+                    }
+                }, status=200)
+
             # Use utility function to get available times
             selected_date = serializer.validated_data.get('date')
             available_times = get_available_times(slot, selected_date)
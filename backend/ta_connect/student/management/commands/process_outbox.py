@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from student.utils.outbox import delivered_any, process_outbox
+from utils.periodic import PeriodicCommandMixin
+
+
+class Command(PeriodicCommandMixin, BaseCommand):
+    help = 'Deliver queued booking side-effects (emails, push notifications, calendar changes).'
+    job_label = 'Outbox worker'
+    loop_message = 'Processing the outbox'
+    default_interval = 5
+    interval_help = 'Seconds to wait when the outbox is empty when running with --loop'
+    # Keep claiming batches while there is work; only wait once the outbox is empty
+    is_busy = staticmethod(delivered_any)
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Messages claimed per batch (default: OUTBOX_BATCH_SIZE).',
+        )
+
+    def get_job(self, options):
+        batch_size = options['batch_size'] or settings.OUTBOX_BATCH_SIZE
+        return lambda: process_outbox(batch_size)
+
+    def report(self, result):
+        self.stdout.write(self.style.SUCCESS(
+            f"Delivered {result['done']} messages, {result['retried']} scheduled for retry, {result['dead']} dead."
+        ))
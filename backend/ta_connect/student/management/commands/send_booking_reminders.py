@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from student.utils.booking_reminders import schedule_booking_reminders
+from utils.periodic import PeriodicCommandMixin
+
+
+class Command(PeriodicCommandMixin, BaseCommand):
+    help = 'Queue reminders for confirmed bookings starting within the next BOOKING_REMINDER_LEAD_MINUTES.'
+    job_label = 'Booking reminder scheduler'
+    loop_message = 'Scanning for upcoming bookings'
+    default_interval = 60
+
+    def get_job(self, options):
+        return schedule_booking_reminders
+
+    def report(self, reminded):
+        self.stdout.write(self.style.SUCCESS(f"Queued reminders for {reminded} bookings."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from student.utils.booking_sweeper import sweep_ended_bookings
+from utils.periodic import PeriodicCommandMixin
+
+
+class Command(PeriodicCommandMixin, BaseCommand):
+    help = 'Complete ended confirmed bookings and cancel ended pending bookings.'
+    job_label = 'Booking sweeper'
+    loop_message = 'Sweeping ended bookings'
+    default_interval = 60
+
+    def get_job(self, options):
+        return sweep_ended_bookings
+
+    def report(self, result):
+        self.stdout.write(self.style.SUCCESS(
+            f"Completed {result['completed']} bookings, cancelled {result['cancelled']} pending bookings."
+        ))
@@ -3,6 +3,7 @@ from django.conf import settings
 import datetime
 from django.utils import timezone
 from core.models import BaseModel
+from student.utils.availability_cache import invalidate_availability
 # Create your models here.
 
 class Booking(BaseModel):
@@ -32,6 +33,10 @@ class Booking(BaseModel):
     student_calendar_event_id = models.CharField(max_length=255, blank=True, null=True, verbose_name="Student Calendar Event ID")
     instructor_calendar_event_id = models.CharField(max_length=255, blank=True, null=True, verbose_name="Instructor Calendar Event ID")
 
+    # When the reminder before the session was queued (see student/utils/booking_reminders.py);
+    # cleared when the booking moves to a new time
+    reminder_sent_at = models.DateTimeField(blank=True, null=True)
+
 
     def save(self, *args, **kwargs):
         # Sync status based on boolean fields
@@ -73,6 +78,8 @@ class Booking(BaseModel):
         self.is_cancelled = True
         self.status = "cancelled"
         self.save()
+        # The cancelled time is free again
+        invalidate_availability(self.office_hour, self.date)
 
     def complete(self):
         """Helper method to complete a booking."""
@@ -110,9 +117,118 @@ class Booking(BaseModel):
             models.Index(fields=['office_hour', 'status'], name='idx_booking_slot_status'),
             models.Index(fields=['date', 'status'], name='idx_booking_date_status'),
             models.Index(fields=['created_at'], name='idx_booking_created_at'),
+            # Keyset pagination of the student and instructor booking lists; the instructor
+            # list spans all of an instructor's slots, so its index cannot lead with office_hour
+            models.Index(fields=['student', 'date', 'start_time', 'id'], name='idx_booking_student_keyset'),
+            models.Index(fields=['date', 'start_time', 'id'], name='idx_booking_date_keyset'),
+            # Reminder scan: confirmed bookings starting within the next window
+            models.Index(fields=['status', 'start_time'], name='idx_booking_status_start'),
+        ]
+        constraints = [
+            # A start time on a slot can hold one active booking; enforced by the database
+            # so concurrent requests cannot both book it
+            models.UniqueConstraint(
+                fields=['office_hour', 'start_time'],
+                condition=models.Q(is_cancelled=False),
+                name='uniq_booking_active_slot_start',
+            ),
         ]
 
     def __str__(self):
         # office_hour.course_name exists on OfficeHourSlot; section may be optional
         section = getattr(self.office_hour, "section", "") or ""
-        return f"{getattr(self.student, 'username', self.student_id)} -> {self.office_hour.course_name} {section}"
\ No newline at end of file
+        return f"{getattr(self.student, 'username', self.student_id)} -> {self.office_hour.course_name} {section}"
+
+class OutboxMessage(BaseModel):
+    """
+    A side-effect of a booking change (email, push notification or calendar call).
+
+    Rows are written in the same transaction as the booking change and delivered
+    afterwards by the outbox worker (see student/utils/outbox.py), so requests do not
+    wait on third parties and no side-effect is lost if the process dies mid-request.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("dead", "Dead"),
+    ]
+
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    # When the message may next be claimed: now for new rows, the backoff time after a
+    # failure, or the end of the lease while a worker holds it
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='idx_outbox_status_available'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.id} ({self.status})"
+
+
+class NotificationDigestItem(BaseModel):
+    """
+    A booking notification held back for a recipient who opted into digests.
+
+    Items are grouped per (recipient, event type, channel) and sent as one digest
+    email or push once the group's NOTIFICATION_DIGEST_WINDOW_SECONDS window has
+    passed (see student/utils/notification_digest.py).
+    """
+
+    EVENT_CHOICES = [
+        ("pending", "Pending"),
+        ("confirmed", "Confirmed"),
+        ("cancelled", "Cancelled"),
+    ]
+    CHANNEL_CHOICES = [
+        ("email", "Email"),
+        ("push", "Push"),
+    ]
+
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="digest_items")
+    event_type = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    # A plain id: the digest still describes bookings deleted before it is sent
+    booking_id = models.PositiveIntegerField()
+    # Display fields captured when the event happened (names, course, date, time, room)
+    summary = models.JSONField(default=dict, blank=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', 'event_type', 'channel', 'sent_at'], name='idx_digest_recipient_group'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.channel} digest item for user {self.recipient_id} (booking {self.booking_id})"
+
+
+class PushSubscriptionHealth(BaseModel):
+    """
+    Delivery history of one web push subscription (one browser/device).
+    django-webpush's SubscriptionInfo has no timestamps, so this row records when the
+    endpoint last accepted a notification and how many sends in a row have failed.
+    Used by sweep_push_subscriptions to prune endpoints that stopped working.
+
+    Kept out of the accounts app: webpush's migrations depend on the user model, so a
+    link from accounts to webpush would make their migrations depend on each other.
+    """
+    subscription = models.OneToOneField("webpush.SubscriptionInfo", on_delete=models.CASCADE, related_name="health")
+    last_success_at = models.DateTimeField(blank=True, null=True)
+    last_failure_at = models.DateTimeField(blank=True, null=True)
+    consecutive_failures = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Push Subscription Health"
+        verbose_name_plural = "Push Subscription Health"
+
+    def __str__(self):
+        return f"Health of push subscription {self.subscription_id}"
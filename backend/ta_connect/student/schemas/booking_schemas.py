@@ -1,4 +1,5 @@
 from drf_yasg import openapi
+from utils.pagination import KEYSET_PAGINATION_PARAMETERS
 
 # Response schemas
 book_slot_response = openapi.Schema(
@@ -77,6 +78,7 @@ create_booking_swagger = {
             )
         ),
         400: 'Bad Request',
+        409: 'Conflict - the time was booked by a concurrent request',
         500: 'Internal Server Error'
     }
 }
@@ -102,7 +104,7 @@ get_bookings_swagger = {
             required=False,
             example='2025-11-30'
         )
-    ],
+    ] + KEYSET_PAGINATION_PARAMETERS,
     'responses': {
         200: openapi.Response(
             description='Bookings retrieved successfully',
@@ -135,10 +137,13 @@ get_bookings_swagger = {
                                 'status': openapi.Schema(type=openapi.TYPE_STRING, example='completed'),
                             }
                         )
-                    )
+                    ),
+                    'next_cursor': openapi.Schema(type=openapi.TYPE_STRING, nullable=True, description='Cursor for the next page, null on the last page'),
                 }
             )
         ),
+        304: 'Not Modified - collection unchanged since the If-None-Match ETag',
+        400: 'Bad Request - Invalid cursor',
         500: 'Internal Server Error'
     }
 }
@@ -169,6 +174,7 @@ update_booking_swagger = {
             )
         ),
         400: 'Bad Request',
+        409: 'Conflict - the time was booked by a concurrent request',
         404: 'Not Found',
         500: 'Internal Server Error'
     }
@@ -204,17 +210,36 @@ cancel_booking_swagger = {
 }
 
 available_times_swagger = {
-    'operation_description': 'Get available times for a specific office hour slot on a given date.',
+    'operation_description': 'Get available times for a specific office hour slot on a given date, '
+                             'or for every date of the slot in a range when date_from/date_to are given.',
     'manual_parameters': [
         openapi.Parameter(
             'date', 
             openapi.IN_QUERY, 
-            description='Date to check availability (YYYY-MM-DD)', 
+            description='Date to check availability (YYYY-MM-DD). Required unless date_from/date_to are given.', 
             type=openapi.TYPE_STRING, 
             format='date', 
-            required=True,
+            required=False,
             example='2025-12-01'
-        )
+        ),
+        openapi.Parameter(
+            'date_from',
+            openapi.IN_QUERY,
+            description='Start of the range to check (YYYY-MM-DD, inclusive). Used with date_to.',
+            type=openapi.TYPE_STRING,
+            format='date',
+            required=False,
+            example='2025-12-01'
+        ),
+        openapi.Parameter(
+            'date_to',
+            openapi.IN_QUERY,
+            description='End of the range to check (YYYY-MM-DD, inclusive, at most 366 days after date_from).',
+            type=openapi.TYPE_STRING,
+            format='date',
+            required=False,
+            example='2025-12-31'
+        ),
     ],
     'responses': {
         200: openapi.Response(
@@ -224,10 +249,13 @@ available_times_swagger = {
                 properties={
                     'slot_id': openapi.Schema(type=openapi.TYPE_INTEGER, example=1),
                     'date': openapi.Schema(type=openapi.TYPE_STRING, format='date', example='2025-12-01'),
+                    'date_from': openapi.Schema(type=openapi.TYPE_STRING, format='date', example='2025-12-01'),
+                    'date_to': openapi.Schema(type=openapi.TYPE_STRING, format='date', example='2025-12-31'),
                     'available_times': openapi.Schema(
                         type=openapi.TYPE_ARRAY,
                         items=openapi.Schema(type=openapi.TYPE_STRING, format='time', example='14:30:00'),
-                        description='List of available start times'
+                        description='List of available start times. For range requests, an object mapping '
+                                    'each slot date (YYYY-MM-DD) to its list of available start times'
                     ),
                 }
             )
@@ -33,4 +33,44 @@ class AvailableTimesSerializer(serializers.Serializer):
             if not is_allowed:
                 raise serializers.ValidationError("Your email is not authorized to book this office hour slot")
 
-        return attrs
\ No newline at end of file
+        return attrs
+
+# Longest date range a single availability request may cover
+MAX_AVAILABILITY_RANGE_DAYS = 366
+
+
+class AvailableTimesRangeSerializer(serializers.Serializer):
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+
+    def validate(self, attrs):
+        request = self.context.get('request')
+        slot = self.context.get('slot')
+        today = self.context.get('today')
+
+        if not slot:
+            raise serializers.ValidationError("slot must be provided in context")
+
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError("date_from must be on or before date_to")
+
+        if (attrs['date_to'] - attrs['date_from']).days >= MAX_AVAILABILITY_RANGE_DAYS:
+            raise serializers.ValidationError(f"Date range cannot exceed {MAX_AVAILABILITY_RANGE_DAYS} days")
+
+        if today > attrs['date_to']:
+            raise serializers.ValidationError("Date range cannot be in the past")
+
+        # Past dates have no available times, so start the range today at the earliest
+        attrs['date_from'] = max(attrs['date_from'], today)
+
+        if not slot.status:
+            raise serializers.ValidationError("This slot is inactive")
+
+        # Check if student email is allowed (if policy requires specific emails)
+        student_email = request.user.email
+        if hasattr(slot, 'policy') and slot.policy.require_specific_email:
+            is_allowed = slot.policy.allowed_students.filter(email=student_email).exists()
+            if not is_allowed:
+                raise serializers.ValidationError("Your email is not authorized to book this office hour slot")
+
+        return attrs
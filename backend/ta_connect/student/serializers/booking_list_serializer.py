@@ -0,0 +1,66 @@
+from rest_framework import serializers
+from accounts.models import User
+from instructor.models import OfficeHourSlot
+from student.models import Booking
+
+
+class IsoDateTimeField(serializers.DateTimeField):
+    """Render datetimes with isoformat() as stored (UTC), matching the other booking endpoints."""
+
+    def to_representation(self, value):
+        return value.isoformat() if value else None
+
+
+class BookingStudentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'email', 'first_name', 'last_name']
+
+
+class BookingInstructorSerializer(serializers.ModelSerializer):
+    full_name = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = User
+        fields = ['id', 'full_name', 'email']
+
+
+class BookingOfficeHourSerializer(serializers.ModelSerializer):
+    start_time = serializers.TimeField(format='%H:%M:%S')
+    end_time = serializers.TimeField(format='%H:%M:%S')
+
+    class Meta:
+        model = OfficeHourSlot
+        fields = [
+            'id', 'course_name', 'section', 'day_of_week', 'start_time', 'end_time',
+            'duration_minutes', 'start_date', 'end_date', 'room', 'status',
+        ]
+
+
+class BookingListSerializer(serializers.ModelSerializer):
+    """
+    Read-only representation of a booking row shared by the student and instructor
+    booking lists. Expects a queryset built with project_booking_list().
+    """
+    student = BookingStudentSerializer(read_only=True)
+    instructor = BookingInstructorSerializer(source='office_hour.instructor', read_only=True)
+    office_hour = BookingOfficeHourSerializer(read_only=True)
+    course_name = serializers.CharField(source='office_hour.course_name', read_only=True)
+    section = serializers.CharField(source='office_hour.section', read_only=True)
+    room = serializers.CharField(source='office_hour.room', read_only=True)
+    description = serializers.SerializerMethodField()
+    start_time = IsoDateTimeField(read_only=True)
+    end_time = IsoDateTimeField(read_only=True)
+    created_at = IsoDateTimeField(read_only=True)
+
+    class Meta:
+        model = Booking
+        fields = [
+            'id', 'student', 'instructor', 'course_name', 'section', 'room', 'office_hour',
+            'date', 'start_time', 'end_time', 'book_description', 'description',
+            'is_cancelled', 'is_completed', 'status', 'created_at',
+        ]
+        read_only_fields = fields
+
+    def get_description(self, booking):
+        return booking.book_description if booking.book_description else None
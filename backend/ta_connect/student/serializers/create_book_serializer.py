@@ -2,8 +2,10 @@
 from rest_framework import serializers
 from django.utils import timezone
 from student.models import Booking
-from django.db import transaction
-from student.utils.book_is_time_available import is_time_available
+from django.db import transaction, IntegrityError
+from instructor.models import OfficeHourSlot
+from student.utils.book_is_time_available import is_time_available, BookingConflictError
+from student.utils.availability_cache import invalidate_availability
 
 class CreateBookingSerializer(serializers.Serializer):
     slot_id = serializers.IntegerField(write_only=True)
@@ -69,11 +71,24 @@ class CreateBookingSerializer(serializers.Serializer):
         slot = self.context['slot']
         user = self.context['request'].user
 
-        booking = Booking.objects.create(
-            office_hour=slot,
-            student=user,
-            date=validated_data['date'],
-            start_time=validated_data['start_datetime'],
-            book_description=validated_data.get('book_description', ''),
-        )
+        # Lock the slot row so concurrent bookings of this slot run one at a time,
+        # then repeat the overlap check that validate() ran before the lock
+        list(OfficeHourSlot.objects.select_for_update().filter(pk=slot.pk).values_list('pk', flat=True))
+        if not is_time_available(slot, validated_data['date'], validated_data['start_datetime'], slot.duration_minutes):
+            raise BookingConflictError("This time was just booked by someone else")
+
+        # The partial unique constraint is the last line of defence (e.g. SQLite ignores row locks)
+        try:
+            with transaction.atomic():
+                booking = Booking.objects.create(
+                    office_hour=slot,
+                    student=user,
+                    date=validated_data['date'],
+                    start_time=validated_data['start_datetime'],
+                    book_description=validated_data.get('book_description', ''),
+                )
+        except IntegrityError:
+            raise BookingConflictError("This time was just booked by someone else")
+
+        invalidate_availability(slot, booking.date)
         return booking
\ No newline at end of file
@@ -1,6 +1,8 @@
 from rest_framework import serializers
+from django.db import transaction, IntegrityError
 from django.utils import timezone
-from student.utils.book_is_time_available import is_time_available
+from student.utils.book_is_time_available import is_time_available, BookingConflictError
+from student.utils.availability_cache import invalidate_availability
 
 class UpdateBookingSerializer(serializers.Serializer):
     new_date = serializers.DateField()
@@ -33,10 +35,22 @@ class UpdateBookingSerializer(serializers.Serializer):
 
     def update(self, instance, validated_data):
         booking = instance
+        old_date = booking.date
         booking.date = validated_data['new_date']
         booking.start_time = validated_data['new_start_datetime']
         # Clear end_time so it gets recalculated in the save() method
         booking.end_time = None
-        booking.pending()
-        booking.save()
+        # The new time gets its own reminder
+        booking.reminder_sent_at = None
+        # and, once confirmed, its own calendar events; the old time's events are
+        # removed through the outbox (enqueue_booking_rescheduled)
+        booking.student_calendar_event_id = None
+        booking.instructor_calendar_event_id = None
+        try:
+            with transaction.atomic():
+                booking.pending()
+        except IntegrityError:
+            raise BookingConflictError("This time was just booked by someone else")
+        # Free the old time and take the new one
+        invalidate_availability(booking.office_hour, old_date, booking.date)
         return booking
\ No newline at end of file
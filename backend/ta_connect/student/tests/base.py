@@ -2,18 +2,17 @@
 Base test class for student app tests.
 Provides common setup for user creation and authentication.
 """
-from rest_framework.test import APITestCase
+from django.core.cache import cache
+from rest_framework.test import APITestCase, APITransactionTestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 from accounts.models import User, InstructorProfile, StudentProfile
-from instructor.models import OfficeHourSlot, BookingPolicy
-from student.models import Booking
-import datetime
+from utils.testing import BookingFixturesMixin
 
 
-class BaseTestCase(APITestCase):
+class BaseTestMixin(BookingFixturesMixin):
     """
-    Base test case that provides common setup methods for all student tests.
-    Inherits from APITestCase which provides:
+    Common setup and helper methods for all student tests.
+    Combined with an API test case class below, which provides:
     - Isolated test database (created and destroyed for each test)
     - API client for making requests
     - Authentication helpers
@@ -25,6 +24,8 @@ class BaseTestCase(APITestCase):
         This method is called before every test method.
         """
         super().setUp()
+        # Cached availability must not leak between tests
+        cache.clear()
         # Common test data can be set up here if needed
         # Individual test methods can override or extend this
     
@@ -70,125 +71,6 @@ class BaseTestCase(APITestCase):
         
         return user
     
-    def create_office_hour_slot(self, instructor=None, course_name='Test Course',
-                               day_of_week='Mon', start_time='09:00:00',
-                               end_time='10:00:00', duration_minutes=10,
-                               start_date=None, end_date=None, room='TBA',
-                               status=True, **kwargs):
-        """
-        Helper method to create an OfficeHourSlot with associated BookingPolicy.
-        
-        Args:
-            instructor: User instance (instructor). If None, creates one.
-            course_name: Name of the course
-            day_of_week: Day of week ('Mon', 'Tue', etc.)
-            start_time: Start time as string 'HH:MM:SS' or time object
-            end_time: End time as string 'HH:MM:SS' or time object
-            duration_minutes: Duration in minutes
-            start_date: Start date (defaults to today)
-            end_date: End date (defaults to 30 days from today)
-            room: Room name
-            status: Active status
-            **kwargs: Additional fields for OfficeHourSlot
-        
-        Returns:
-            tuple: (OfficeHourSlot, BookingPolicy)
-        """
-        if instructor is None:
-            # Create unique instructor to avoid username conflicts
-            import uuid
-            unique_id = str(uuid.uuid4())[:8]
-            instructor = self.create_instructor(
-                username=f'instructor_{unique_id}',
-                email=f'instructor_{unique_id}@example.com'
-            )
-        
-        # Parse time strings if provided as strings
-        if isinstance(start_time, str):
-            start_time = datetime.datetime.strptime(start_time, '%H:%M:%S').time()
-        if isinstance(end_time, str):
-            end_time = datetime.datetime.strptime(end_time, '%H:%M:%S').time()
-        
-        # Set default dates
-        if start_date is None:
-            start_date = datetime.date.today()
-        if end_date is None:
-            end_date = start_date + datetime.timedelta(days=30)
-        
-        slot = OfficeHourSlot.objects.create(
-            instructor=instructor,
-            course_name=course_name,
-            day_of_week=day_of_week,
-            start_time=start_time,
-            end_time=end_time,
-            duration_minutes=duration_minutes,
-            start_date=start_date,
-            end_date=end_date,
-            room=room,
-            status=status,
-            **kwargs
-        )
-        
-        # Create associated BookingPolicy
-        policy = BookingPolicy.objects.create(
-            office_hour_slot=slot,
-            set_student_limit=1
-        )
-        
-        return slot, policy
-    
-    def create_booking(self, student=None, office_hour_slot=None, date=None,
-                      start_time=None, **kwargs):
-        """
-        Helper method to create a Booking.
-        
-        Args:
-            student: User instance (student). If None, creates one.
-            office_hour_slot: OfficeHourSlot instance. If None, creates one.
-            date: Booking date (defaults to today)
-            start_time: Start time as datetime or string. If None, uses slot start_time.
-            **kwargs: Additional fields for Booking
-        
-        Returns:
-            Booking: The created booking instance
-        """
-        if student is None:
-            student = self.create_student()
-        
-        if office_hour_slot is None:
-            office_hour_slot, _ = self.create_office_hour_slot()
-        
-        if date is None:
-            date = datetime.date.today()
-        
-        if start_time is None:
-            # Combine date with slot's start_time
-            start_time = datetime.datetime.combine(
-                date,
-                office_hour_slot.start_time
-            )
-        elif isinstance(start_time, str):
-            # Parse string datetime
-            start_time = datetime.datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S')
-        elif isinstance(start_time, datetime.time):
-            # Combine date with time
-            start_time = datetime.datetime.combine(date, start_time)
-        
-        # Make datetime timezone-aware if it's naive
-        from django.utils import timezone as tz
-        if tz.is_naive(start_time):
-            start_time = tz.make_aware(start_time)
-        
-        booking = Booking.objects.create(
-            student=student,
-            office_hour=office_hour_slot,
-            date=date,
-            start_time=start_time,
-            **kwargs
-        )
-        
-        return booking
-    
     def authenticate_user(self, user):
         """
         Helper method to authenticate a user and set the Authorization header.
@@ -234,3 +116,15 @@ class BaseTestCase(APITestCase):
         """
         super().tearDown()
 
+
+class BaseTestCase(BaseTestMixin, APITestCase):
+    """
+    Base test case for student tests; each test runs inside a rolled-back transaction.
+    """
+
+
+class BaseTransactionTestCase(BaseTestMixin, APITransactionTestCase):
+    """
+    Base test case for student tests that need real commits, e.g. concurrent requests
+    from several threads. Tables are flushed after each test.
+    """
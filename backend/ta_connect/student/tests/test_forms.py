@@ -12,6 +12,7 @@ from student.models import Booking
 from student.serializers.create_book_serializer import CreateBookingSerializer
 from student.serializers.update_book_serializer import UpdateBookingSerializer
 from student.serializers.cancel_book_serializer import CancelBookingSerializer
+from student.utils.book_is_time_available import BookingConflictError
 from student.tests.base import BaseTestCase
 
 
@@ -216,6 +217,33 @@ class CreateBookingSerializerTestCase(BaseTestCase):
         self.assertFalse(serializer.is_valid())
         self.assertIn('non_field_errors', serializer.errors)
 
+    def test_serializer_create_raises_conflict_when_time_taken_after_validation(self):
+        """Test create() rechecks under the slot lock and raises BookingConflictError."""
+        student = self.create_student()
+        other_student = self.create_student(username='other_student', email='other_student@example.com')
+        slot, policy = self.create_office_hour_slot()
+        booking_date = datetime.date.today() + datetime.timedelta(days=1)
+
+        serializer = CreateBookingSerializer(
+            data={
+                'slot_id': slot.id,
+                'date': booking_date.isoformat(),
+                'start_time': slot.start_time.strftime('%H:%M:%S')
+            },
+            context={
+                'request': type('Request', (), {'user': student})(),
+                'slot': slot
+            }
+        )
+        self.assertTrue(serializer.is_valid(), f"Serializer errors: {serializer.errors}")
+
+        # A concurrent request books the same time between validate() and create()
+        self.create_booking(student=other_student, office_hour_slot=slot, date=booking_date)
+
+        with self.assertRaises(BookingConflictError):
+            serializer.save()
+        self.assertEqual(Booking.objects.filter(office_hour=slot, is_cancelled=False).count(), 1)
+
 
 class ConfirmBookingSerializerTestCase(BaseTestCase):
     """
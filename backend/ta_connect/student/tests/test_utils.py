@@ -3,14 +3,58 @@ Tests for utility functions in the student app.
 Tests cover:
 - complete_booking: Marks bookings as completed based on timezone-aware comparison
 - cancel_student_bookings: Cancels bookings with status filtering
+- sweep_ended_bookings: Bulk-transitions ended bookings to their final status
+- run_periodically: The loop behind the background jobs and their --loop commands
+- BookingIntervals: Sorted-interval overlap checks for booking availability
+- Outbox: Queued booking side-effects, retries with backoff and dead-lettering
+- send_push_fanout: Concurrent web push delivery with per-user results
+- EmailConnectionPool: Reused, health-checked email connections for send_email/send_email_bulk
+- Batch renderer: Mass emails rendered once per template with shared context fragments
+- Notification digests: Per-recipient coalescing of booking notifications for digest-mode users
+- Email rate limiter: Shared token buckets, queueing over the limit and budget metrics
+- resolve_booking_recipients: Recipient records for mass notifications in one query
+- Booking reminders: Indexed scan of upcoming confirmed bookings, queued once per booking
 """
-from django.test import TestCase
+from io import StringIO
+from django.core.management import call_command
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.utils import timezone
 import datetime
 import uuid
-from student.models import Booking
+import smtplib
+import threading
+import time
+from unittest.mock import Mock, patch
+from types import SimpleNamespace
+from pywebpush import WebPushException
+from webpush.models import PushInformation, SubscriptionInfo
+from student.models import Booking, OutboxMessage, NotificationDigestItem
 from student.utils.complete_book import complete_booking
 from student.utils.cancel_student_bookings import cancel_student_bookings
+from student.utils.booking_sweeper import sweep_ended_bookings
+from utils.periodic import run_periodically
+from student.utils.booking_intervals import BookingIntervals
+from student.utils.booking_recipients import resolve_booking_recipients
+from student.utils.booking_reminders import schedule_booking_reminders
+from student.utils.book_is_time_available import is_time_available
+from student.utils import outbox
+from student.utils.booking_side_effects import enqueue_booking_confirmed, enqueue_booking_pending
+from student.utils.notification_digest import NOTIFICATION_DIGEST, send_digest
+from utils.push_notifications.push_fanout import send_push_fanout
+from utils.email_sending.connection_pool import EmailConnectionPool, email_connection_pool
+from utils.email_sending.send_email import send_email
+from utils.email_sending.send_email_bulk import send_email_bulk, send_mass_html_mail
+from utils.email_sending.batch_renderer import MassEmailBatch, render_many
+from utils.email_sending import rate_limiter
+from utils.email_sending.auth.send_password_reset_email import send_password_reset_email
+from accounts.models import EmailRateBucket
+from utils.email_sending.booking.send_cancel_booking_email_mass import send_cancel_booking_email_mass
+from utils.email_sending.booking.send_update_booking_email_mass import send_update_booking_email_mass
+from utils.push_notifications.booking.send_booking_cancelled_mass import send_booking_cancelled_push_mass
+from django.template.loader import get_template, render_to_string
 from student.tests.base import BaseTestCase
 
 
@@ -243,7 +287,7 @@ class CancelStudentBookingsTestCase(BaseTestCase):
         booking1.status = 'pending'
         booking1.save()
         
-        booking2 = self.create_booking(office_hour_slot=slot, student=student2)
+        booking2 = self.create_booking(office_hour_slot=slot, student=student2, date=datetime.date.today() + datetime.timedelta(days=1))
         booking2.status = 'confirmed'
         booking2.save()
         
@@ -315,16 +359,16 @@ class CancelStudentBookingsTestCase(BaseTestCase):
         pending_booking.status = 'pending'
         pending_booking.save()
         
-        confirmed_booking = self.create_booking(office_hour_slot=slot, student=student2)
+        confirmed_booking = self.create_booking(office_hour_slot=slot, student=student2, date=datetime.date.today() + datetime.timedelta(days=1))
         confirmed_booking.status = 'confirmed'
         confirmed_booking.save()
         
-        completed_booking = self.create_booking(office_hour_slot=slot, student=student3)
+        completed_booking = self.create_booking(office_hour_slot=slot, student=student3, date=datetime.date.today() + datetime.timedelta(days=2))
         completed_booking.status = 'completed'
         completed_booking.is_completed = True
         completed_booking.save()
         
-        cancelled_booking = self.create_booking(office_hour_slot=slot, student=student4)
+        cancelled_booking = self.create_booking(office_hour_slot=slot, student=student4, date=datetime.date.today() + datetime.timedelta(days=3))
         cancelled_booking.status = 'cancelled'
         cancelled_booking.is_cancelled = True
         cancelled_booking.save()
@@ -355,7 +399,7 @@ class CancelStudentBookingsTestCase(BaseTestCase):
         student2 = self.create_student(username=f'student_{uid2}', email=f'student_{uid2}@example.com')
         
         booking1 = self.create_booking(office_hour_slot=slot, student=student1)
-        booking2 = self.create_booking(office_hour_slot=slot, student=student2)
+        booking2 = self.create_booking(office_hour_slot=slot, student=student2, date=datetime.date.today() + datetime.timedelta(days=1))
         
         # Pass only booking1 as queryset
         bookings = Booking.objects.filter(id=booking1.id)
@@ -388,3 +432,1037 @@ class CancelStudentBookingsTestCase(BaseTestCase):
         
         booking.refresh_from_db()
         self.assertTrue(booking.is_cancelled)
+
+
+class SweepEndedBookingsTestCase(BaseTestCase):
+    """
+    Test cases for the sweep_ended_bookings utility and the sweep_bookings command.
+    """
+
+    def _create_booking_with_status(self, slot, status, start_time, date):
+        uid = str(uuid.uuid4())[:8]
+        student = self.create_student(username=f'student_{uid}', email=f'student_{uid}@example.com')
+        booking = Booking.objects.create(
+            student=student,
+            office_hour=slot,
+            date=date,
+            start_time=start_time,
+            status=status
+        )
+        return booking
+
+    def test_sweep_transitions_ended_bookings(self):
+        """Test ended confirmed bookings complete and ended pending bookings cancel."""
+        slot, policy = self.create_office_hour_slot()
+        past_time = timezone.now() - datetime.timedelta(hours=2)
+        past_date = timezone.localdate(past_time)
+
+        confirmed = self._create_booking_with_status(slot, 'confirmed', past_time, past_date)
+        pending = self._create_booking_with_status(slot, 'pending', past_time - datetime.timedelta(minutes=10), past_date)
+
+        result = sweep_ended_bookings()
+
+        self.assertEqual(result, {'completed': 1, 'cancelled': 1})
+        confirmed.refresh_from_db()
+        pending.refresh_from_db()
+        self.assertEqual(confirmed.status, 'completed')
+        self.assertTrue(confirmed.is_completed)
+        self.assertEqual(pending.status, 'cancelled')
+        self.assertTrue(pending.is_cancelled)
+
+    def test_sweep_ignores_future_and_final_bookings(self):
+        """Test bookings that have not ended or are already final are left alone."""
+        slot, policy = self.create_office_hour_slot()
+        future_time = timezone.now() + datetime.timedelta(days=1)
+        past_time = timezone.now() - datetime.timedelta(hours=2)
+
+        future = self._create_booking_with_status(slot, 'confirmed', future_time, timezone.localdate(future_time))
+        cancelled = self._create_booking_with_status(slot, 'cancelled', past_time, timezone.localdate(past_time))
+
+        result = sweep_ended_bookings()
+
+        self.assertEqual(result, {'completed': 0, 'cancelled': 0})
+        future.refresh_from_db()
+        cancelled.refresh_from_db()
+        self.assertEqual(future.status, 'confirmed')
+        self.assertEqual(cancelled.status, 'cancelled')
+
+    def test_sweep_uses_constant_queries(self):
+        """Test the sweep issues one UPDATE per transition regardless of booking count."""
+        slot, policy = self.create_office_hour_slot()
+        past_time = timezone.now() - datetime.timedelta(hours=2)
+        for i in range(5):
+            start_time = past_time - datetime.timedelta(minutes=10 * i)
+            self._create_booking_with_status(slot, 'confirmed', start_time, timezone.localdate(start_time))
+
+        with self.assertNumQueries(2):
+            result = sweep_ended_bookings()
+
+        self.assertEqual(result['completed'], 5)
+
+    def test_sweep_bookings_command(self):
+        """Test the sweep_bookings management command runs a single sweep."""
+        slot, policy = self.create_office_hour_slot()
+        past_time = timezone.now() - datetime.timedelta(hours=2)
+        booking = self._create_booking_with_status(slot, 'pending', past_time, timezone.localdate(past_time))
+
+        out = StringIO()
+        call_command('sweep_bookings', stdout=out)
+
+        self.assertIn('cancelled 1 pending bookings', out.getvalue())
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'cancelled')
+
+
+class PeriodicJobTestCase(BaseTestCase):
+    """
+    Test cases for the loop shared by the background jobs.
+    """
+
+    @patch('utils.periodic.close_old_connections')
+    def test_failed_run_is_logged_and_busy_run_does_not_wait(self, close_old_connections):
+        """Test a failing run does not stop the loop and only idle runs wait for the interval."""
+        stop_event = Mock()
+        stop_event.is_set.side_effect = [False, False, False, True]
+        runs = [ValueError('boom'), 2, 0]
+
+        def job():
+            result = runs.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        with self.assertLogs('utils.periodic', level='ERROR') as logs:
+            run_periodically(job, 30, stop_event, 'Test job', is_busy=bool)
+
+        self.assertIn('Test job run failed: boom', logs.output[0])
+        self.assertEqual(runs, [])
+        # The failed and the idle run wait; the busy run goes straight on
+        self.assertEqual(stop_event.wait.call_count, 2)
+        stop_event.wait.assert_called_with(30)
+
+    def test_loop_option_runs_the_command_job_periodically(self):
+        """Test --loop hands the command's job and interval to run_periodically."""
+        out = StringIO()
+        with patch('utils.periodic.run_periodically') as run:
+            call_command('sweep_bookings', '--loop', '--interval', '30', stdout=out)
+
+        job, interval, stop_event, label, is_busy = run.call_args.args
+        self.assertIs(job, sweep_ended_bookings)
+        self.assertEqual((interval, label, is_busy), (30, 'Booking sweeper', None))
+        self.assertIn('Sweeping ended bookings every 30s', out.getvalue())
+
+
+class BookingIntervalsTestCase(BaseTestCase):
+    """
+    Test cases for the BookingIntervals overlap engine and is_time_available.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.base = timezone.make_aware(datetime.datetime(2030, 1, 7, 9, 0))
+
+    def _at(self, minutes):
+        return self.base + datetime.timedelta(minutes=minutes)
+
+    def test_overlaps_half_open_intervals(self):
+        """Test [start, end) overlap checks, including touching intervals."""
+        intervals = BookingIntervals([(self._at(10), self._at(20)), (self._at(40), self._at(50))])
+
+        self.assertTrue(intervals.overlaps(self._at(15), self._at(25)))
+        self.assertTrue(intervals.overlaps(self._at(0), self._at(60)))
+        self.assertFalse(intervals.overlaps(self._at(20), self._at(30)))
+        self.assertFalse(intervals.overlaps(self._at(0), self._at(10)))
+        self.assertFalse(intervals.overlaps(self._at(50), self._at(60)))
+
+    def test_overlaps_uses_longest_earlier_interval(self):
+        """Test a long interval is found even when a shorter one starts after it."""
+        intervals = BookingIntervals([(self._at(0), self._at(60)), (self._at(10), self._at(20))])
+
+        self.assertTrue(intervals.overlaps(self._at(30), self._at(40)))
+
+    def test_free_matches_single_checks(self):
+        """Test the batch merge returns the same answer as individual checks."""
+        intervals = BookingIntervals([(self._at(5), self._at(15)), (self._at(30), self._at(40))])
+        grid = [(self._at(m), self._at(m + 10)) for m in range(0, 60, 10)]
+
+        free = intervals.free(grid)
+
+        self.assertEqual(free, [c for c in grid if not intervals.overlaps(*c)])
+        self.assertEqual([start for start, end in free], [self._at(20), self._at(40), self._at(50)])
+
+    def test_is_time_available_fetches_in_one_query(self):
+        """Test is_time_available loads the bookings once and honours exclude_booking_id."""
+        slot, policy = self.create_office_hour_slot()
+        date = datetime.date.today() + datetime.timedelta(days=1)
+        start = timezone.make_aware(datetime.datetime.combine(date, slot.start_time))
+        booking = self.create_booking(office_hour_slot=slot, date=date, start_time=start)
+
+        with self.assertNumQueries(1):
+            self.assertFalse(is_time_available(slot, date, start, slot.duration_minutes))
+
+        self.assertTrue(is_time_available(slot, date, start, slot.duration_minutes, exclude_booking_id=booking.id))
+        self.assertTrue(slot.is_time_available(date, start + datetime.timedelta(minutes=slot.duration_minutes)))
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=3, OUTBOX_BACKOFF_BASE_SECONDS=30, OUTBOX_BACKOFF_MAX_SECONDS=3600)
+class OutboxTestCase(BaseTestCase):
+    """
+    Test cases for the booking side-effect outbox and the process_outbox command.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        self.failures = 0
+        outbox.register_handler('test.ok', self.calls.append)
+        outbox.register_handler('test.fail', self._fail)
+        self.addCleanup(outbox._handlers.pop, 'test.ok', None)
+        self.addCleanup(outbox._handlers.pop, 'test.fail', None)
+
+    def _fail(self, payload):
+        self.failures += 1
+        raise RuntimeError('provider unavailable')
+
+    def test_enqueue_booking_confirmed_writes_one_message_per_channel(self):
+        """Test a confirmation queues calendar, email and push messages with the booking time."""
+        booking = self.create_booking(status='confirmed')
+
+        enqueue_booking_confirmed(booking)
+
+        messages = OutboxMessage.objects.filter(payload__booking_id=booking.id)
+        self.assertEqual(
+            set(messages.values_list('topic', flat=True)),
+            {'booking.confirmed.calendar', 'booking.confirmed.email', 'booking.confirmed.push'}
+        )
+        for message in messages:
+            self.assertEqual(message.status, 'pending')
+            self.assertEqual(message.payload['booking_time'], booking.start_time.isoformat())
+
+    def test_process_outbox_delivers_due_messages(self):
+        """Test due messages are handed to their handler and marked done."""
+        message = outbox.enqueue('test.ok', {'booking_id': 1})
+
+        result = outbox.process_outbox()
+
+        self.assertEqual(result, {'done': 1, 'retried': 0, 'dead': 0})
+        self.assertEqual(self.calls, [{'booking_id': 1}])
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'done')
+        self.assertEqual(message.attempts, 1)
+        self.assertIsNotNone(message.processed_at)
+
+    def test_process_outbox_skips_messages_not_yet_due(self):
+        """Test messages waiting for their backoff are not claimed."""
+        OutboxMessage.objects.create(topic='test.ok', available_at=timezone.now() + datetime.timedelta(minutes=5))
+
+        result = outbox.process_outbox()
+
+        self.assertEqual(result, {'done': 0, 'retried': 0, 'dead': 0})
+        self.assertEqual(self.calls, [])
+
+    def test_failed_message_is_retried_with_backoff(self):
+        """Test a failing handler reschedules the message with exponential backoff."""
+        message = outbox.enqueue('test.fail', {})
+        before = timezone.now()
+
+        result = outbox.process_outbox()
+
+        self.assertEqual(result, {'done': 0, 'retried': 1, 'dead': 0})
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'pending')
+        self.assertIn('provider unavailable', message.last_error)
+        self.assertGreaterEqual(message.available_at, before + datetime.timedelta(seconds=30))
+        self.assertLess(message.available_at, before + datetime.timedelta(seconds=60))
+
+    def test_failed_message_is_dead_after_max_attempts(self):
+        """Test a message that keeps failing is dead-lettered after OUTBOX_MAX_ATTEMPTS."""
+        message = outbox.enqueue('test.fail', {})
+
+        for _ in range(3):
+            OutboxMessage.objects.filter(id=message.id, status='pending').update(available_at=timezone.now())
+            outbox.process_outbox()
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'dead')
+        self.assertEqual(message.attempts, 3)
+        self.assertEqual(self.failures, 3)
+
+    def test_unknown_topic_is_dead_immediately(self):
+        """Test a message without a registered handler is dead-lettered, not retried."""
+        message = outbox.enqueue('test.unknown', {})
+
+        self.assertEqual(outbox.process_outbox()['dead'], 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'dead')
+
+    def test_expired_lease_is_reclaimed(self):
+        """Test a message left processing by a dead worker is claimed again after its lease."""
+        message = OutboxMessage.objects.create(
+            topic='test.ok', status='processing', attempts=1,
+            available_at=timezone.now() - datetime.timedelta(seconds=1)
+        )
+
+        outbox.process_outbox()
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'done')
+        self.assertEqual(message.attempts, 2)
+
+    def test_email_failure_raises_for_retry(self):
+        """Test a booking email reported as failed by the helper is retried."""
+        booking = self.create_booking(status='confirmed')
+        enqueue_booking_confirmed(booking)
+
+        with patch('student.utils.booking_side_effects.send_booking_confirmation_email',
+                   return_value={'success': False, 'errors': ['smtp down']}), \
+             patch('student.utils.booking_side_effects.send_booking_confirmed_push', return_value={'success': True}), \
+             patch('student.utils.booking_side_effects.add_booking_to_calendars', return_value=(None, None)) as add_to_calendars:
+            result = outbox.process_outbox()
+
+        # One email message per recipient, both failed; the calendar and push messages are done
+        self.assertEqual(result, {'done': 2, 'retried': 2, 'dead': 0})
+        add_to_calendars.assert_called_once()
+        for failed in OutboxMessage.objects.filter(topic='booking.confirmed.email'):
+            self.assertEqual(failed.status, 'pending')
+            self.assertIn('smtp down', failed.last_error)
+
+    def test_email_retry_does_not_repeat_the_delivered_recipient(self):
+        """Test only the recipient whose email failed is emailed again on retry."""
+        booking = self.create_booking(status='confirmed')
+        enqueue_booking_confirmed(booking)
+        student_email = booking.student.email
+
+        # The student's email goes out, the instructor's fails
+        with patch('utils.email_sending.booking.send_booking_confirmation.send_email',
+                   side_effect=lambda **kwargs: kwargs['recipient_email'] == student_email) as send_email_mock, \
+             patch('student.utils.booking_side_effects.send_booking_confirmed_push', return_value={'success': True}), \
+             patch('student.utils.booking_side_effects.add_booking_to_calendars', return_value=(None, None)):
+            outbox.process_outbox()
+            OutboxMessage.objects.filter(status='pending').update(available_at=timezone.now())
+            outbox.process_outbox()
+
+        recipients = [call.kwargs['recipient_email'] for call in send_email_mock.call_args_list]
+        self.assertEqual(recipients.count(student_email), 1)
+        self.assertEqual(recipients.count(booking.office_hour.instructor.email), 2)
+        failed = OutboxMessage.objects.get(topic='booking.confirmed.email', status='pending')
+        self.assertEqual(failed.payload['recipient'], 'instructor')
+
+    def test_calendar_failure_for_connected_user_is_retried(self):
+        """Test a calendar event that failed for a connected user is retried, without duplicating the other side."""
+        booking = self.create_booking(status='confirmed')
+        enqueue_booking_confirmed(booking)
+        outcomes = {booking.student_id: [None, 'student-event'], booking.office_hour.instructor_id: ['instructor-event']}
+
+        with patch('student.utils.booking_side_effects.send_booking_confirmation_email', return_value={'success': True}), \
+             patch('student.utils.booking_side_effects.send_booking_confirmed_push', return_value={'success': True}), \
+             patch('utils.google_calendar.create_booking_event',
+                   side_effect=lambda user, booking, is_instructor: outcomes[user.id].pop(0)) as create_event, \
+             patch('student.utils.booking_side_effects.has_connected_calendar', return_value=True):
+            self.assertEqual(outbox.process_outbox()['retried'], 1)
+            OutboxMessage.objects.filter(status='pending').update(available_at=timezone.now())
+            self.assertEqual(outbox.process_outbox()['done'], 1)
+
+        self.assertEqual(create_event.call_count, 3)
+        booking.refresh_from_db()
+        self.assertEqual(booking.student_calendar_event_id, 'student-event')
+        self.assertEqual(booking.instructor_calendar_event_id, 'instructor-event')
+
+    def test_calendar_is_not_retried_without_connected_calendar(self):
+        """Test users without a connected calendar do not make the calendar message fail."""
+        booking = self.create_booking(status='confirmed')
+        enqueue_booking_confirmed(booking)
+
+        with patch('student.utils.booking_side_effects.send_booking_confirmation_email', return_value={'success': True}), \
+             patch('student.utils.booking_side_effects.send_booking_confirmed_push', return_value={'success': True}):
+            result = outbox.process_outbox()
+
+        self.assertEqual(result, {'done': 4, 'retried': 0, 'dead': 0})
+
+    def test_process_outbox_command(self):
+        """Test the process_outbox management command delivers a single batch."""
+        outbox.enqueue('test.ok', {})
+
+        out = StringIO()
+        call_command('process_outbox', stdout=out)
+
+        self.assertIn('Delivered 1 messages', out.getvalue())
+
+
+class PushFanoutTestCase(BaseTestCase):
+    """
+    Test cases for the concurrent web push fan-out.
+    """
+
+    def _subscribe(self, user, endpoint):
+        subscription = SubscriptionInfo.objects.create(
+            browser='chrome', endpoint=endpoint, auth='auth', p256dh='p256dh'
+        )
+        PushInformation.objects.create(user=user, subscription=subscription)
+        return subscription
+
+    def test_fanout_sends_to_every_endpoint_with_timeout(self):
+        """Test each subscription of each user gets one request carrying the timeout."""
+        student = self.create_student()
+        instructor = self.create_instructor()
+        self._subscribe(student, 'https://push.example.com/a')
+        self._subscribe(student, 'https://push.example.com/b')
+        self._subscribe(instructor, 'https://push.example.com/c')
+
+        with patch('utils.push_notifications.push_fanout.webpush') as webpush:
+            result = send_push_fanout([(student, {'head': 'S'}), (instructor, {'head': 'I'})], timeout=3)
+
+        self.assertEqual(webpush.call_count, 3)
+        self.assertTrue(all(call.kwargs['timeout'] == 3 for call in webpush.call_args_list))
+        self.assertEqual(result['sent_count'], 2)
+        self.assertEqual(result['results'], {student.id: {'sent': 1, 'failed': 0}, instructor.id: {'sent': 1, 'failed': 0}})
+
+    def test_fanout_respects_concurrency_limit(self):
+        """Test no more than max_workers requests are in flight at once."""
+        users = [self.create_student(username=f'student{i}', email=f'student{i}@example.com') for i in range(6)]
+        for i, user in enumerate(users):
+            self._subscribe(user, f'https://push.example.com/{i}')
+
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def slow_push(**kwargs):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.05)
+            with lock:
+                state['active'] -= 1
+
+        with patch('utils.push_notifications.push_fanout.webpush', side_effect=slow_push):
+            result = send_push_fanout([(user, {'head': 'Hi'}) for user in users], max_workers=2)
+
+        self.assertEqual(result['sent_count'], 6)
+        self.assertEqual(state['peak'], 2)
+
+    def test_fanout_aggregates_failures_and_drops_expired_subscriptions(self):
+        """Test failed endpoints fail their notification and 404 subscriptions are deleted."""
+        failing = self.create_student(username='failing', email='failing@example.com')
+        expired = self.create_student(username='expired', email='expired@example.com')
+        self._subscribe(failing, 'https://push.example.com/fail')
+        gone = self._subscribe(expired, 'https://push.example.com/gone')
+
+        def push(subscription_info, **kwargs):
+            status_code = 500 if subscription_info['endpoint'].endswith('fail') else 404
+            raise WebPushException('push failed', response=SimpleNamespace(status_code=status_code))
+
+        with patch('utils.push_notifications.push_fanout.webpush', side_effect=push):
+            result = send_push_fanout([(failing, {'head': 'A'}), (expired, {'head': 'B'})])
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['failed_count'], 1)
+        self.assertEqual(result['results'][failing.id], {'sent': 0, 'failed': 1})
+        self.assertEqual(result['results'][expired.id], {'sent': 1, 'failed': 0})
+        self.assertFalse(SubscriptionInfo.objects.filter(id=gone.id).exists())
+
+    def test_fanout_without_subscriptions_makes_no_requests(self):
+        """Test users without subscriptions are counted as sent without any HTTP call."""
+        student = self.create_student()
+
+        with patch('utils.push_notifications.push_fanout.webpush') as webpush:
+            result = send_push_fanout([(student, {'head': 'Hi'})])
+
+        webpush.assert_not_called()
+        self.assertTrue(result['success'])
+        self.assertEqual(result['sent_count'], 1)
+
+
+class FakeEmailBackend:
+    """Stands in for the SMTP backend: counts opens and can fail like a dropped session."""
+
+    opened = 0
+
+    def __init__(self, fail_sends=0, noop_code=250):
+        self.fail_sends = fail_sends
+        self.connection = SimpleNamespace(noop=lambda: (noop_code, b'OK'))
+        self.closed = False
+        self.sent = []
+
+    def open(self):
+        FakeEmailBackend.opened += 1
+
+    def close(self):
+        self.closed = True
+
+    def send_messages(self, messages):
+        if self.fail_sends:
+            self.fail_sends -= 1
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        self.sent.extend(messages)
+        return len(messages)
+
+
+@override_settings(SMTP_POOL_SIZE=2, SMTP_IDLE_TIMEOUT_SECONDS=120, SMTP_HEALTH_CHECK_SECONDS=15)
+class EmailConnectionPoolTestCase(BaseTestCase):
+    """
+    Test cases for the pooled email connections used by send_email and send_email_bulk.
+    """
+
+    def setUp(self):
+        super().setUp()
+        email_connection_pool.close_all()
+        self.addCleanup(email_connection_pool.close_all)
+        FakeEmailBackend.opened = 0
+
+    def _pool_with(self, *backends):
+        pool = EmailConnectionPool()
+        patcher = patch('utils.email_sending.connection_pool.get_connection', side_effect=list(backends))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return pool
+
+    def test_send_email_and_bulk_share_one_connection(self):
+        """Test consecutive sends reuse the pooled connection instead of opening new ones."""
+        with patch('utils.email_sending.connection_pool.get_connection', wraps=mail.get_connection) as get_connection:
+            self.assertTrue(send_email('Hi', 'account_deleted_email.html', {'user_email': 'a@example.com'}, 'a@example.com'))
+            self.assertTrue(send_email('Hi', 'account_deleted_email.html', {'user_email': 'a@example.com'}, 'b@example.com'))
+            result = send_email_bulk([
+                {'subject': 'Bulk', 'template_name': 'account_deleted_email.html', 'context': {'user_email': 'c@example.com'}, 'recipient_email': 'c@example.com'},
+            ])
+
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(result['sent_count'], 1)
+        self.assertEqual([message.to for message in mail.outbox], [['a@example.com'], ['b@example.com'], ['c@example.com']])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+
+    def test_dropped_connection_is_replaced_and_retried(self):
+        """Test a send on a dropped session is retried once on a fresh connection."""
+        dropped, fresh = FakeEmailBackend(fail_sends=1), FakeEmailBackend()
+        pool = self._pool_with(dropped, fresh)
+
+        self.assertEqual(pool.send_messages(['message']), 1)
+        self.assertTrue(dropped.closed)
+        self.assertEqual(fresh.sent, ['message'])
+        self.assertEqual(pool.acquire().backend, fresh)
+
+    def test_retry_opens_a_new_connection_instead_of_another_idle_one(self):
+        """Test the retry does not reuse another idle connection, which may be dropped too."""
+        older, newer, fresh = FakeEmailBackend(fail_sends=1), FakeEmailBackend(fail_sends=1), FakeEmailBackend()
+        pool = self._pool_with(older, newer, fresh)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+
+        self.assertEqual(pool.send_messages(['message']), 1)
+        self.assertTrue(newer.closed)
+        self.assertEqual(fresh.sent, ['message'])
+        self.assertEqual((older.fail_sends, older.sent), (1, []))
+
+    def test_mass_html_mail_honours_fail_silently(self):
+        """Test a failed pooled send returns 0 with fail_silently and raises without it."""
+        datatuple = [('Hi', 'text', '<p>html</p>', 'taconnect.team@gmail.com', ['a@example.com'])]
+        with patch('utils.email_sending.send_email_bulk.send_or_queue', side_effect=smtplib.SMTPServerDisconnected('gone')):
+            self.assertEqual(send_mass_html_mail(datatuple, fail_silently=True), 0)
+            with self.assertRaises(smtplib.SMTPServerDisconnected):
+                send_mass_html_mail(datatuple)
+
+    def test_idle_connection_past_timeout_is_closed(self):
+        """Test a connection idle past SMTP_IDLE_TIMEOUT_SECONDS is not reused."""
+        stale, fresh = FakeEmailBackend(), FakeEmailBackend()
+        pool = self._pool_with(stale, fresh)
+        pooled = pool.acquire()
+        pool.release(pooled)
+        pooled.last_used -= 300
+
+        self.assertIs(pool.acquire().backend, fresh)
+        self.assertTrue(stale.closed)
+
+    def test_unhealthy_connection_fails_noop_check(self):
+        """Test a connection idle past the health check interval is dropped when NOOP fails."""
+        unhealthy, fresh = FakeEmailBackend(noop_code=421), FakeEmailBackend()
+        pool = self._pool_with(unhealthy, fresh)
+        pooled = pool.acquire()
+        pool.release(pooled)
+        pooled.last_used -= 30
+
+        self.assertIs(pool.acquire().backend, fresh)
+        self.assertTrue(unhealthy.closed)
+        self.assertEqual(FakeEmailBackend.opened, 2)
+
+
+class BatchRendererTestCase(BaseTestCase):
+    """
+    Test cases for batched mass email rendering.
+    """
+
+    TEMPLATE = 'booking_bulk_cancellation_email_Student.html'
+
+    def setUp(self):
+        super().setUp()
+        self.shared = {
+            'instructor_name': 'Jane Doe',
+            'course_name': 'CS 101',
+            'room': 'B-204',
+            'frontend_url': 'http://localhost:3000',
+            'cancellation_reason': 'Slot removed',
+        }
+        self.contexts = [
+            {'student_name': f'Student {i}', 'booking_date': 'January 07, 2030', 'booking_time': '09:00 AM'}
+            for i in range(3)
+        ]
+
+    def test_render_many_matches_render_to_string(self):
+        """Test each recipient's output equals rendering the merged context on its own."""
+        rendered = render_many(self.TEMPLATE, self.contexts, self.shared)
+
+        expected = [render_to_string(self.TEMPLATE, {**self.shared, **context}) for context in self.contexts]
+        self.assertEqual([html for ok, html in rendered], expected)
+        self.assertTrue(all(ok for ok, html in rendered))
+
+    def test_render_many_loads_template_once(self):
+        """Test the template is looked up once per batch, not per recipient."""
+        with patch('utils.email_sending.batch_renderer.get_template', wraps=get_template) as lookup:
+            render_many(self.TEMPLATE, self.contexts, self.shared)
+
+        self.assertEqual(lookup.call_count, 1)
+
+    def test_template_error_fails_its_group_only(self):
+        """Test a group whose template cannot be loaded is reported as failed and the other groups are sent."""
+        mail.outbox = []
+        batch = MassEmailBatch()
+        broken = {}
+        batch.add('Broken', 'missing_template.html', 'broken@example.com', {}, shared_context=broken)
+        for i, context in enumerate(self.contexts):
+            batch.add('Cancelled', self.TEMPLATE, f'student{i}@example.com', context, shared_context=self.shared)
+
+        result = batch.send()
+
+        self.assertEqual(result['sent_count'], 3)
+        self.assertEqual([failure['recipient'] for failure in result['failed']], ['broken@example.com'])
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [f'student{i}@example.com' for i in range(3)])
+
+    def test_mass_cancellation_emails_share_slot_context(self):
+        """Test mass cancellation emails carry the shared slot fields and each student's own fields."""
+        mail.outbox = []
+        slot, policy = self.create_office_hour_slot(course_name='Algorithms', room='Hall 3')
+        date = datetime.date.today() + datetime.timedelta(days=1)
+        bookings = []
+        for i in range(2):
+            student = self.create_student(username=f'mass{i}', email=f'mass{i}@example.com', first_name=f'Mass{i}')
+            start = timezone.make_aware(datetime.datetime.combine(date, slot.start_time)) + datetime.timedelta(minutes=10 * i)
+            bookings.append(self.create_booking(student=student, office_hour_slot=slot, date=date, start_time=start))
+
+        result = send_cancel_booking_email_mass(bookings, 'slot_deleted')
+
+        self.assertEqual(result['sent_count'], 2)
+        for i, message in enumerate(mail.outbox):
+            html = message.alternatives[0][0]
+            self.assertEqual(message.to, [f'mass{i}@example.com'])
+            self.assertIn('Algorithms', html)
+            self.assertIn('Hall 3', html)
+            self.assertIn(f'Mass{i}', html)
+
+
+class NotificationDigestTestCase(BaseTestCase):
+    """
+    Test cases for coalescing booking notifications into per-recipient digests.
+    """
+
+    def setUp(self):
+        super().setUp()
+        mail.outbox = []
+        self.instructor = self.create_instructor(first_name='Ada', last_name='Lovelace')
+        self.instructor.instructor_profile.notification_digest = True
+        self.instructor.instructor_profile.save()
+        self.slot, _ = self.create_office_hour_slot(instructor=self.instructor, course_name='Compilers')
+        self.date = datetime.date.today() + datetime.timedelta(days=1)
+
+    def _book(self, index):
+        student = self.create_student(username=f'digest{index}', email=f'digest{index}@example.com', first_name=f'Digest{index}')
+        start = timezone.make_aware(datetime.datetime.combine(self.date, self.slot.start_time)) + datetime.timedelta(minutes=10 * index)
+        return self.create_booking(student=student, office_hour_slot=self.slot, date=self.date, start_time=start)
+
+    def _flush_due_now(self):
+        OutboxMessage.objects.filter(topic=NOTIFICATION_DIGEST, status='pending').update(available_at=timezone.now())
+        outbox.process_outbox()
+
+    def _emails_to(self, address):
+        return [message for message in mail.outbox if message.to == [address]]
+
+    @override_settings(NOTIFICATION_DIGEST_WINDOW_SECONDS=600)
+    def test_pending_bookings_are_coalesced_for_digest_recipient(self):
+        """Test an instructor in digest mode gets one email for several pending bookings."""
+        for i in range(3):
+            enqueue_booking_pending(self._book(i))
+        outbox.process_outbox()
+
+        # Students are not in digest mode and are emailed as before
+        for i in range(3):
+            self.assertEqual(len(self._emails_to(f'digest{i}@example.com')), 1)
+        self.assertEqual(self._emails_to('instructor@example.com'), [])
+        self.assertEqual(NotificationDigestItem.objects.filter(recipient=self.instructor, channel='email').count(), 3)
+
+        # One flush per channel, scheduled at the end of the window
+        flushes = OutboxMessage.objects.filter(topic=NOTIFICATION_DIGEST)
+        self.assertEqual(sorted(flushes.values_list('payload__channel', flat=True)), ['email', 'push'])
+        for flush in flushes:
+            self.assertGreater(flush.available_at, timezone.now() + datetime.timedelta(seconds=500))
+
+        self._flush_due_now()
+
+        digests = self._emails_to('instructor@example.com')
+        self.assertEqual(len(digests), 1)
+        html = digests[0].alternatives[0][0]
+        for i in range(3):
+            self.assertIn(f'Digest{i}', html)
+        self.assertFalse(NotificationDigestItem.objects.filter(sent_at__isnull=True).exists())
+
+    def test_repeated_event_updates_the_held_notification(self):
+        """Test an outbox retry of the same booking event does not list the booking twice."""
+        booking = self._book(0)
+        enqueue_booking_pending(booking)
+        enqueue_booking_pending(booking)
+        outbox.process_outbox()
+
+        self.assertEqual(NotificationDigestItem.objects.filter(recipient=self.instructor, channel='email').count(), 1)
+        self.assertEqual(OutboxMessage.objects.filter(topic=NOTIFICATION_DIGEST, payload__channel='email').count(), 1)
+
+    def test_failed_digest_is_kept_for_retry(self):
+        """Test held notifications stay unsent when the digest email fails."""
+        enqueue_booking_pending(self._book(0))
+        outbox.process_outbox()
+
+        with patch('student.utils.notification_digest.send_booking_digest_email',
+                   return_value={'success': False, 'errors': ['smtp down']}):
+            result = send_digest(self.instructor.id, 'pending', 'email')
+
+        self.assertFalse(result['success'])
+        self.assertTrue(NotificationDigestItem.objects.filter(channel='email', sent_at__isnull=True).exists())
+
+    def test_notification_arriving_during_send_gets_its_own_digest(self):
+        """Test a notification held while a digest is being sent schedules the next digest."""
+        enqueue_booking_pending(self._book(0))
+        outbox.process_outbox()
+        late_booking = self._book(1)
+
+        def send_and_book(recipient, event_type, items):
+            enqueue_booking_pending(late_booking)
+            outbox.process_outbox()
+            return {'success': True, 'errors': []}
+
+        OutboxMessage.objects.filter(topic=NOTIFICATION_DIGEST).delete()
+        with patch('student.utils.notification_digest.send_booking_digest_email', side_effect=send_and_book):
+            send_digest(self.instructor.id, 'pending', 'email')
+
+        self.assertTrue(NotificationDigestItem.objects.filter(booking_id=late_booking.id, sent_at__isnull=True).exists())
+        self.assertTrue(OutboxMessage.objects.filter(topic=NOTIFICATION_DIGEST, payload__channel='email', status='pending').exists())
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=1)
+    def test_notification_after_dead_digest_schedules_a_new_one(self):
+        """Test a digest that went dead does not mute its group; the next digest carries its items."""
+        first = self._book(0)
+        enqueue_booking_pending(first)
+        outbox.process_outbox()
+        with patch('student.utils.notification_digest.send_booking_digest_email',
+                   return_value={'success': False, 'errors': ['smtp down']}):
+            self._flush_due_now()
+        self.assertTrue(OutboxMessage.objects.filter(topic=NOTIFICATION_DIGEST, payload__channel='email', status='dead').exists())
+
+        second = self._book(1)
+        enqueue_booking_pending(second)
+        outbox.process_outbox()
+        self.assertTrue(OutboxMessage.objects.filter(topic=NOTIFICATION_DIGEST, payload__channel='email', status='pending').exists())
+
+        self._flush_due_now()
+        digests = self._emails_to('instructor@example.com')
+        self.assertEqual(len(digests), 1)
+        for booking in (first, second):
+            self.assertIn(booking.student.first_name, digests[0].alternatives[0][0])
+        self.assertFalse(NotificationDigestItem.objects.filter(channel='email', sent_at__isnull=True).exists())
+
+    def test_held_email_honours_notification_preferences(self):
+        """Test emails the recipient turned off are not added to their digest."""
+        booking = self._book(0)
+        profile = booking.student.student_profile
+        profile.notification_digest = True
+        profile.email_notifications_on_booking = False
+        profile.save()
+
+        enqueue_booking_pending(booking)
+        outbox.process_outbox()
+
+        self.assertFalse(NotificationDigestItem.objects.filter(recipient=booking.student, channel='email').exists())
+        self.assertTrue(NotificationDigestItem.objects.filter(recipient=booking.student, channel='push').exists())
+
+
+@override_settings(EMAIL_RATE_PER_MINUTE=2, EMAIL_RATE_PER_DAY=100)
+class EmailRateLimiterTestCase(BaseTestCase):
+    """
+    Test cases for the outgoing email rate limiter.
+    """
+
+    def setUp(self):
+        super().setUp()
+        mail.outbox = []
+
+    def _emails(self, count, start=0):
+        return [{
+            'subject': 'Hi',
+            'template_name': 'account_deleted_email.html',
+            'context': {'user_email': f'user{i}@example.com'},
+            'recipient_email': f'user{i}@example.com',
+        } for i in range(start, start + count)]
+
+    def _refill(self, seconds=60):
+        """Move the buckets' last update back, as if `seconds` had passed."""
+        EmailRateBucket.objects.update(updated_at=timezone.now() - datetime.timedelta(seconds=seconds))
+
+    def test_emails_within_budget_are_sent(self):
+        """Test emails within the limit are sent right away and take tokens from every bucket."""
+        result = send_email_bulk(self._emails(2))
+
+        self.assertEqual((result['sent_count'], result['queued_count']), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        buckets = dict(EmailRateBucket.objects.values_list('name', 'tokens'))
+        self.assertAlmostEqual(buckets['minute'], 0, places=1)
+        self.assertAlmostEqual(buckets['day'], 98, places=1)
+
+    def test_emails_over_budget_are_queued_not_dropped(self):
+        """Test emails over the limit are queued on the outbox and the send still succeeds."""
+        result = send_email_bulk(self._emails(5))
+
+        self.assertTrue(result['success'])
+        self.assertEqual((result['sent_count'], result['queued_count']), (2, 3))
+        self.assertEqual(len(mail.outbox), 2)
+        queued = OutboxMessage.objects.filter(topic=rate_limiter.EMAIL_QUEUED)
+        self.assertEqual(sorted(m.payload['to'][0] for m in queued), ['user2@example.com', 'user3@example.com', 'user4@example.com'])
+        self.assertTrue(all(m.available_at > timezone.now() for m in queued))
+
+    def test_new_email_waits_behind_queued_ones(self):
+        """Test a new email is queued while earlier emails are waiting, even if tokens are left."""
+        send_email_bulk(self._emails(3))
+        self._refill()
+
+        self.assertTrue(send_email('Hi', 'account_deleted_email.html', {'user_email': 'late@example.com'}, 'late@example.com'))
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(OutboxMessage.objects.filter(topic=rate_limiter.EMAIL_QUEUED).count(), 2)
+
+    def test_password_reset_is_sent_while_bulk_mail_is_queued(self):
+        """Test transactional mail skips the queue and goes out at once, leaving the buckets in debt."""
+        send_email_bulk(self._emails(5))
+        user = self.create_student(username='forgetful', email='forgetful@example.com')
+
+        send_password_reset_email(user)
+
+        self.assertEqual(mail.outbox[-1].to, ['forgetful@example.com'])
+        self.assertEqual(OutboxMessage.objects.filter(topic=rate_limiter.EMAIL_QUEUED).count(), 3)
+        self.assertLess(EmailRateBucket.objects.get(name='minute').tokens, 0)
+
+    def test_queued_emails_are_sent_when_budget_refills(self):
+        """Test the outbox worker defers queued emails while the budget is empty and sends them after."""
+        send_email_bulk(self._emails(3))
+        OutboxMessage.objects.update(available_at=timezone.now())
+
+        result = outbox.process_outbox()
+
+        self.assertEqual(result['retried'], 1)
+        message = OutboxMessage.objects.get(topic=rate_limiter.EMAIL_QUEUED)
+        self.assertEqual(message.attempts, 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+        self._refill()
+        OutboxMessage.objects.update(available_at=timezone.now())
+        outbox.process_outbox()
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'done')
+        self.assertEqual(mail.outbox[-1].to, ['user2@example.com'])
+        self.assertIn('user2@example.com', mail.outbox[-1].alternatives[0][0])
+
+    def test_metrics_report_budget_and_queue_depth(self):
+        """Test the metrics and the email_rate_status command report the budget and the queue."""
+        send_email_bulk(self._emails(4))
+
+        metrics = rate_limiter.get_email_rate_metrics()
+
+        self.assertEqual(metrics['queue_depth'], 2)
+        self.assertEqual(metrics['buckets']['minute']['capacity'], 2)
+        self.assertLess(metrics['buckets']['minute']['tokens'], 1)
+        self.assertIsNotNone(metrics['oldest_queued_at'])
+
+        out = StringIO()
+        call_command('email_rate_status', stdout=out)
+        self.assertIn('Queued emails: 2', out.getvalue())
+
+    @override_settings(EMAIL_RATE_PER_MINUTE=0, EMAIL_RATE_PER_DAY=0)
+    def test_disabled_limits_send_everything(self):
+        """Test a limit of 0 disables the rate limiter."""
+        result = send_email_bulk(self._emails(5))
+
+        self.assertEqual((result['sent_count'], result['queued_count']), (5, 0))
+        self.assertFalse(EmailRateBucket.objects.exists())
+
+
+class BookingRecipientResolverTestCase(BaseTestCase):
+    """
+    Test cases for the recipient records used by the mass notification helpers.
+    """
+
+    def setUp(self):
+        super().setUp()
+        mail.outbox = []
+        self.date = datetime.date.today() + datetime.timedelta(days=1)
+        self.slots = [self.create_office_hour_slot(course_name=f'Course {i}', room=f'Room {i}')[0] for i in range(2)]
+        self.count = 0
+
+    def _bookings(self, count):
+        bookings = []
+        for _ in range(count):
+            self.count += 1
+            slot = self.slots[self.count % 2]
+            student = self.create_student(username=f'r{self.count}', email=f'r{self.count}@example.com', first_name=f'R{self.count}')
+            start = timezone.make_aware(datetime.datetime.combine(self.date, slot.start_time)) + datetime.timedelta(minutes=10 * self.count)
+            bookings.append(self.create_booking(student=student, office_hour_slot=slot, date=self.date, start_time=start))
+        return bookings
+
+    def test_resolves_records_in_one_query(self):
+        """Test every booking's student, profile, slot and instructor load in a single query."""
+        bookings = self._bookings(6)
+
+        with self.assertNumQueries(1):
+            recipients = resolve_booking_recipients(Booking.objects.filter(id__in=[b.id for b in bookings]).order_by('id'))
+
+        self.assertEqual([r.booking_id for r in recipients], [b.id for b in bookings])
+        first = recipients[0]
+        self.assertEqual(first.student.email, bookings[0].student.email)
+        self.assertEqual(first.slot.room, bookings[0].office_hour.room)
+        self.assertEqual(first.instructor.id, bookings[0].office_hour.instructor_id)
+        self.assertTrue(first.student_email_on_cancellation)
+        # Bookings of the same slot share one slot and instructor record
+        self.assertIs(recipients[0].slot, recipients[2].slot)
+        self.assertIs(recipients[0].instructor, recipients[2].instructor)
+
+    def test_records_are_immutable(self):
+        """Test recipient records cannot be modified."""
+        recipient = resolve_booking_recipients(self._bookings(1))[0]
+
+        with self.assertRaises(AttributeError):
+            recipient.student.email = 'other@example.com'
+
+    def test_list_of_ids_keeps_its_order_and_profile_preferences(self):
+        """Test IDs resolve in the given order with each student's email preferences."""
+        bookings = self._bookings(3)
+        profile = bookings[1].student.student_profile
+        profile.email_notifications_on_update = False
+        profile.save()
+
+        recipients = resolve_booking_recipients([bookings[2].id, bookings[1].id, bookings[0].id])
+
+        self.assertEqual([r.booking_id for r in recipients], [bookings[2].id, bookings[1].id, bookings[0].id])
+        self.assertEqual([r.student_email_on_update for r in recipients], [True, False, True])
+
+    def _query_count(self, helper, bookings, *args):
+        with CaptureQueriesContext(connection) as queries:
+            helper(bookings, *args)
+        return len(queries)
+
+    @override_settings(EMAIL_RATE_PER_MINUTE=0, EMAIL_RATE_PER_DAY=0)
+    def test_mass_helpers_use_a_constant_number_of_queries(self):
+        """Test the mass email and push helpers do not query per booking."""
+        few, many = self._bookings(2), self._bookings(8)
+
+        for helper, args in (
+            (send_cancel_booking_email_mass, ('manual',)),
+            (send_update_booking_email_mass, ('room_update',)),
+            (send_booking_cancelled_push_mass, ('manual',)),
+        ):
+            with self.subTest(helper=helper.__name__):
+                self.assertEqual(self._query_count(helper, few, *args), self._query_count(helper, many, *args))
+
+
+@override_settings(BOOKING_REMINDER_LEAD_MINUTES=60)
+class BookingReminderTestCase(BaseTestCase):
+    """
+    Test cases for the booking reminder scheduler.
+    """
+
+    def setUp(self):
+        super().setUp()
+        mail.outbox = []
+        self.slot, _ = self.create_office_hour_slot(course_name='Databases', room='Lab 2')
+        self.now = timezone.now()
+        self.count = 0
+
+    def _booking(self, starts_in_minutes, status='confirmed'):
+        self.count += 1
+        student = self.create_student(username=f'remind{self.count}', email=f'remind{self.count}@example.com')
+        start = self.now + datetime.timedelta(minutes=starts_in_minutes)
+        return self.create_booking(student=student, office_hour_slot=self.slot, date=start.date(), start_time=start, status=status)
+
+    def _reminder_messages(self, booking):
+        return OutboxMessage.objects.filter(topic__startswith='booking.reminder.', payload__booking_id=booking.id)
+
+    def test_reminds_confirmed_bookings_in_window_once(self):
+        """Test a confirmed booking starting soon gets one email and one push reminder queued, once."""
+        booking = self._booking(30)
+
+        self.assertEqual(schedule_booking_reminders(now=self.now), 1)
+        self.assertEqual(schedule_booking_reminders(now=self.now + datetime.timedelta(minutes=1)), 0)
+
+        self.assertEqual(
+            sorted(self._reminder_messages(booking).values_list('topic', flat=True)),
+            ['booking.reminder.email', 'booking.reminder.push']
+        )
+        booking.refresh_from_db()
+        self.assertEqual(booking.reminder_sent_at, self.now)
+
+    def test_skips_bookings_outside_window_or_not_confirmed(self):
+        """Test later, already started and pending bookings are not reminded."""
+        later = self._booking(120)
+        started = self._booking(-5)
+        pending = self._booking(20, status='pending')
+
+        self.assertEqual(schedule_booking_reminders(now=self.now), 0)
+
+        for booking in (later, started, pending):
+            self.assertFalse(self._reminder_messages(booking).exists())
+
+    def test_reminder_email_is_delivered_by_the_outbox(self):
+        """Test the queued reminder emails the student with the session details."""
+        booking = self._booking(30)
+        schedule_booking_reminders(now=self.now)
+
+        outbox.process_outbox()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [booking.student.email])
+        html = mail.outbox[0].alternatives[0][0]
+        self.assertIn('Databases', html)
+        self.assertIn('Lab 2', html)
+
+    def test_reminder_skipped_when_booking_cancelled_before_delivery(self):
+        """Test a booking cancelled after its reminder was queued gets no reminder."""
+        booking = self._booking(30)
+        schedule_booking_reminders(now=self.now)
+        booking.cancel()
+
+        outbox.process_outbox()
+
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(set(self._reminder_messages(booking).values_list('status', flat=True)), {'done'})
+
+    def test_scan_uses_status_start_time_index(self):
+        """Test the upcoming-bookings scan is a range scan on idx_booking_status_start."""
+        bookings = Booking.objects.filter(
+            status='confirmed',
+            start_time__gt=self.now,
+            start_time__lte=self.now + datetime.timedelta(hours=1),
+            reminder_sent_at__isnull=True,
+        ).only('id', 'date', 'start_time')
+
+        self.assertIn('idx_booking_status_start', bookings.explain())
+
+    def test_command_queues_reminders(self):
+        """Test the send_booking_reminders command runs one scan."""
+        self._booking(10)
+        out = StringIO()
+
+        call_command('send_booking_reminders', stdout=out)
+
+        self.assertIn('Queued reminders for 1 bookings', out.getvalue())
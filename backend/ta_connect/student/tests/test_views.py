@@ -8,11 +8,22 @@ Tests cover:
 from rest_framework import status
 from django.urls import reverse
 from django.utils import timezone
+from django.db import connection
+from django.test import skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from unittest.mock import patch
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 import datetime
+import threading
 from accounts.models import User
 from instructor.models import OfficeHourSlot
-from student.models import Booking
-from student.tests.base import BaseTestCase
+from student.models import Booking, OutboxMessage
+from student.utils.availability_cache import get_cached_availability, set_cached_availability
+from student.tests.base import BaseTestCase, BaseTransactionTestCase
+
+# Authentication + ETag aggregate + the projected booking query; must not grow with the result size
+MAX_BOOKING_LIST_QUERIES = 3
 
 
 class BookingCreateViewTestCase(BaseTestCase):
@@ -65,6 +76,59 @@ class BookingCreateViewTestCase(BaseTestCase):
         # Should only get booking1 (within range)
         self.assertEqual(len(response.data['bookings']), 1)
     
+    def test_get_bookings_query_count_is_constant(self):
+        """Test the booking list stays within a fixed number of queries regardless of size."""
+        student, token = self.create_and_authenticate_student()
+
+        for _ in range(8):
+            slot, policy = self.create_office_hour_slot()
+            self.create_booking(student=student, office_hour_slot=slot)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.get_bookings_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['bookings']), 8)
+        self.assertIn('full_name', response.data['bookings'][0]['instructor'])
+        self.assertLessEqual(len(queries), MAX_BOOKING_LIST_QUERIES)
+    
+    def test_get_bookings_keyset_pagination(self):
+        """Test paging through bookings newest first with next_cursor."""
+        student, token = self.create_and_authenticate_student()
+        today = datetime.date.today()
+        slot, policy = self.create_office_hour_slot(start_date=today)
+        bookings = [
+            self.create_booking(student=student, office_hour_slot=slot, date=today + datetime.timedelta(days=i))
+            for i in range(3)
+        ]
+        params = {'date_from': today.isoformat(), 'date_to': (today + datetime.timedelta(days=5)).isoformat(), 'page_size': 2}
+
+        first_page = self.client.get(self.get_bookings_url, params)
+        params['cursor'] = first_page.data['next_cursor']
+        second_page = self.client.get(self.get_bookings_url, params)
+
+        self.assertEqual([b['id'] for b in first_page.data['bookings']], [bookings[2].id, bookings[1].id])
+        self.assertEqual([b['id'] for b in second_page.data['bookings']], [bookings[0].id])
+        self.assertIsNone(second_page.data['next_cursor'])
+    
+    def test_get_bookings_conditional_get(self):
+        """Test an unchanged booking list returns 304 and a changed one returns 200."""
+        student, token = self.create_and_authenticate_student()
+        booking = self.create_booking(student=student)
+
+        response = self.client.get(self.get_bookings_url)
+        etag = response['ETag']
+
+        response = self.client.get(self.get_bookings_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        booking.book_description = 'Changed'
+        booking.save()
+
+        response = self.client.get(self.get_bookings_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
     def test_create_booking_happy_path(self):
         """Test successful booking creation (201 Created)."""
         student, token = self.create_and_authenticate_student()
@@ -89,6 +153,10 @@ class BookingCreateViewTestCase(BaseTestCase):
         booking = Booking.objects.get(id=response.data['booking_id'])
         self.assertEqual(booking.student, student)
         self.assertEqual(booking.office_hour, slot)
+
+        # Notifications are queued for the outbox worker instead of sent in the request
+        topics = set(OutboxMessage.objects.filter(payload__booking_id=booking.id).values_list('topic', flat=True))
+        self.assertEqual(topics, {'booking.pending.email', 'booking.pending.push'})
     
     def test_create_booking_validation_missing_slot_id(self):
         """Test booking creation with missing slot_id (400 Bad Request)."""
@@ -308,6 +376,76 @@ class BookingCreateViewTestCase(BaseTestCase):
         self.assertEqual(bookings_count, 3)
 
 
+
+class BookingCreateConcurrencyTestCase(BaseTransactionTestCase):
+    """
+    Test cases for concurrent booking creation on the same time.
+    The threaded test needs a database server with row locks; in-memory SQLite
+    cannot be written from several threads and skips it.
+    """
+
+    def test_clashing_insert_returns_conflict(self):
+        """Test a create that passes the overlap checks but hits the unique constraint returns 409."""
+        slot, policy = self.create_office_hour_slot()
+        booking_date = datetime.date.today() + datetime.timedelta(days=1)
+        rival = self.create_student(username='rival', email='rival@example.com')
+        self.create_booking(student=rival, office_hour_slot=slot, date=booking_date)
+        student, token = self.create_and_authenticate_student()
+        data = {
+            'slot_id': slot.id,
+            'date': booking_date.isoformat(),
+            'start_time': slot.start_time.strftime('%H:%M:%S'),
+        }
+
+        # As if the rival committed between the lock-free checks and the insert
+        with patch('student.serializers.create_book_serializer.is_time_available', return_value=True):
+            response = self.client.post(reverse('booking_create'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Booking.objects.filter(student=student).exists())
+        self.assertEqual(Booking.objects.filter(office_hour=slot, date=booking_date, is_cancelled=False).count(), 1)
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_parallel_creates_book_the_time_once(self):
+        """Test many simultaneous creates of one time produce exactly one booking."""
+        slot, policy = self.create_office_hour_slot()
+        booking_date = datetime.date.today() + datetime.timedelta(days=1)
+        students = [
+            self.create_student(username=f'student{i}', email=f'student{i}@example.com')
+            for i in range(8)
+        ]
+        data = {
+            'slot_id': slot.id,
+            'date': booking_date.isoformat(),
+            'start_time': slot.start_time.strftime('%H:%M:%S'),
+        }
+
+        tokens = [RefreshToken.for_user(student).access_token for student in students]
+        barrier = threading.Barrier(len(students))
+        status_codes = []
+
+        def book(token):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            try:
+                barrier.wait()
+                response = client.post(reverse('booking_create'), data, format='json')
+                status_codes.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(token,)) for token in tokens]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(status_codes.count(status.HTTP_201_CREATED), 1)
+        # Losers either saw the winner during validation or lost the race inside create()
+        self.assertTrue(all(code in (status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST, status.HTTP_409_CONFLICT) for code in status_codes))
+        self.assertEqual(Booking.objects.filter(office_hour=slot, is_cancelled=False).count(), 1)
+
+
 class BookingDetailViewTestCase(BaseTestCase):
     """
     Test cases for the BookingDetailView endpoint.
@@ -352,6 +490,13 @@ class BookingDetailViewTestCase(BaseTestCase):
         # Verify booking was cancelled
         booking.refresh_from_db()
         self.assertTrue(booking.is_cancelled)
+
+        messages = OutboxMessage.objects.filter(payload__booking_id=booking.id)
+        self.assertEqual(
+            set(messages.values_list('topic', flat=True)),
+            {'booking.cancelled.calendar', 'booking.cancelled.email', 'booking.cancelled.push'}
+        )
+        self.assertTrue(all(message.payload['cancelled_by'] == 'student' for message in messages))
     
     def test_get_available_times_happy_path(self):
         """Test successful retrieval of available times (200 OK)."""
@@ -375,7 +520,104 @@ class BookingDetailViewTestCase(BaseTestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('available_times', response.data)
         self.assertIn('slot_id', response.data)
-    
+
+    def test_get_available_times_date_range(self):
+        """Test range availability is grouped by slot date with one bookings query (200 OK)."""
+        student, token = self.create_and_authenticate_student()
+        slot, policy = self.create_office_hour_slot(day_of_week='Mon')
+
+        today = datetime.date.today()
+        days_ahead = (0 - today.weekday()) % 7 or 7
+        next_monday = today + datetime.timedelta(days=days_ahead)
+        following_monday = next_monday + datetime.timedelta(days=7)
+
+        # Book the first time on next Monday
+        self.create_booking(student=student, office_hour_slot=slot, date=next_monday)
+
+        url = reverse('booking_detail', kwargs={'pk': slot.id})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {
+                'date_from': next_monday.isoformat(),
+                'date_to': (following_monday + datetime.timedelta(days=6)).isoformat(),
+            })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        available_times = response.data['available_times']
+        self.assertEqual(list(available_times), [next_monday.isoformat(), following_monday.isoformat()])
+        self.assertNotIn('09:00', available_times[next_monday.isoformat()])
+        self.assertEqual(len(available_times[next_monday.isoformat()]), 5)
+        self.assertEqual(len(available_times[following_monday.isoformat()]), 6)
+
+        booking_queries = [q for q in queries.captured_queries if 'FROM "student_booking"' in q['sql']]
+        self.assertEqual(len(booking_queries), 1)
+
+    def test_get_available_times_served_from_cache(self):
+        """Test repeated availability reads hit the cache until a booking invalidates it."""
+        student, token = self.create_and_authenticate_student()
+        slot, policy = self.create_office_hour_slot(day_of_week='Mon')
+
+        today = datetime.date.today()
+        next_monday = today + datetime.timedelta(days=(0 - today.weekday()) % 7 or 7)
+        url = reverse('booking_detail', kwargs={'pk': slot.id})
+
+        first = self.client.get(url, {'date': next_monday.isoformat()})
+        self.assertEqual(len(first.data['available_times']), 6)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url, {'date': next_monday.isoformat()})
+        self.assertEqual(second.data['available_times'], first.data['available_times'])
+        booking_queries = [q for q in queries.captured_queries if 'FROM "student_booking"' in q['sql']]
+        self.assertEqual(booking_queries, [])
+
+        # Booking through the API drops the cached entry
+        response = self.client.post(reverse('booking_create'), {
+            'slot_id': slot.id,
+            'date': next_monday.isoformat(),
+            'start_time': '09:00:00',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        third = self.client.get(url, {'date': next_monday.isoformat()})
+        self.assertNotIn('09:00', third.data['available_times'])
+        self.assertEqual(len(third.data['available_times']), 5)
+
+        # Cancelling frees the time again
+        self.client.delete(reverse('booking_detail', kwargs={'pk': response.data['booking_id']}))
+        fourth = self.client.get(url, {'date': next_monday.isoformat()})
+        self.assertIn('09:00', fourth.data['available_times'])
+
+    def test_get_available_times_reads_occupancy_bitmask(self):
+        """Test the cache holds one bit per sub-slot and availability is read from those bits."""
+        student, token = self.create_and_authenticate_student()
+        slot, policy = self.create_office_hour_slot(day_of_week='Mon')
+
+        today = datetime.date.today()
+        next_monday = today + datetime.timedelta(days=(0 - today.weekday()) % 7 or 7)
+        self.create_booking(student=student, office_hour_slot=slot, date=next_monday, start_time=datetime.time(9, 10))
+        url = reverse('booking_detail', kwargs={'pk': slot.id})
+
+        response = self.client.get(url, {'date': next_monday.isoformat()})
+        self.assertEqual(response.data['available_times'], ['09:00', '09:20', '09:30', '09:40', '09:50'])
+        self.assertEqual(get_cached_availability(slot, [next_monday]), {next_monday: 0b000010})
+
+        set_cached_availability(slot, {next_monday: 0b111101})
+        response = self.client.get(url, {'date': next_monday.isoformat()})
+        self.assertEqual(response.data['available_times'], ['09:10'])
+
+    def test_get_available_times_date_range_invalid(self):
+        """Test range availability rejects a reversed date range (400 Bad Request)."""
+        student, token = self.create_and_authenticate_student()
+        slot, policy = self.create_office_hour_slot(day_of_week='Mon')
+
+        today = datetime.date.today()
+        url = reverse('booking_detail', kwargs={'pk': slot.id})
+        response = self.client.get(url, {
+            'date_from': (today + datetime.timedelta(days=7)).isoformat(),
+            'date_to': today.isoformat(),
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_update_booking_security_other_student(self):
         """Test that students cannot update other students' bookings (404 Not Found)."""
         student1, token1 = self.create_and_authenticate_student(username='student1')
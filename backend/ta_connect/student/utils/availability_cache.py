@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Computed availability is cached per (slot, date, slot version) as an occupancy bitmask with
+# one bit per sub-slot of the slot's grid (set = booked). It covers the whole day, so an entry
+# stays valid all day and callers drop past times after reading it.
+AVAILABILITY_CACHE_PREFIX = 'availability_mask'
+
+
+def availability_cache_key(slot_id, date_obj, updated_at):
+    """
+    Build the cache key for one slot date. The slot's updated_at is part of the key,
+    so editing a slot never serves grids computed from its old schedule.
+    """
+    version = updated_at.timestamp() if updated_at else 0
+    return f'{AVAILABILITY_CACHE_PREFIX}:{slot_id}:{date_obj.isoformat()}:{version}'
+
+
+def get_cached_availability(slot, dates):
+    """
+    Return {date: occupancy bitmask} for the dates of `slot` found in the cache.
+    """
+    keys = {availability_cache_key(slot.id, date_obj, slot.updated_at): date_obj for date_obj in dates}
+    found = cache.get_many(list(keys))
+    return {keys[key]: mask for key, mask in found.items()}
+
+
+def set_cached_availability(slot, availability):
+    """
+    Store {date: occupancy bitmask} for `slot`.
+    """
+    if not availability:
+        return
+    cache.set_many(
+        {
+            availability_cache_key(slot.id, date_obj, slot.updated_at): mask
+            for date_obj, mask in availability.items()
+        },
+        timeout=settings.AVAILABILITY_CACHE_TIMEOUT_SECONDS,
+    )
+
+
+def invalidate_availability(slot, *dates):
+    """
+    Drop the cached availability of `slot` on the given dates.
+    Called whenever a booking on those dates is created, moved or cancelled.
+    """
+    invalidate_availability_keys(
+        [availability_cache_key(slot.id, date_obj, slot.updated_at) for date_obj in dates]
+    )
+
+
+def slot_availability_keys(slot):
+    """
+    Return every cache key the slot can currently have entries under.
+    Capture them before editing a slot and pass them to invalidate_availability_keys afterwards.
+    """
+    # Imported here because calculate_available_times depends on the Booking model
+    from student.utils.calculate_available_times import get_slot_dates
+
+    return [
+        availability_cache_key(slot.id, date_obj, slot.updated_at)
+        for date_obj in get_slot_dates(slot, slot.start_date, slot.end_date)
+    ]
+
+
+def invalidate_availability_keys(keys):
+    """
+    Drop the given cache entries now and again once the current transaction commits,
+    so a concurrent read cannot re-cache the pre-commit bookings.
+    """
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
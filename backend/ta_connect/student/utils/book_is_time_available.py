@@ -1,5 +1,11 @@
 from django.utils import timezone
 from student.models import Booking
+from student.utils.booking_intervals import BookingIntervals
+
+
+class BookingConflictError(Exception):
+    """Raised when the requested time was taken by a concurrent booking."""
+
 
 def is_time_available(slot, date, start_dt, duration_minutes, exclude_booking_id=None) -> bool:
         """
@@ -9,19 +15,10 @@ def is_time_available(slot, date, start_dt, duration_minutes, exclude_booking_id
         """
         end_dt = start_dt + timezone.timedelta(minutes=duration_minutes)
 
-        # Example overlap query (adjust field names as needed):
-        qs = Booking.objects.filter(
+        bookings = Booking.objects.filter(
             office_hour=slot,
             date=date,
             is_cancelled=False
         )
-        if exclude_booking_id:
-            qs = qs.exclude(id=exclude_booking_id)
-
-        # assuming Booking.start_time is a datetime field
-        for b in qs:
-            b_start = b.start_time
-            b_end = b.start_time + timezone.timedelta(minutes=b.office_hour.duration_minutes)
-            if not (end_dt <= b_start or start_dt >= b_end):
-                return False
-        return True
\ No newline at end of file
+        intervals = BookingIntervals.from_bookings(bookings, slot.duration_minutes, exclude_booking_id)
+        return not intervals.overlaps(start_dt, end_dt)
@@ -0,0 +1,90 @@
+from bisect import bisect_left
+from datetime import timedelta
+
+
+class BookingIntervals:
+    """
+    Sorted [start, end) intervals of the active bookings on one slot date.
+
+    Overlap checks use a bisect over the start times plus a running maximum of
+    the end times, so a single check is O(log n) and a sorted batch of checks
+    (the availability grid) is one linear merge.
+
+    Usage:
+        intervals = BookingIntervals.from_bookings(slot.bookings.filter(date=day, is_cancelled=False), slot.duration_minutes)
+        intervals.overlaps(start_dt, end_dt)
+    """
+
+    def __init__(self, intervals):
+        # intervals: iterable of (start, end) sorted by start
+        self.starts = []
+        self.max_ends = []
+        max_end = None
+        for start, end in intervals:
+            max_end = end if max_end is None or end > max_end else max_end
+            self.starts.append(start)
+            self.max_ends.append(max_end)
+
+    @classmethod
+    def from_bookings(cls, bookings, duration_minutes, exclude_booking_id=None):
+        """
+        Build the intervals from a Booking queryset, fetching only (start_time, end_time).
+        Bookings without an end_time (legacy records) last duration_minutes.
+        """
+        if exclude_booking_id:
+            bookings = bookings.exclude(id=exclude_booking_id)
+        rows = bookings.order_by('start_time').values_list('start_time', 'end_time')
+        return cls(cls._with_ends(rows, duration_minutes))
+
+    @classmethod
+    def group_by_date(cls, bookings, duration_minutes):
+        """
+        Build {date: BookingIntervals} for a Booking queryset spanning several dates
+        with a single query.
+        """
+        rows = bookings.order_by('date', 'start_time').values_list('date', 'start_time', 'end_time')
+        by_date = {}
+        for booking_date, start, end in rows:
+            by_date.setdefault(booking_date, []).append((start, end))
+        return {
+            booking_date: cls(cls._with_ends(intervals, duration_minutes))
+            for booking_date, intervals in by_date.items()
+        }
+
+    @staticmethod
+    def _with_ends(rows, duration_minutes):
+        duration = timedelta(minutes=duration_minutes)
+        return [(start, end if end else start + duration) for start, end in rows]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _overlaps_before(self, index, start):
+        # Intervals [0, index) all start before the query ends; one of them
+        # overlaps exactly when the latest of their ends is after the query start
+        return index > 0 and self.max_ends[index - 1] > start
+
+    def overlaps(self, start, end):
+        """Return True if [start, end) overlaps any interval."""
+        return self._overlaps_before(bisect_left(self.starts, end), start)
+
+    def free(self, candidates):
+        """
+        Return the (start, end) candidates that overlap no interval.
+
+        Candidates sorted by start and end (such as a fixed-duration grid) are
+        answered in a single merge pass; an out-of-order end falls back to a bisect.
+        """
+        free = []
+        index = 0
+        previous_end = None
+        for start, end in candidates:
+            if previous_end is not None and end < previous_end:
+                index = bisect_left(self.starts, end)
+            else:
+                while index < len(self.starts) and self.starts[index] < end:
+                    index += 1
+            previous_end = end
+            if not self._overlaps_before(index, start):
+                free.append((start, end))
+        return free
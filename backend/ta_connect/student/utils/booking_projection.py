@@ -0,0 +1,93 @@
+from student.models import Booking
+
+# Columns needed to render a booking list row (see BookingListSerializer).
+# Everything is loaded in a single JOINed query so list endpoints stay O(1) in queries.
+BOOKING_LIST_FIELDS = (
+    'id',
+    'date',
+    'start_time',
+    'end_time',
+    'book_description',
+    'is_cancelled',
+    'is_completed',
+    'status',
+    'created_at',
+    'student__id',
+    'student__username',
+    'student__email',
+    'student__first_name',
+    'student__last_name',
+    'office_hour__id',
+    'office_hour__course_name',
+    'office_hour__section',
+    'office_hour__day_of_week',
+    'office_hour__start_time',
+    'office_hour__end_time',
+    'office_hour__duration_minutes',
+    'office_hour__start_date',
+    'office_hour__end_date',
+    'office_hour__room',
+    'office_hour__status',
+    'office_hour__instructor__id',
+    'office_hour__instructor__username',
+    'office_hour__instructor__email',
+    'office_hour__instructor__first_name',
+    'office_hour__instructor__last_name',
+)
+
+# Keyset orderings for the list endpoints, backed by idx_booking_student_keyset and
+# idx_booking_date_keyset. The trailing id makes every position unique.
+STUDENT_BOOKING_ORDERING = ('-date', '-start_time', '-id')
+INSTRUCTOR_BOOKING_ORDERING = ('date', 'start_time', 'id')
+
+# Timestamps whose maximum changes whenever a rendered booking row changes (used for ETags),
+# including the names and emails of its student and instructor
+BOOKING_LIST_VERSION_FIELDS = (
+    'updated_at',
+    'office_hour__updated_at',
+    'student__updated_at',
+    'office_hour__instructor__updated_at',
+)
+
+
+def project_booking_list(bookings):
+    """
+    Apply the booking list projection to a Booking queryset.
+
+    Joins the student, slot and instructor rows and restricts the SELECT to the
+    columns used by BookingListSerializer.
+    """
+    return bookings.select_related(
+        'student',
+        'office_hour',
+        'office_hour__instructor',
+    ).only(*BOOKING_LIST_FIELDS)
+
+
+def get_student_bookings(student, date_from, date_to):
+    """
+    Return the projected bookings of a student between two dates (inclusive),
+    newest first.
+    """
+    bookings = Booking.objects.filter(student=student, date__range=[date_from, date_to])
+    return project_booking_list(bookings).order_by(*STUDENT_BOOKING_ORDERING)
+
+
+def get_instructor_bookings(instructor, booking_status=None, start_date=None, end_date=None):
+    """
+    Return the projected bookings on an instructor's slots, optionally filtered
+    by status and date range.
+    """
+    bookings = Booking.objects.filter(office_hour__instructor=instructor)
+
+    if start_date and end_date:
+        bookings = bookings.filter(date__range=(start_date, end_date))
+    elif start_date:
+        bookings = bookings.filter(date__gte=start_date)
+    elif end_date:
+        bookings = bookings.filter(date__lte=end_date)
+
+    if booking_status:
+        bookings = bookings.filter(status=booking_status)
+
+    return project_booking_list(bookings).order_by(*INSTRUCTOR_BOOKING_ORDERING)
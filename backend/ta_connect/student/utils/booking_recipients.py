@@ -0,0 +1,124 @@
+"""
+Recipient records for the mass booking notification helpers.
+
+The mass email and push helpers used to walk booking.student,
+booking.student.student_profile, booking.office_hour and
+booking.office_hour.instructor for every booking, each a lazy query.
+resolve_booking_recipients() loads the same data with one JOINed query over
+BOOKING_RECIPIENT_FIELDS and returns immutable records. Users and slots shared by
+several bookings are built once and shared between their records.
+
+UserRecord has an `id`, so records can be handed to send_push_fanout in place of
+User objects.
+"""
+from typing import NamedTuple
+from datetime import datetime
+from django.db.models import QuerySet
+from student.models import Booking
+
+# Columns the mass notification helpers read, loaded in one query
+BOOKING_RECIPIENT_FIELDS = (
+    'id',
+    'start_time',
+    'student__id',
+    'student__username',
+    'student__email',
+    'student__first_name',
+    'student__last_name',
+    'student__student_profile__email_notifications_on_cancellation',
+    'student__student_profile__email_notifications_on_update',
+    'office_hour__id',
+    'office_hour__course_name',
+    'office_hour__duration_minutes',
+    'office_hour__room',
+    'office_hour__instructor__id',
+    'office_hour__instructor__username',
+    'office_hour__instructor__email',
+    'office_hour__instructor__first_name',
+    'office_hour__instructor__last_name',
+)
+
+
+class UserRecord(NamedTuple):
+    id: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+
+
+class SlotRecord(NamedTuple):
+    id: int
+    course_name: str
+    duration_minutes: int
+    room: str
+
+
+class BookingRecipient(NamedTuple):
+    """Who a booking notification goes to, and what it describes."""
+    booking_id: int
+    start_time: datetime
+    student: UserRecord
+    instructor: UserRecord
+    slot: SlotRecord
+    # The student's email preferences (True when the student has no profile, the field default)
+    student_email_on_cancellation: bool
+    student_email_on_update: bool
+
+
+def _user(row, prefix, users):
+    user_id = row[f'{prefix}__id']
+    user = users.get(user_id)
+    if user is None:
+        user = users[user_id] = UserRecord(
+            id=user_id,
+            username=row[f'{prefix}__username'],
+            email=row[f'{prefix}__email'],
+            first_name=row[f'{prefix}__first_name'],
+            last_name=row[f'{prefix}__last_name'],
+        )
+    return user
+
+
+def resolve_booking_recipients(bookings):
+    """
+    Load the recipient records of many bookings in one query.
+
+    Args:
+        bookings: Booking QuerySet, or a list of Booking objects or booking IDs
+
+    Returns:
+        list: BookingRecipient per booking, in the queryset's order or the list's order
+    """
+    if isinstance(bookings, QuerySet):
+        rows = list(bookings.values(*BOOKING_RECIPIENT_FIELDS))
+    else:
+        ids = [booking if isinstance(booking, int) else booking.id for booking in bookings]
+        position = {booking_id: index for index, booking_id in enumerate(ids)}
+        rows = sorted(
+            Booking.objects.filter(id__in=ids).values(*BOOKING_RECIPIENT_FIELDS),
+            key=lambda row: position[row['id']],
+        )
+
+    users, slots = {}, {}
+    recipients = []
+    for row in rows:
+        slot_id = row['office_hour__id']
+        slot = slots.get(slot_id)
+        if slot is None:
+            slot = slots[slot_id] = SlotRecord(
+                id=slot_id,
+                course_name=row['office_hour__course_name'],
+                duration_minutes=row['office_hour__duration_minutes'],
+                room=row['office_hour__room'],
+            )
+        recipients.append(BookingRecipient(
+            booking_id=row['id'],
+            start_time=row['start_time'],
+            student=_user(row, 'student', users),
+            instructor=_user(row, 'office_hour__instructor', users),
+            slot=slot,
+            student_email_on_cancellation=row['student__student_profile__email_notifications_on_cancellation'] is not False,
+            student_email_on_update=row['student__student_profile__email_notifications_on_update'] is not False,
+        ))
+    return recipients
@@ -0,0 +1,65 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from student.models import Booking
+from student.utils.booking_side_effects import enqueue_booking_reminders
+from utils.periodic import start_periodic_thread
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_booking_reminders(now=None, lead_minutes=None):
+    """
+    Queue a reminder for every confirmed booking starting within the next window.
+
+    The status/start_time filter is a range scan on idx_booking_status_start, so the
+    cost depends on the bookings starting soon, not the size of the table. Bookings are
+    marked with reminder_sent_at in the same transaction as their reminders are put on
+    the outbox, and locked rows are skipped, so concurrent schedulers (the in-process
+    thread of several workers, or cron) queue each reminder exactly once.
+
+    Args:
+        now (datetime, optional): Reference time, defaults to timezone.now()
+        lead_minutes (int, optional): Window length, defaults to BOOKING_REMINDER_LEAD_MINUTES
+
+    Returns:
+        int: Number of bookings reminded
+    """
+    now = now or timezone.now()
+    lead_minutes = lead_minutes or settings.BOOKING_REMINDER_LEAD_MINUTES
+
+    with transaction.atomic():
+        bookings = list(
+            Booking.objects.select_for_update(skip_locked=True)
+            .filter(
+                status='confirmed',
+                start_time__gt=now,
+                start_time__lte=now + timedelta(minutes=lead_minutes),
+                reminder_sent_at__isnull=True,
+            )
+            .only('id', 'date', 'start_time')
+        )
+        if not bookings:
+            return 0
+        Booking.objects.filter(id__in=[booking.id for booking in bookings]).update(reminder_sent_at=now)
+        enqueue_booking_reminders(bookings)
+
+    logger.info(f"Booking reminders: queued for {len(bookings)} bookings")
+    return len(bookings)
+
+
+def start_reminder_scheduler(interval=None):
+    """
+    Start the in-process booking reminder scheduler on a daemon thread.
+
+    Uses BOOKING_REMINDER_INTERVAL_SECONDS when no interval is given. A value of 0
+    disables the in-process scheduler (use the send_booking_reminders command instead).
+
+    Returns:
+        threading.Event used to stop the scheduler, or None if it was not started
+    """
+    if interval is None:
+        interval = getattr(settings, 'BOOKING_REMINDER_INTERVAL_SECONDS', 0)
+    return start_periodic_thread('booking-reminders', schedule_booking_reminders, interval, 'Booking reminder scheduler')
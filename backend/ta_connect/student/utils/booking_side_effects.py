@@ -0,0 +1,373 @@
+"""
+Booking side-effects delivered through the outbox.
+
+Each booking change enqueues one calendar message (when there is a calendar
+change to make), and one email and one push message per recipient, so a failing
+channel or recipient is retried on its own without repeating the others (a
+student is not emailed again because the instructor's email failed). Handlers reload the booking and call the existing
+email/push/calendar helpers. Those helpers report failures in their return
+value, so the handlers raise on failure to trigger a retry. Calendar handlers
+raise only for users with a connected calendar, and only for the side that is
+still missing, so a retry does not create an event twice. A rescheduled booking
+loses its events: their removal is queued with the move and the confirmation of
+the new time creates new ones.
+
+Email and push handlers first hand the notification of recipients in digest mode
+to the notification digest (student/utils/notification_digest.py), which sends
+them grouped through the NOTIFICATION_DIGEST topic.
+
+Reminders before a session are enqueued by the reminder scheduler
+(student/utils/booking_reminders.py) rather than by a booking change.
+"""
+import logging
+from datetime import date, datetime
+from django.utils import timezone
+from student.models import Booking
+from student.utils.outbox import enqueue_many, outbox_handler
+from student.utils.notification_digest import NOTIFICATION_DIGEST, coalesce_booking_notification, send_digest
+from utils.email_sending.booking import (
+    send_booking_pending_email,
+    send_booking_confirmation_email,
+    send_booking_cancelled_email,
+    send_booking_reminder_email,
+)
+from utils.push_notifications.booking.send_booking_pending import send_booking_pending_push
+from utils.push_notifications.booking.send_booking_confirmed import send_booking_confirmed_push
+from utils.push_notifications.booking.send_booking_cancelled import send_booking_cancelled_push
+from utils.push_notifications.booking.send_booking_reminder import send_booking_reminder_push
+from utils.google_calendar import (
+    add_booking_to_calendars,
+    delete_booking_event,
+    has_connected_calendar,
+    remove_booking_from_calendars,
+)
+
+logger = logging.getLogger(__name__)
+
+BOOKING_PENDING_EMAIL = 'booking.pending.email'
+BOOKING_PENDING_PUSH = 'booking.pending.push'
+BOOKING_RESCHEDULED_CALENDAR = 'booking.rescheduled.calendar'
+BOOKING_CONFIRMED_CALENDAR = 'booking.confirmed.calendar'
+BOOKING_CONFIRMED_EMAIL = 'booking.confirmed.email'
+BOOKING_CONFIRMED_PUSH = 'booking.confirmed.push'
+BOOKING_CANCELLED_CALENDAR = 'booking.cancelled.calendar'
+BOOKING_CANCELLED_EMAIL = 'booking.cancelled.email'
+BOOKING_CANCELLED_PUSH = 'booking.cancelled.push'
+BOOKING_REMINDER_EMAIL = 'booking.reminder.email'
+BOOKING_REMINDER_PUSH = 'booking.reminder.push'
+
+
+class SideEffectFailed(Exception):
+    """Raised by a handler when its helper reports a failure, so the message is retried."""
+
+
+def _booking_payload(booking, **extra):
+    # The date and time are captured now so the notification describes this change,
+    # even if the booking is changed again before the worker runs
+    return {
+        'booking_id': booking.id,
+        'booking_date': booking.date.isoformat(),
+        'booking_time': booking.start_time.isoformat(),
+        **extra,
+    }
+
+
+def _per_recipient(topic, payload, roles=('student', 'instructor')):
+    """One message of `topic` for each notified role."""
+    return [(topic, {**payload, 'recipient': role}) for role in roles]
+
+
+def _cancellation_notified(cancelled_by):
+    # Only the other party is pushed a cancellation
+    return ('student',) if cancelled_by == 'instructor' else ('instructor',)
+
+
+def _pending_messages(payload):
+    return _per_recipient(BOOKING_PENDING_EMAIL, payload) + _per_recipient(BOOKING_PENDING_PUSH, payload)
+
+
+def enqueue_booking_pending(booking):
+    """Queue the pending-approval notifications for a created booking."""
+    enqueue_many(_pending_messages(_booking_payload(booking)))
+
+
+def enqueue_booking_rescheduled(booking, student_event_id=None, instructor_event_id=None):
+    """
+    Queue the pending-approval notifications for a rescheduled booking, and the
+    removal of the calendar events it had at its old time.
+
+    The booking's event IDs are cleared when it moves, so the removed IDs travel
+    in the message.
+    """
+    payload = _booking_payload(booking)
+    messages = _pending_messages(payload)
+    if student_event_id or instructor_event_id:
+        messages.insert(0, (BOOKING_RESCHEDULED_CALENDAR, {
+            **payload,
+            'student_event_id': student_event_id,
+            'instructor_event_id': instructor_event_id,
+        }))
+    enqueue_many(messages)
+
+
+def enqueue_booking_confirmed(booking):
+    """Queue the calendar events and notifications for a confirmed booking."""
+    payload = _booking_payload(booking)
+    enqueue_many(
+        [(BOOKING_CONFIRMED_CALENDAR, payload)]
+        + _per_recipient(BOOKING_CONFIRMED_EMAIL, payload)
+        + _per_recipient(BOOKING_CONFIRMED_PUSH, payload, roles=('student',))
+    )
+
+
+def enqueue_booking_cancelled(booking, cancelled_by):
+    """Queue the calendar removal and notifications for a cancelled booking."""
+    payload = _booking_payload(booking, cancelled_by=cancelled_by)
+    enqueue_many(
+        [(BOOKING_CANCELLED_CALENDAR, payload)]
+        + _per_recipient(BOOKING_CANCELLED_EMAIL, payload)
+        + _per_recipient(BOOKING_CANCELLED_PUSH, payload, roles=_cancellation_notified(cancelled_by))
+    )
+
+
+def enqueue_booking_reminders(bookings):
+    """Queue the reminder email and push of each booking."""
+    messages = []
+    for booking in bookings:
+        payload = _booking_payload(booking)
+        messages += [(BOOKING_REMINDER_EMAIL, payload), (BOOKING_REMINDER_PUSH, payload)]
+    enqueue_many(messages)
+
+
+def _load(payload):
+    """
+    Return (booking, booking_date, booking_time) for a payload, or None when the
+    booking no longer exists (nothing left to notify about).
+    """
+    booking = (
+        Booking.objects.select_related('student', 'office_hour', 'office_hour__instructor')
+        .filter(id=payload['booking_id'])
+        .first()
+    )
+    if booking is None:
+        logger.info(f"Skipping side-effect for deleted booking {payload['booking_id']}")
+        return None
+    booking_date = date.fromisoformat(payload['booking_date'])
+    booking_time = datetime.fromisoformat(payload['booking_time'])
+    return booking, booking_date, booking_time
+
+
+def _notify(payload, booking, event_type, channel, booking_time, roles=('student', 'instructor')):
+    """
+    notify_student / notify_instructor arguments for the helper: only the message's
+    recipient (every role for messages queued before messages were split), and not
+    when their notification was held for a digest.
+    """
+    recipient = payload.get('recipient')
+    targeted = tuple(role for role in roles if recipient in (None, role))
+    notify = {f"notify_{role}": False for role in roles}
+    notify.update(coalesce_booking_notification(booking, event_type, channel, booking_time, roles=targeted))
+    return notify
+
+
+def _check(result, channel):
+    if not result.get('success'):
+        raise SideEffectFailed(f"{channel} failed: {result.get('errors') or result}")
+
+
+def _check_calendar(booking, student_done, instructor_done, operation):
+    """Raise if a side with a connected calendar was not done; users without one are skipped."""
+    failed = [
+        role for role, user, done in (
+            ('student', booking.student, student_done),
+            ('instructor', booking.office_hour.instructor, instructor_done),
+        )
+        if not done and has_connected_calendar(user)
+    ]
+    if failed:
+        raise SideEffectFailed(f"{operation} failed for the {' and '.join(failed)} calendar")
+
+
+@outbox_handler(BOOKING_PENDING_EMAIL)
+def deliver_booking_pending_email(payload):
+    loaded = _load(payload)
+    if loaded:
+        booking, booking_date, booking_time = loaded
+        _check(send_booking_pending_email(
+            student=booking.student,
+            instructor=booking.office_hour.instructor,
+            slot=booking.office_hour,
+            booking_date=booking_date,
+            booking_time=booking_time,
+            booking_id=booking.id,
+            **_notify(payload, booking, 'pending', 'email', booking_time)
+        ), 'Pending email')
+
+
+@outbox_handler(BOOKING_PENDING_PUSH)
+def deliver_booking_pending_push(payload):
+    loaded = _load(payload)
+    if loaded:
+        booking, booking_date, booking_time = loaded
+        _check(send_booking_pending_push(
+            student=booking.student,
+            instructor=booking.office_hour.instructor,
+            slot=booking.office_hour,
+            booking_date=booking_date,
+            booking_time=booking_time,
+            booking_id=booking.id,
+            **_notify(payload, booking, 'pending', 'push', booking_time)
+        ), 'Pending push')
+
+
+@outbox_handler(BOOKING_RESCHEDULED_CALENDAR)
+def deliver_booking_rescheduled_calendar(payload):
+    loaded = _load(payload)
+    if loaded:
+        booking = loaded[0]
+        student_event_id = payload.get('student_event_id')
+        instructor_event_id = payload.get('instructor_event_id')
+        # An event already removed by an earlier attempt answers 410 and counts as removed
+        student_removed = not student_event_id or delete_booking_event(booking.student, student_event_id)
+        instructor_removed = not instructor_event_id or delete_booking_event(
+            booking.office_hour.instructor, instructor_event_id
+        )
+        _check_calendar(booking, student_removed, instructor_removed, 'Calendar event removal')
+
+
+@outbox_handler(BOOKING_CONFIRMED_CALENDAR)
+def deliver_booking_confirmed_calendar(payload):
+    loaded = _load(payload)
+    # Skip if the booking was cancelled or moved before the worker got to it; a moved
+    # booking is pending again and its next confirmation queues its own events
+    if loaded and loaded[0].status == 'confirmed' and loaded[0].start_time == loaded[2]:
+        booking = loaded[0]
+        # Sides that already have an event got it from an earlier attempt at this
+        # message (a move clears the IDs) and are left alone
+        student_event_id, instructor_event_id = add_booking_to_calendars(booking)
+        _check_calendar(booking, student_event_id, instructor_event_id, 'Calendar event creation')
+
+
+@outbox_handler(BOOKING_CONFIRMED_EMAIL)
+def deliver_booking_confirmed_email(payload):
+    loaded = _load(payload)
+    if loaded:
+        booking, booking_date, booking_time = loaded
+        _check(send_booking_confirmation_email(
+            student=booking.student,
+            instructor=booking.office_hour.instructor,
+            slot=booking.office_hour,
+            booking_date=booking_date,
+            booking_time=booking_time,
+            **_notify(payload, booking, 'confirmed', 'email', booking_time)
+        ), 'Confirmation email')
+
+
+@outbox_handler(BOOKING_CONFIRMED_PUSH)
+def deliver_booking_confirmed_push(payload):
+    loaded = _load(payload)
+    if loaded:
+        booking, booking_date, booking_time = loaded
+        _check(send_booking_confirmed_push(
+            student=booking.student,
+            instructor=booking.office_hour.instructor,
+            slot=booking.office_hour,
+            booking_date=booking_date,
+            booking_time=booking_time,
+            booking_id=booking.id,
+            **_notify(payload, booking, 'confirmed', 'push', booking_time, roles=('student',))
+        ), 'Confirmation push')
+
+
+@outbox_handler(BOOKING_CANCELLED_CALENDAR)
+def deliver_booking_cancelled_calendar(payload):
+    loaded = _load(payload)
+    if loaded:
+        booking = loaded[0]
+        remove_booking_from_calendars(booking)
+        # Event IDs are cleared as events are removed; those left failed to be removed
+        _check_calendar(booking, not booking.student_calendar_event_id, not booking.instructor_calendar_event_id, 'Calendar event removal')
+
+
+@outbox_handler(BOOKING_CANCELLED_EMAIL)
+def deliver_booking_cancelled_email(payload):
+    loaded = _load(payload)
+    if loaded:
+        booking, booking_date, booking_time = loaded
+        _check(send_booking_cancelled_email(
+            student=booking.student,
+            instructor=booking.office_hour.instructor,
+            slot=booking.office_hour,
+            booking_date=booking_date,
+            booking_time=booking_time,
+            **_notify(payload, booking, 'cancelled', 'email', booking_time)
+        ), 'Cancellation email')
+
+
+@outbox_handler(BOOKING_CANCELLED_PUSH)
+def deliver_booking_cancelled_push(payload):
+    loaded = _load(payload)
+    if loaded:
+        booking, booking_date, booking_time = loaded
+        cancelled_by = payload.get('cancelled_by', 'instructor')
+        notified = _cancellation_notified(cancelled_by)
+        _check(send_booking_cancelled_push(
+            student=booking.student,
+            instructor=booking.office_hour.instructor,
+            slot=booking.office_hour,
+            booking_date=booking_date,
+            booking_time=booking_time,
+            booking_id=booking.id,
+            cancelled_by=cancelled_by,
+            **_notify(payload, booking, 'cancelled', 'push', booking_time, roles=notified)
+        ), 'Cancellation push')
+
+
+@outbox_handler(NOTIFICATION_DIGEST)
+def deliver_notification_digest(payload):
+    _check(send_digest(payload['recipient_id'], payload['event_type'], payload['channel']), 'Digest')
+
+
+def _load_upcoming(payload):
+    """
+    Return (booking, minutes until it starts) for a reminder, or None when the booking
+    is no longer confirmed for the reminded time or has already started.
+    """
+    loaded = _load(payload)
+    if not loaded:
+        return None
+    booking, booking_date, booking_time = loaded
+    now = timezone.now()
+    if booking.status != 'confirmed' or booking.start_time != booking_time or booking_time <= now:
+        logger.info(f"Skipping reminder for booking {booking.id}: no longer upcoming at the reminded time")
+        return None
+    return booking, max(round((booking_time - now).total_seconds() / 60), 1)
+
+
+@outbox_handler(BOOKING_REMINDER_EMAIL)
+def deliver_booking_reminder_email(payload):
+    upcoming = _load_upcoming(payload)
+    if upcoming:
+        booking, starts_in_minutes = upcoming
+        _check(send_booking_reminder_email(
+            student=booking.student,
+            instructor=booking.office_hour.instructor,
+            slot=booking.office_hour,
+            booking_time=booking.start_time,
+            starts_in_minutes=starts_in_minutes
+        ), 'Reminder email')
+
+
+@outbox_handler(BOOKING_REMINDER_PUSH)
+def deliver_booking_reminder_push(payload):
+    upcoming = _load_upcoming(payload)
+    if upcoming:
+        booking, starts_in_minutes = upcoming
+        _check(send_booking_reminder_push(
+            student=booking.student,
+            instructor=booking.office_hour.instructor,
+            slot=booking.office_hour,
+            booking_time=booking.start_time,
+            booking_id=booking.id,
+            starts_in_minutes=starts_in_minutes
+        ), 'Reminder push')
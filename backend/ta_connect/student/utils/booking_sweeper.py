@@ -0,0 +1,58 @@
+import logging
+from django.conf import settings
+from django.utils import timezone
+from student.models import Booking
+from utils.periodic import start_periodic_thread
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_ended_bookings(now=None):
+    """
+    Move every booking that has ended to its final status using set-based UPDATEs.
+
+    Ended confirmed bookings become completed and ended pending bookings become
+    cancelled. The date/status filter lets the database use idx_booking_date_status
+    so the cost depends on the open bookings up to today, not the whole table.
+
+    Args:
+        now (datetime, optional): Reference time, defaults to timezone.now()
+
+    Returns:
+        dict: {'completed': int, 'cancelled': int}
+    """
+    now = now or timezone.now()
+    ended = Booking.objects.filter(date__lte=timezone.localdate(now), end_time__lte=now)
+
+    completed = ended.filter(status='confirmed').update(
+        status='completed',
+        is_completed=True,
+        is_cancelled=False,
+        updated_at=now,
+    )
+    cancelled = ended.filter(status='pending').update(
+        status='cancelled',
+        is_cancelled=True,
+        is_completed=False,
+        updated_at=now,
+    )
+
+    if completed or cancelled:
+        logger.info(f"Booking sweeper: {completed} completed, {cancelled} cancelled")
+
+    return {'completed': completed, 'cancelled': cancelled}
+
+
+def start_booking_sweeper(interval=None):
+    """
+    Start the in-process booking sweeper on a daemon thread.
+
+    Uses BOOKING_SWEEPER_INTERVAL_SECONDS when no interval is given. A value of 0
+    disables the in-process sweeper (use the sweep_bookings command from cron instead).
+
+    Returns:
+        threading.Event used to stop the sweeper, or None if it was not started
+    """
+    if interval is None:
+        interval = getattr(settings, 'BOOKING_SWEEPER_INTERVAL_SECONDS', 0)
+    return start_periodic_thread('booking-sweeper', sweep_ended_bookings, interval, 'Booking sweeper')
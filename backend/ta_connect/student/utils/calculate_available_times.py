@@ -1,47 +1,134 @@
 from datetime import datetime, timedelta
 from django.utils import timezone
 from student.models import Booking
+from student.utils.availability_cache import get_cached_availability, set_cached_availability
+from student.utils.booking_intervals import BookingIntervals
 
-def get_available_times(slot, date_obj):
+# OfficeHourSlot.day_of_week values mapped to date.weekday() numbers
+WEEKDAY_NUMBERS = {'Mon': 0, 'Tue': 1, 'Wed': 2, 'Thu': 3, 'Fri': 4, 'Sat': 5, 'Sun': 6}
+
+
+def get_slot_dates(slot, date_from, date_to):
     """
-    Returns a list of available start times (HH:MM strings) for a given slot and date.
+    Returns the dates between date_from and date_to (inclusive) on which the slot
+    takes place, i.e. matching slot.day_of_week inside slot.start_date/end_date.
     """
-    available_times = []
-    
+    first = max(date_from, slot.start_date)
+    last = min(date_to, slot.end_date)
+    if first > last:
+        return []
+
+    # Jump straight to the first matching weekday, then step one week at a time
+    offset = (WEEKDAY_NUMBERS[slot.day_of_week] - first.weekday()) % 7
+    current = first + timedelta(days=offset)
+
+    dates = []
+    while current <= last:
+        dates.append(current)
+        current += timedelta(days=7)
+    return dates
+
+
+def _slot_grid(slot, date_obj):
+    """Return the slot's sub-slots on date_obj as sorted (start, end) datetimes."""
+    grid = []
+
     #construct start and end datetimes for the slot on that specific date
     start_dt = datetime.combine(date_obj, slot.start_time)
     end_dt = datetime.combine(date_obj, slot.end_time)
-    
+
     #Ensure timezone awareness to avoid "can't compare offset-naive and offset-aware datetimes" error
     if timezone.is_naive(start_dt):
         start_dt = timezone.make_aware(start_dt)
     if timezone.is_naive(end_dt):
         end_dt = timezone.make_aware(end_dt)
-    
-    # Get all active bookings for this slot on this date
-    bookings = Booking.objects.filter(
-        office_hour=slot,
-        date=date_obj,
-        is_cancelled=False
-    )
-    
-    #store booked start times in a hash set for O(1) lookup after that
-    booked_start_times = {b.start_time for b in bookings}
-    
+
     current_dt = start_dt
     duration = timedelta(minutes=slot.duration_minutes)
-    now = timezone.now()
 
     while current_dt + duration <= end_dt:
-        # Skip past times
-        if current_dt < now:
-            current_dt += duration
-            continue
-
-        # Check if this time is booked using the hash set
-        if current_dt not in booked_start_times:
-            available_times.append(current_dt.strftime('%H:%M'))
-            
+        grid.append((current_dt, current_dt + duration))
         current_dt += duration
-        
-    return available_times
+    return grid
+
+
+def _occupancy_mask(grid, intervals):
+    """
+    Return the occupancy bitmask of a slot date: bit i is set when sub-slot i of
+    the grid overlaps a booking.
+    """
+    # The grid is sorted, so it is checked against the bookings in one merge pass
+    free = {start for start, end in intervals.free(grid)}
+    mask = 0
+    for index, (start, end) in enumerate(grid):
+        if start not in free:
+            mask |= 1 << index
+    return mask
+
+
+def _free_start_times(slot, date_obj, mask):
+    """
+    Return the start datetimes of the sub-slots whose bit is clear in `mask`.
+    Past times are kept; callers drop them with _upcoming_times.
+    """
+    return [start for index, (start, end) in enumerate(_slot_grid(slot, date_obj)) if not mask >> index & 1]
+
+
+def _upcoming_times(free_start_times, now):
+    """Skip past times and format the rest as HH:MM strings."""
+    return [start_dt.strftime('%H:%M') for start_dt in free_start_times if start_dt >= now]
+
+
+def _get_occupancy(slot, dates):
+    """
+    Return {date: occupancy bitmask} for the given slot dates, reading the
+    availability cache first and loading bookings for the missing dates in one query.
+    """
+    occupancy = get_cached_availability(slot, dates)
+    missing_dates = [date_obj for date_obj in dates if date_obj not in occupancy]
+    if not missing_dates:
+        return occupancy
+
+    # Get all active bookings for this slot on the missing dates
+    bookings = Booking.objects.filter(
+        office_hour=slot,
+        date__in=missing_dates,
+        is_cancelled=False
+    )
+    intervals_by_date = BookingIntervals.group_by_date(bookings, slot.duration_minutes)
+    no_bookings = BookingIntervals([])
+
+    computed = {
+        date_obj: _occupancy_mask(_slot_grid(slot, date_obj), intervals_by_date.get(date_obj, no_bookings))
+        for date_obj in missing_dates
+    }
+    set_cached_availability(slot, computed)
+    occupancy.update(computed)
+    return occupancy
+
+
+def get_available_times(slot, date_obj):
+    """
+    Returns a list of available start times (HH:MM strings) for a given slot and date.
+    """
+    mask = _get_occupancy(slot, [date_obj])[date_obj]
+    return _upcoming_times(_free_start_times(slot, date_obj, mask), timezone.now())
+
+
+def get_available_times_range(slot, date_from, date_to):
+    """
+    Returns available start times for every date of the slot between date_from and
+    date_to (inclusive), grouped by date: {date: ['HH:MM', ...]}.
+
+    Dates not in the availability cache are computed from a single bookings query.
+    """
+    dates = get_slot_dates(slot, date_from, date_to)
+    if not dates:
+        return {}
+
+    occupancy = _get_occupancy(slot, dates)
+    now = timezone.now()
+    return {
+        date_obj: _upcoming_times(_free_start_times(slot, date_obj, occupancy[date_obj]), now)
+        for date_obj in dates
+    }
@@ -1,7 +1,7 @@
 from student.models import Booking
 from utils.email_sending.booking.send_cancel_booking_email_mass import send_cancel_booking_email_mass
 from utils.push_notifications.booking.send_booking_cancelled_mass import send_booking_cancelled_push_mass
-from utils.google_calendar import remove_booking_from_calendars
+from utils.google_calendar import remove_bookings_from_calendars_mass
 
 def cancel_student_bookings(time_slot, bookings=None, cancellation_reason=None):
     """
@@ -33,16 +33,17 @@ def cancel_student_bookings(time_slot, bookings=None, cancellation_reason=None):
         cancelled_count = 0
         bookings_list = list(bookings)
         
+        # Remove calendar events before cancellation, batched across all bookings
+        try:
+            calendar_results = remove_bookings_from_calendars_mass(bookings_list)
+            removed = sum(1 for student_deleted, instructor_deleted in calendar_results.values() if student_deleted or instructor_deleted)
+            if removed:
+                print(f"Calendar events removed for {removed} bookings")
+        except Exception as e:
+            # Log error but don't fail the cancellation
+            print(f"Failed to remove calendar events for {len(bookings_list)} bookings: {e}")
+
         for booking in bookings_list:
-            # Remove calendar events before cancellation
-            try:
-                student_deleted, instructor_deleted = remove_booking_from_calendars(booking)
-                if student_deleted or instructor_deleted:
-                    print(f"Calendar events removed for booking {booking.id} - Student: {student_deleted}, Instructor: {instructor_deleted}")
-            except Exception as e:
-                # Log error but don't fail the cancellation
-                print(f"Failed to remove calendar events for booking {booking.id}: {e}")
-            
             booking.cancel()
             booking.save()
             cancelled_count += 1
@@ -0,0 +1,187 @@
+"""
+Per-recipient coalescing of booking notifications into digests.
+
+Recipients who set notification_digest on their profile get booking emails and
+pushes grouped per event type (pending, confirmed, cancelled) and channel: the
+first notification of a group is held and a flush is scheduled on the outbox
+NOTIFICATION_DIGEST_WINDOW_SECONDS later. Every notification of the same group
+that arrives before then joins it, and the flush sends them as one digest email
+or push. Recipients without the preference are notified one by one as before.
+
+Whether a group needs a flush is decided by looking for a pending
+notification.digest outbox message for it, not for other unsent items: items
+of a digest whose message went dead are unsent too, and must not stop the next
+notification from scheduling a flush (which then sends them along). Items are
+written before that check, and a flush checks again for items that arrived
+while it was sending, so an item is never left without a scheduled flush.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.utils import timezone
+from student.models import NotificationDigestItem, OutboxMessage
+from student.utils.outbox import enqueue
+from utils.datetime_formatter import format_datetime_for_display
+from utils.email_sending.booking import send_booking_digest_email
+from utils.push_notifications.booking.send_booking_digest import send_booking_digest_push
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_DIGEST = 'notification.digest'
+
+# Profile flag the single-booking email helpers check before emailing a role for an
+# event (no entry: that email is always sent). Held emails honour the same flags.
+EMAIL_PREFERENCE_FIELDS = {
+    ('pending', 'student'): 'email_notifications_on_booking',
+    ('confirmed', 'instructor'): 'email_notifications_on_booking',
+    ('cancelled', 'student'): 'email_notifications_on_cancellation',
+    ('cancelled', 'instructor'): 'email_notifications_on_cancellation',
+}
+
+
+def _get_profile(user, role):
+    try:
+        return user.instructor_profile if role == 'instructor' else user.student_profile
+    except ObjectDoesNotExist:
+        return None
+
+
+def build_summary(booking, booking_time):
+    """The booking fields a digest lists, formatted when the event happened."""
+    student = booking.student
+    instructor = booking.office_hour.instructor
+    slot = booking.office_hour
+    booking_date, booking_time = format_datetime_for_display(booking_time)
+    return {
+        'student_name': f"{student.first_name} {student.last_name}".strip() or student.username,
+        'instructor_name': f"{instructor.first_name} {instructor.last_name}".strip() or instructor.username,
+        'course_name': slot.course_name if slot.course_name else 'Office Hours',
+        'booking_date': booking_date,
+        'booking_time': booking_time,
+        'room': slot.room or None,
+    }
+
+
+def _schedule_flush(recipient_id, event_type, channel):
+    available_at = timezone.now() + timedelta(seconds=settings.NOTIFICATION_DIGEST_WINDOW_SECONDS)
+    enqueue(NOTIFICATION_DIGEST, {
+        'recipient_id': recipient_id,
+        'event_type': event_type,
+        'channel': channel,
+    }, available_at=available_at)
+
+
+def _flush_scheduled(recipient_id, event_type, channel):
+    """True if a flush of the group is waiting on the outbox (not one already running or dead)."""
+    return OutboxMessage.objects.filter(
+        topic=NOTIFICATION_DIGEST,
+        status='pending',
+        payload__recipient_id=recipient_id,
+        payload__event_type=event_type,
+        payload__channel=channel,
+    ).exists()
+
+
+def _unsent(recipient_id, event_type, channel):
+    return NotificationDigestItem.objects.filter(
+        recipient_id=recipient_id, event_type=event_type, channel=channel, sent_at__isnull=True
+    )
+
+
+def hold_for_digest(recipient, event_type, channel, booking, summary):
+    """
+    Add a notification to the recipient's pending digest, scheduling the digest
+    unless a flush of its group is already waiting.
+
+    A booking appears once per digest: a repeated event (an outbox retry, or a
+    booking rescheduled within the window) updates its entry.
+    """
+    item, _ = NotificationDigestItem.objects.update_or_create(
+        recipient=recipient,
+        event_type=event_type,
+        channel=channel,
+        booking_id=booking.id,
+        sent_at=None,
+        defaults={'summary': summary},
+    )
+    if not _flush_scheduled(recipient.id, event_type, channel):
+        _schedule_flush(recipient.id, event_type, channel)
+    return item
+
+
+def coalesce_booking_notification(booking, event_type, channel, booking_time, roles=('student', 'instructor')):
+    """
+    Hold the notification of each recipient in digest mode and report who should
+    still be notified directly.
+
+    Args:
+        booking: Booking the notification is about
+        event_type: 'pending', 'confirmed' or 'cancelled'
+        channel: 'email' or 'push'
+        booking_time: Booking start time described by the notification
+        roles: Roles the notification goes to ('student' and/or 'instructor')
+
+    Returns:
+        dict: notify_student / notify_instructor keyword arguments for the helper,
+              False for recipients whose notification was held for a digest
+    """
+    recipients = {'student': booking.student, 'instructor': booking.office_hour.instructor}
+    notify = {}
+    summary = None
+    for role in roles:
+        user = recipients[role]
+        profile = _get_profile(user, role)
+        held = bool(profile and profile.notification_digest)
+
+        preference = EMAIL_PREFERENCE_FIELDS.get((event_type, role)) if channel == 'email' else None
+        if held and preference and getattr(profile, preference) is False:
+            # The helper skips this email anyway; do not add it to the digest
+            held = False
+
+        if held:
+            summary = summary or build_summary(booking, booking_time)
+            hold_for_digest(user, event_type, channel, booking, summary)
+        notify[f"notify_{role}"] = not held
+    return notify
+
+
+def send_digest(recipient_id, event_type, channel):
+    """
+    Send the held notifications of one (recipient, event type, channel) group as one digest.
+
+    Items are marked sent before sending so a concurrent flush does not send them
+    again, and unmarked if the send fails so the outbox retry picks them up.
+
+    Returns:
+        dict: {'success': bool, 'sent_count': int, 'errors': []}
+    """
+    with transaction.atomic():
+        items = list(
+            _unsent(recipient_id, event_type, channel)
+            .select_for_update(skip_locked=True)
+            .select_related('recipient')
+            .order_by('created_at', 'id')
+        )
+        if not items:
+            return {'success': True, 'sent_count': 0, 'errors': []}
+        ids = [item.id for item in items]
+        NotificationDigestItem.objects.filter(id__in=ids).update(sent_at=timezone.now())
+
+    recipient = items[0].recipient
+    summaries = [item.summary for item in items]
+    if channel == 'email':
+        result = send_booking_digest_email(recipient, event_type, summaries)
+    else:
+        result = send_booking_digest_push(recipient, event_type, summaries)
+
+    if not result.get('success'):
+        NotificationDigestItem.objects.filter(id__in=ids).update(sent_at=None)
+        return {'success': False, 'sent_count': 0, 'errors': result.get('errors') or [result.get('message')]}
+
+    logger.info(f"Sent {event_type} {channel} digest of {len(items)} notifications to user {recipient_id}")
+    # Notifications that arrived while this digest was being sent start the next one
+    if _unsent(recipient_id, event_type, channel).exists() and not _flush_scheduled(recipient_id, event_type, channel):
+        _schedule_flush(recipient_id, event_type, channel)
+    return {'success': True, 'sent_count': len(items), 'errors': []}
@@ -0,0 +1,177 @@
+"""
+Transactional outbox for booking side-effects.
+
+Views call enqueue() inside the transaction that changes the booking, so the
+side-effect is recorded if and only if the change commits. A worker (the
+process_outbox command or the in-process thread started from wsgi/asgi) claims
+due messages, runs the handler registered for their topic and records the
+outcome. Failed messages are retried with exponential backoff and moved to the
+"dead" status after OUTBOX_MAX_ATTEMPTS attempts.
+
+Delivery is at-least-once: a message whose worker dies is claimed again when
+its lease expires, so handlers should tolerate running twice.
+
+A handler that cannot run yet (e.g. rate limited) raises DeferMessage to be
+tried again later without the attempt counting towards OUTBOX_MAX_ATTEMPTS.
+"""
+import logging
+import random
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from student.models import OutboxMessage
+from utils.periodic import start_periodic_thread
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+class DeferMessage(Exception):
+    """Raised by a handler to put its message back for `delay` seconds without counting the attempt."""
+
+    def __init__(self, delay):
+        super().__init__(f"deferred for {delay:.0f}s")
+        self.delay = delay
+
+
+def register_handler(topic, handler):
+    """Register the callable that delivers messages of `topic`; it receives the payload dict."""
+    _handlers[topic] = handler
+
+
+def outbox_handler(topic):
+    """Decorator form of register_handler."""
+    def decorator(handler):
+        register_handler(topic, handler)
+        return handler
+    return decorator
+
+
+def enqueue(topic, payload, available_at=None):
+    """
+    Record a side-effect to deliver once the current transaction commits,
+    or not before `available_at` when given.
+
+    Returns:
+        OutboxMessage: The created message
+    """
+    return OutboxMessage.objects.create(topic=topic, payload=payload, available_at=available_at or timezone.now())
+
+
+def enqueue_many(messages, available_at=None):
+    """Record several (topic, payload) side-effects with one INSERT."""
+    available_at = available_at or timezone.now()
+    return OutboxMessage.objects.bulk_create([
+        OutboxMessage(topic=topic, payload=payload, available_at=available_at) for topic, payload in messages
+    ])
+
+
+def get_backoff(attempts):
+    """
+    Seconds to wait before retrying a message that has failed `attempts` times:
+    exponential from OUTBOX_BACKOFF_BASE_SECONDS, capped, with up to 10% jitter.
+    """
+    base = settings.OUTBOX_BACKOFF_BASE_SECONDS
+    delay = min(base * (2 ** (attempts - 1)), settings.OUTBOX_BACKOFF_MAX_SECONDS)
+    return delay + random.uniform(0, delay * 0.1)
+
+
+def claim_messages(batch_size, now=None):
+    """
+    Lease up to `batch_size` due messages to this worker.
+
+    Due messages are pending ones whose available_at has passed, plus processing ones
+    whose lease expired (their worker died). Rows locked by another worker are skipped.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['pending', 'processing'], available_at__lte=now)
+            .order_by('available_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        OutboxMessage.objects.filter(id__in=ids).update(
+            status='processing',
+            attempts=F('attempts') + 1,
+            available_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+            updated_at=now,
+        )
+    return list(OutboxMessage.objects.filter(id__in=ids).order_by('id'))
+
+
+def deliver_message(message):
+    """
+    Run the handler of one claimed message and record the outcome.
+
+    Returns:
+        str: 'done', 'retried' (including deferred) or 'dead'
+    """
+    now = timezone.now()
+    handler = _handlers.get(message.topic)
+
+    try:
+        if handler is None:
+            raise LookupError(f"No outbox handler registered for topic '{message.topic}'")
+        handler(message.payload)
+    except DeferMessage as e:
+        message.status = 'pending'
+        message.attempts -= 1
+        message.available_at = now + timedelta(seconds=e.delay)
+        message.save(update_fields=['status', 'attempts', 'available_at', 'updated_at'])
+        return 'retried'
+    except Exception as e:
+        message.last_error = f"{type(e).__name__}: {e}"
+        if handler is None or message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            message.status = 'dead'
+            message.processed_at = now
+            logger.error(f"Outbox message {message.id} ({message.topic}) dead after {message.attempts} attempts: {message.last_error}")
+        else:
+            message.status = 'pending'
+            message.available_at = now + timedelta(seconds=get_backoff(message.attempts))
+            logger.warning(f"Outbox message {message.id} ({message.topic}) failed, retrying at {message.available_at}: {message.last_error}")
+        message.save(update_fields=['status', 'last_error', 'available_at', 'processed_at', 'updated_at'])
+        return message.status if message.status == 'dead' else 'retried'
+
+    message.status = 'done'
+    message.last_error = ''
+    message.processed_at = now
+    message.save(update_fields=['status', 'last_error', 'processed_at', 'updated_at'])
+    return 'done'
+
+
+def process_outbox(batch_size=None):
+    """
+    Claim and deliver one batch of due messages.
+
+    Returns:
+        dict: {'done': int, 'retried': int, 'dead': int}
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    result = {'done': 0, 'retried': 0, 'dead': 0}
+    for message in claim_messages(batch_size):
+        result[deliver_message(message)] += 1
+    return result
+
+
+def delivered_any(result):
+    """True if a process_outbox batch handled messages, so the worker claims the next one without waiting."""
+    return any(result.values())
+
+
+def start_outbox_worker(interval=None):
+    """
+    Start the in-process outbox worker on a daemon thread.
+
+    Uses OUTBOX_WORKER_INTERVAL_SECONDS when no interval is given. A value of 0
+    disables the in-process worker (run `python manage.py process_outbox --loop` instead).
+
+    Returns:
+        threading.Event used to stop the worker, or None if it was not started
+    """
+    if interval is None:
+        interval = getattr(settings, 'OUTBOX_WORKER_INTERVAL_SECONDS', 0)
+    return start_periodic_thread('outbox-worker', process_outbox, interval, 'Outbox worker', is_busy=delivered_any)
@@ -403,3 +403,99 @@ EMAIL_CHANGE_TIMEOUT_HOURS = 24  # Email change links expire after 24 hours
 PASSWORD_RESET_TIMEOUT = 86400
 
 FIELD_ENCRYPTION_KEY = config('FIELD_ENCRYPTION_KEY')
+
+
+# Booking lifecycle sweeper
+# Seconds between in-process sweeps that complete/cancel ended bookings.
+# Set to 0 to disable it and run `python manage.py sweep_bookings` from cron instead.
+BOOKING_SWEEPER_INTERVAL_SECONDS = config('BOOKING_SWEEPER_INTERVAL_SECONDS', default=60, cast=int)
+
+# Available-times cache
+# Seconds a computed (slot, date) availability grid is kept. Entries are invalidated
+# on booking and slot changes, so this only bounds memory use.
+AVAILABILITY_CACHE_TIMEOUT_SECONDS = config('AVAILABILITY_CACHE_TIMEOUT_SECONDS', default=86400, cast=int)
+
+# Booking side-effect outbox
+# Emails, push notifications and calendar changes are queued with the booking change
+# and delivered by a worker. Failed deliveries are retried with exponential backoff
+# (base doubling per attempt, capped at the max) and marked dead after OUTBOX_MAX_ATTEMPTS.
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+OUTBOX_BACKOFF_BASE_SECONDS = config('OUTBOX_BACKOFF_BASE_SECONDS', default=30, cast=int)
+OUTBOX_BACKOFF_MAX_SECONDS = config('OUTBOX_BACKOFF_MAX_SECONDS', default=3600, cast=int)
+OUTBOX_BATCH_SIZE = config('OUTBOX_BATCH_SIZE', default=50, cast=int)
+# Seconds a claimed message is reserved for its worker before another worker may retry it
+OUTBOX_LEASE_SECONDS = config('OUTBOX_LEASE_SECONDS', default=300, cast=int)
+# Seconds the in-process worker waits when the outbox is empty.
+# Set to 0 to disable it and run `python manage.py process_outbox --loop` instead.
+OUTBOX_WORKER_INTERVAL_SECONDS = config('OUTBOX_WORKER_INTERVAL_SECONDS', default=5, cast=int)
+
+# Web push fan-out
+# Concurrent requests used to deliver mass push notifications, and the seconds
+# before a single push service request is abandoned.
+WEBPUSH_FANOUT_MAX_WORKERS = config('WEBPUSH_FANOUT_MAX_WORKERS', default=16, cast=int)
+WEBPUSH_TIMEOUT_SECONDS = config('WEBPUSH_TIMEOUT_SECONDS', default=10, cast=int)
+
+# Web push subscription pruning (python manage.py sweep_push_subscriptions)
+# Subscriptions are removed after this many failed sends in a row; 404/410 responses
+# remove them at once. Subscriptions that simply received nothing are kept.
+PUSH_SUBSCRIPTION_MAX_FAILURES = config('PUSH_SUBSCRIPTION_MAX_FAILURES', default=5, cast=int)
+
+# VAPID header cache for web push
+# Signed VAPID headers are reused per push service origin for up to VAPID_HEADER_TTL_SECONDS
+# (the spec allows 24h) and re-signed when less than VAPID_HEADER_REFRESH_SECONDS remain.
+VAPID_HEADER_TTL_SECONDS = config('VAPID_HEADER_TTL_SECONDS', default=43200, cast=int)
+VAPID_HEADER_REFRESH_SECONDS = config('VAPID_HEADER_REFRESH_SECONDS', default=3600, cast=int)
+
+# Pooled SMTP connections (utils/email_sending/connection_pool.py)
+# Open connections kept per process, seconds an idle connection may be reused, and
+# idle seconds after which a connection is checked with NOOP before reuse.
+SMTP_POOL_SIZE = config('SMTP_POOL_SIZE', default=4, cast=int)
+SMTP_IDLE_TIMEOUT_SECONDS = config('SMTP_IDLE_TIMEOUT_SECONDS', default=120, cast=int)
+SMTP_HEALTH_CHECK_SECONDS = config('SMTP_HEALTH_CHECK_SECONDS', default=15, cast=int)
+
+# Notification digests (student/utils/notification_digest.py)
+# Seconds booking notifications are collected for recipients in digest mode before
+# one digest per event type and channel is sent.
+NOTIFICATION_DIGEST_WINDOW_SECONDS = config('NOTIFICATION_DIGEST_WINDOW_SECONDS', default=900, cast=int)
+
+# Outgoing email rate limit (utils/email_sending/rate_limiter.py)
+# Emails per minute and per day the sending account accepts; emails over the limit are
+# queued on the outbox and sent once the budget refills. 0 disables a limit.
+EMAIL_RATE_PER_MINUTE = config('EMAIL_RATE_PER_MINUTE', default=60, cast=int)
+EMAIL_RATE_PER_DAY = config('EMAIL_RATE_PER_DAY', default=500, cast=int)
+
+# Booking reminders (student/utils/booking_reminders.py)
+# Minutes before a confirmed booking starts that its reminder email and push are sent,
+# and seconds between in-process scans for upcoming bookings. Set the interval to 0 to
+# disable the in-process scheduler and run `python manage.py send_booking_reminders` from cron.
+BOOKING_REMINDER_LEAD_MINUTES = config('BOOKING_REMINDER_LEAD_MINUTES', default=60, cast=int)
+BOOKING_REMINDER_INTERVAL_SECONDS = config('BOOKING_REMINDER_INTERVAL_SECONDS', default=60, cast=int)
+
+# Google Calendar service cache (utils/calendar_service_cache.py)
+# Calendar API service objects kept per process, one per user, least recently used
+# evicted first. 0 builds a new service for every call.
+GOOGLE_CALENDAR_SERVICE_CACHE_SIZE = config('GOOGLE_CALENDAR_SERVICE_CACHE_SIZE', default=256, cast=int)
+
+# Batched Google Calendar requests (utils/calendar_batch.py)
+# Event operations sent per batch HTTP request (Google accepts up to 1000 but
+# recommends at most 50).
+GOOGLE_CALENDAR_BATCH_SIZE = config('GOOGLE_CALENDAR_BATCH_SIZE', default=50, cast=int)
+
+# Google Calendar token refresh (utils/calendar_tokens.py)
+# Access tokens expiring within GOOGLE_TOKEN_REFRESH_LEAD_SECONDS are refreshed ahead of
+# time, every GOOGLE_TOKEN_REFRESH_INTERVAL_SECONDS. Set the interval to 0 to disable the
+# in-process refresher and run `python manage.py refresh_calendar_tokens` from cron.
+GOOGLE_TOKEN_REFRESH_LEAD_SECONDS = config('GOOGLE_TOKEN_REFRESH_LEAD_SECONDS', default=600, cast=int)
+GOOGLE_TOKEN_REFRESH_INTERVAL_SECONDS = config('GOOGLE_TOKEN_REFRESH_INTERVAL_SECONDS', default=120, cast=int)
+
+# Google Calendar reconciliation (utils/calendar_sync.py)
+# Seconds between incremental syncs of each connected user's calendar, repairing or
+# clearing booking event IDs changed by hand. Set to 0 to disable the in-process
+# reconciler and run `python manage.py reconcile_calendars` from cron.
+GOOGLE_CALENDAR_RECONCILE_INTERVAL_SECONDS = config('GOOGLE_CALENDAR_RECONCILE_INTERVAL_SECONDS', default=900, cast=int)
+
+# Google API endpoints
+# Root URL of the Google APIs (Calendar, userinfo) and the OAuth2 token endpoint. Only
+# changed to point the app at a fake server, e.g. utils/fake_google.py for load tests.
+GOOGLE_API_ROOT_URL = config('GOOGLE_API_ROOT_URL', default='https://www.googleapis.com/')
+GOOGLE_OAUTH_TOKEN_URI = config('GOOGLE_OAUTH_TOKEN_URI', default='https://oauth2.googleapis.com/token')
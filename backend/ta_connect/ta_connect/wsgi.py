@@ -14,3 +14,15 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ta_connect.settings')
 
 application = get_wsgi_application()
+
+# Start the in-process booking sweeper, reminder scheduler, outbox worker, Google token refresher and calendar reconciler for served processes only (not tests or management commands)
+from student.utils.booking_sweeper import start_booking_sweeper
+from student.utils.booking_reminders import start_reminder_scheduler
+from student.utils.outbox import start_outbox_worker
+from utils.calendar_tokens import start_token_refresher
+from utils.calendar_sync import start_calendar_reconciler
+start_booking_sweeper()
+start_reminder_scheduler()
+start_outbox_worker()
+start_token_refresher()
+start_calendar_reconciler()
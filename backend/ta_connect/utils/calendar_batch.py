@@ -0,0 +1,137 @@
+"""
+Batched Google Calendar event operations.
+
+Updating the room of a slot used to cost four API calls per booking (a get and a
+full update of the event, in the student's and in the instructor's calendar),
+and cancelling a slot's bookings one delete per event, each its own round-trip.
+
+CalendarBatch collects event inserts, patches and deletes for any number of
+users and sends them as Google batch HTTP requests of up to
+GOOGLE_CALENDAR_BATCH_SIZE operations. Operations are grouped per user (each
+user's calendar service is looked up once); every part of a batch carries the
+credentials of the user it acts for, so one batch can hold the operations of
+several users. Location changes only send the changed fields with events.patch.
+
+Results are keyed by (booking_id, role), role being 'student' or 'instructor':
+
+    batch = CalendarBatch()
+    batch.patch(booking.student, booking.id, 'student', event_id, {'location': room})
+    results = batch.execute()
+    results[(booking.id, 'student')].ok
+"""
+import logging
+from typing import NamedTuple, Optional
+from django.conf import settings
+from googleapiclient.errors import HttpError
+from utils.calendar_service_cache import get_thread_http
+
+logger = logging.getLogger(__name__)
+
+# Statuses meaning the event to delete is already gone
+DELETED_STATUSES = (404, 410)
+
+
+class CalendarResult(NamedTuple):
+    """Outcome of one batched event operation."""
+    ok: bool
+    # Event ID created by an insert, or the event the patch/delete acted on
+    event_id: Optional[str] = None
+    # HTTP status of the operation (None when it was never sent)
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+
+class _Operation(NamedTuple):
+    user: object
+    key: tuple
+    method: str
+    event_id: Optional[str]
+    body: Optional[dict]
+
+
+class CalendarBatch:
+    """Collects calendar event operations and sends them as batch HTTP requests."""
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or settings.GOOGLE_CALENDAR_BATCH_SIZE
+        self._operations = []
+
+    def insert(self, user, booking_id, role, body):
+        self._operations.append(_Operation(user, (booking_id, role), 'insert', None, body))
+
+    def patch(self, user, booking_id, role, event_id, body):
+        """Change only the fields in body (e.g. {'location': room})."""
+        self._operations.append(_Operation(user, (booking_id, role), 'patch', event_id, body))
+
+    def delete(self, user, booking_id, role, event_id):
+        self._operations.append(_Operation(user, (booking_id, role), 'delete', event_id, None))
+
+    def __len__(self):
+        return len(self._operations)
+
+    def _request(self, service, operation):
+        events = service.events()
+        if operation.method == 'insert':
+            return events.insert(calendarId='primary', body=operation.body)
+        if operation.method == 'patch':
+            return events.patch(calendarId='primary', eventId=operation.event_id, body=operation.body)
+        return events.delete(calendarId='primary', eventId=operation.event_id)
+
+    def _result(self, operation, response, exception):
+        if exception is None:
+            event_id = response.get('id') if operation.method == 'insert' and response else operation.event_id
+            return CalendarResult(True, event_id, 200)
+        if isinstance(exception, HttpError):
+            status = exception.resp.status
+            if operation.method == 'delete' and status in DELETED_STATUSES:
+                return CalendarResult(True, operation.event_id, status)
+            return CalendarResult(False, operation.event_id, status, str(exception))
+        return CalendarResult(False, operation.event_id, None, str(exception))
+
+    def execute(self):
+        """
+        Send every collected operation.
+
+        Users without a connected and enabled calendar get a failed result for
+        each of their operations without a request being made.
+
+        Returns:
+            dict: {(booking_id, role): CalendarResult}
+        """
+        # Imported here because utils.google_calendar builds on this module
+        from utils.google_calendar import get_calendar_service
+
+        by_user = {}
+        for operation in self._operations:
+            by_user.setdefault(operation.user.id, []).append(operation)
+
+        results = {}
+        pending = []
+        for operations in by_user.values():
+            service = get_calendar_service(operations[0].user)
+            for operation in operations:
+                if service is None:
+                    results[operation.key] = CalendarResult(False, operation.event_id, None, 'Calendar not connected')
+                else:
+                    pending.append((service, operation))
+
+        for start in range(0, len(pending), self.batch_size):
+            self._send(pending[start:start + self.batch_size], results)
+        return results
+
+    def _send(self, chunk, results):
+        def callback(request_id, response, exception):
+            operation = chunk[int(request_id)][1]
+            results[operation.key] = self._result(operation, response, exception)
+
+        batch = chunk[0][0].new_batch_http_request(callback=callback)
+        for index, (service, operation) in enumerate(chunk):
+            batch.add(self._request(service, operation), request_id=str(index))
+
+        try:
+            # The outer request is sent unauthenticated; each part carries its user's credentials
+            batch.execute(http=get_thread_http())
+        except Exception as e:
+            logger.error(f"Calendar batch of {len(chunk)} operations failed: {str(e)}")
+            for _, operation in chunk:
+                results.setdefault(operation.key, CalendarResult(False, operation.event_id, None, str(e)))
@@ -0,0 +1,129 @@
+"""
+Per-process cache of Google Calendar API service objects.
+
+get_calendar_service() used to build a new service on every call: it decrypted
+both stored tokens, built google.oauth2 Credentials and called
+googleapiclient.discovery.build(), which reads and parses the calendar v3
+discovery document (~150 KB of JSON) each time. Confirming a booking does that
+twice, a mass room change twice per booking.
+
+calendar_service_cache keeps up to GOOGLE_CALENDAR_SERVICE_CACHE_SIZE ready
+services keyed by user id, evicting the least recently used one. Each entry
+remembers the updated_at of the GoogleCalendarCredentials row it was built from:
+
+- saving or deleting the credentials drops the user's entry in this process
+  (post_save / post_delete),
+- other processes see the new updated_at on their next lookup and rebuild.
+
+Services are built with build_from_document() from the calendar v3 discovery
+document bundled with google-api-python-client, parsed once per process.
+httplib2 connections are not thread-safe, so requests made through a cached
+service go out over a connection owned by the calling thread.
+"""
+import json
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+from googleapiclient.http import HttpRequest, build_http
+from accounts.models import GoogleCalendarCredentials
+
+_discovery_document = None
+_discovery_lock = threading.Lock()
+_thread_local = threading.local()
+
+
+def get_discovery_document():
+    """
+    The bundled calendar v3 discovery document, parsed once per process.
+    Its rootUrl (which requests and batch requests are sent to) is GOOGLE_API_ROOT_URL.
+    """
+    global _discovery_document
+    if _discovery_document is None:
+        with _discovery_lock:
+            if _discovery_document is None:
+                _discovery_document = json.loads(discovery_cache.get_static_doc('calendar', 'v3'))
+    if _discovery_document['rootUrl'] != settings.GOOGLE_API_ROOT_URL:
+        return {**_discovery_document, 'rootUrl': settings.GOOGLE_API_ROOT_URL}
+    return _discovery_document
+
+
+def get_thread_http():
+    """This thread's unauthenticated httplib2 connection (httplib2.Http is not thread-safe)."""
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        http = _thread_local.http = build_http()
+    return http
+
+
+def _request_builder(http, *args, **kwargs):
+    # A cached service is shared between threads: authorize with its credentials,
+    # but send over this thread's connection
+    return HttpRequest(AuthorizedHttp(http.credentials, http=get_thread_http()), *args, **kwargs)
+
+
+def build_calendar_service(credentials):
+    """Build a calendar v3 service for google.oauth2 credentials without re-reading the discovery document."""
+    return build_from_document(get_discovery_document(), credentials=credentials, requestBuilder=_request_builder)
+
+
+class CalendarServiceCache:
+    """A bounded, thread-safe LRU of calendar services keyed by user id."""
+
+    def __init__(self, max_size=None):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return settings.GOOGLE_CALENDAR_SERVICE_CACHE_SIZE if self._max_size is None else self._max_size
+
+    def get(self, user_id, version):
+        """Return the user's service if it was built from this version of their credentials, else None."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id, version, service):
+        max_size = self.max_size
+        if max_size <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (version, service)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+calendar_service_cache = CalendarServiceCache()
+
+
+@receiver(post_save, sender=GoogleCalendarCredentials)
+@receiver(post_delete, sender=GoogleCalendarCredentials)
+def invalidate_calendar_service(sender, instance, **kwargs):
+    calendar_service_cache.invalidate(instance.user_id)
@@ -0,0 +1,226 @@
+"""
+Reconciliation of stored calendar event IDs with users' Google Calendars.
+
+Booking.student_calendar_event_id and instructor_calendar_event_id go stale when
+a user deletes an event or moves it to another calendar by hand; until now that
+only surfaced as a 404 on a later delete.
+
+reconcile_calendars() walks connected users and lists their primary calendar
+incrementally: the first run lists every event and stores the nextSyncToken on
+GoogleCalendarCredentials.sync_token; later runs pass it back and only receive
+the events changed since (deleted ones included), so a run costs O(changes).
+A token Google no longer accepts (410 Gone) starts over with a full listing.
+
+For each user the changes are applied in bulk:
+
+- event IDs of deleted events (or, after a full listing, of events no longer
+  in the calendar) are cleared; a full listing only clears IDs of bookings last
+  updated before it started, as an event created while it ran is missing from it,
+- events created by us carry the booking in a private extended property; a
+  live one whose booking has no event ID for that calendar gets it back.
+
+Each user is reconciled at most once per GOOGLE_CALENDAR_RECONCILE_INTERVAL_SECONDS;
+a run claims a user by moving last_synced_at, so concurrent runs (the in-process
+thread of several workers, or cron) don't list the same calendar twice.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from googleapiclient.errors import HttpError
+from accounts.models import GoogleCalendarCredentials, User
+from student.models import Booking
+from utils.google_calendar import BOOKING_ID_PROPERTY, BOOKING_ROLE_PROPERTY, get_calendar_service
+from utils.periodic import start_periodic_thread
+
+logger = logging.getLogger(__name__)
+
+# Booking event ID field and owner lookup for each side of a booking
+ROLE_FIELDS = {
+    'student': ('student_calendar_event_id', 'student_id'),
+    'instructor': ('instructor_calendar_event_id', 'office_hour__instructor_id'),
+}
+LIST_FIELDS = 'items(id,status,extendedProperties),nextPageToken,nextSyncToken'
+LIST_PAGE_SIZE = 1000
+
+
+def list_event_changes(service, sync_token=None):
+    """
+    List the primary calendar's events changed since sync_token (every event when None).
+
+    Returns:
+        tuple: (list of event dicts, next sync token)
+
+    Raises:
+        HttpError: 410 when the sync token is no longer valid
+    """
+    params = {'calendarId': 'primary', 'maxResults': LIST_PAGE_SIZE, 'fields': LIST_FIELDS}
+    if sync_token:
+        params['syncToken'] = sync_token
+        params['showDeleted'] = True
+
+    events = []
+    page_token = None
+    while True:
+        response = service.events().list(pageToken=page_token, **params).execute()
+        events.extend(response.get('items', []))
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return events, response.get('nextSyncToken')
+
+
+def apply_event_changes(user_id, events, full_listing, listed_at=None):
+    """
+    Clear and repair the event IDs of a user's bookings from a list of changed events.
+
+    Args:
+        user_id: Owner of the calendar the events were listed from
+        events: Event dicts from list_event_changes
+        full_listing: True if events is every event of the calendar, so stored IDs
+            missing from it are stale too
+        listed_at: When the listing started; with full_listing, bookings updated
+            since then keep their IDs, as their events may be newer than the listing
+
+    Returns:
+        dict: {'cleared': int, 'repaired': int}
+    """
+    live = {event['id']: event for event in events if event.get('status') != 'cancelled'}
+    deleted_ids = [event['id'] for event in events if event.get('status') == 'cancelled']
+
+    changed = {}
+    cleared = repaired = 0
+    for role, (field, owner) in ROLE_FIELDS.items():
+        if full_listing:
+            stored = Booking.objects.filter(**{owner: user_id, f'{field}__isnull': False})
+            if listed_at:
+                stored = stored.filter(updated_at__lt=listed_at)
+        elif deleted_ids:
+            stored = Booking.objects.filter(**{owner: user_id, f'{field}__in': deleted_ids})
+        else:
+            stored = Booking.objects.none()
+        for booking in stored.only('id', field):
+            if getattr(booking, field) not in live:
+                setattr(booking, field, None)
+                changed.setdefault((booking.id, field), booking)
+                cleared += 1
+
+        marked = {}
+        for event_id, event in live.items():
+            properties = event.get('extendedProperties', {}).get('private', {})
+            booking_id = properties.get(BOOKING_ID_PROPERTY)
+            if properties.get(BOOKING_ROLE_PROPERTY) == role and booking_id and booking_id.isdigit():
+                marked[int(booking_id)] = event_id
+        if not marked:
+            continue
+        candidates = Booking.objects.filter(id__in=marked, is_cancelled=False, **{owner: user_id}).only('id', field)
+        for booking in candidates:
+            booking = changed.get((booking.id, field), booking)
+            if getattr(booking, field) is None:
+                setattr(booking, field, marked[booking.id])
+                changed[(booking.id, field)] = booking
+                repaired += 1
+
+    for field, _ in ROLE_FIELDS.values():
+        bookings = [booking for (_, changed_field), booking in changed.items() if changed_field == field]
+        if bookings:
+            Booking.objects.bulk_update(bookings, [field])
+    return {'cleared': cleared, 'repaired': repaired}
+
+
+def reconcile_user_calendar(user):
+    """
+    Reconcile one user's booking event IDs with their calendar.
+
+    Returns:
+        dict: {'changes', 'cleared', 'repaired', 'full_listing'}, or None if the user
+              has no usable calendar connection
+    """
+    service = get_calendar_service(user)
+    if service is None:
+        return None
+
+    sync_token = GoogleCalendarCredentials.objects.filter(user_id=user.id).values_list('sync_token', flat=True).first()
+    listed_at = timezone.now()
+    try:
+        events, next_sync_token = list_event_changes(service, sync_token)
+    except HttpError as e:
+        if not sync_token or e.resp.status != 410:
+            raise
+        logger.info(f"Calendar sync token of user {user.id} expired; listing all events")
+        sync_token = None
+        listed_at = timezone.now()
+        events, next_sync_token = list_event_changes(service)
+
+    result = apply_event_changes(user.id, events, full_listing=not sync_token, listed_at=listed_at)
+    # update() leaves updated_at alone, so the cached calendar service stays valid
+    GoogleCalendarCredentials.objects.filter(user_id=user.id).update(sync_token=next_sync_token)
+    return {'changes': len(events), 'full_listing': not sync_token, **result}
+
+
+def _claim(credentials_id, last_synced_at, now):
+    """Take a user for this run by moving last_synced_at; False if another run took it first."""
+    if last_synced_at is None:
+        claimed = GoogleCalendarCredentials.objects.filter(pk=credentials_id, last_synced_at__isnull=True)
+    else:
+        claimed = GoogleCalendarCredentials.objects.filter(pk=credentials_id, last_synced_at=last_synced_at)
+    return claimed.update(last_synced_at=now) == 1
+
+
+def reconcile_calendars(now=None, min_interval=None):
+    """
+    Reconcile every connected user not reconciled within min_interval seconds.
+
+    Args:
+        now (datetime, optional): Reference time, defaults to timezone.now()
+        min_interval (int, optional): Defaults to GOOGLE_CALENDAR_RECONCILE_INTERVAL_SECONDS
+
+    Returns:
+        dict: {'users', 'changes', 'cleared', 'repaired', 'full_listings', 'failed'}
+    """
+    now = now or timezone.now()
+    min_interval = settings.GOOGLE_CALENDAR_RECONCILE_INTERVAL_SECONDS if min_interval is None else min_interval
+    due = GoogleCalendarCredentials.objects.filter(
+        Q(last_synced_at__isnull=True) | Q(last_synced_at__lte=now - timedelta(seconds=min_interval)),
+        calendar_enabled=True,
+        invalidated_at__isnull=True,
+        refresh_token__isnull=False,
+    ).values_list('id', 'user_id', 'last_synced_at')
+
+    claimed = [user_id for credentials_id, user_id, last_synced_at in list(due) if _claim(credentials_id, last_synced_at, now)]
+    users = User.objects.in_bulk(claimed)
+
+    totals = {'users': 0, 'changes': 0, 'cleared': 0, 'repaired': 0, 'full_listings': 0, 'failed': 0}
+    for user_id in claimed:
+        try:
+            result = reconcile_user_calendar(users[user_id])
+        except Exception as e:
+            logger.warning(f"Calendar reconciliation failed for user {user_id}: {str(e)}")
+            totals['failed'] += 1
+            continue
+        if result is None:
+            continue
+        totals['users'] += 1
+        totals['changes'] += result['changes']
+        totals['cleared'] += result['cleared']
+        totals['repaired'] += result['repaired']
+        totals['full_listings'] += int(result['full_listing'])
+
+    if totals['cleared'] or totals['repaired'] or totals['failed']:
+        logger.info(f"Calendar reconciliation: {totals}")
+    return totals
+
+
+def start_calendar_reconciler(interval=None):
+    """
+    Start the in-process calendar reconciler on a daemon thread.
+
+    Uses GOOGLE_CALENDAR_RECONCILE_INTERVAL_SECONDS when no interval is given. A value of 0
+    disables the in-process reconciler (use the reconcile_calendars command instead).
+
+    Returns:
+        threading.Event used to stop the reconciler, or None if it was not started
+    """
+    if interval is None:
+        interval = getattr(settings, 'GOOGLE_CALENDAR_RECONCILE_INTERVAL_SECONDS', 0)
+    return start_periodic_thread('calendar-reconciler', lambda: reconcile_calendars(min_interval=interval), interval, 'Calendar reconciler')
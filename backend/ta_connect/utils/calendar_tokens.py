@@ -0,0 +1,192 @@
+"""
+Google Calendar access token refresh.
+
+Access tokens expire after about an hour. get_calendar_service() used to refresh
+an expired token inline, in the middle of the request that needed it, stored a
+guessed expiry of now + 3600s, and let every concurrent request for the same
+user refresh on its own.
+
+The token refresher renews tokens ahead of time instead: every
+GOOGLE_TOKEN_REFRESH_INTERVAL_SECONDS it refreshes the tokens of connected users
+that expire within GOOGLE_TOKEN_REFRESH_LEAD_SECONDS, so requests find a valid
+token and a cached calendar service. A refresh:
+
+- holds a per-user lock (a process-local lock and the credentials row locked
+  with select_for_update), and re-reads the expiry under it, so concurrent
+  refreshes of one user result in one call to the token endpoint,
+- stores the expiry Google returns,
+- marks the credentials invalid (invalidated_at) when Google answers
+  invalid_grant (revoked or expired refresh token), so they are skipped until
+  the user reconnects instead of being retried on every request.
+
+get_calendar_service() still refreshes through refresh_access_token() when it
+meets an expired token (e.g. right after downtime or with the refresher disabled).
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta, timezone as dt_timezone
+from decouple import config
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from accounts.models import GoogleCalendarCredentials
+from utils.periodic import start_periodic_thread
+
+logger = logging.getLogger(__name__)
+
+# Google OAuth2 settings
+GOOGLE_CLIENT_ID = config('GOOGLE_CLIENT_ID', default='')
+GOOGLE_CLIENT_SECRET = config('GOOGLE_CLIENT_SECRET', default='')
+
+_user_locks = {}
+_user_locks_lock = threading.Lock()
+
+
+def build_credentials(creds_model):
+    """google.oauth2 Credentials for stored GoogleCalendarCredentials."""
+    return Credentials(
+        token=creds_model.access_token,
+        refresh_token=creds_model.refresh_token,
+        token_uri=settings.GOOGLE_OAUTH_TOKEN_URI,
+        client_id=GOOGLE_CLIENT_ID,
+        client_secret=GOOGLE_CLIENT_SECRET,
+    )
+
+
+def _is_invalid_grant(error):
+    response = error.args[1] if len(error.args) > 1 else None
+    if isinstance(response, dict):
+        return response.get('error') == 'invalid_grant'
+    return 'invalid_grant' in str(error)
+
+
+@contextmanager
+def _user_lock(user_id, blocking=True):
+    """Hold the process-local refresh lock of a user; yields False if it is taken and blocking is False."""
+    with _user_locks_lock:
+        lock = _user_locks.setdefault(user_id, threading.Lock())
+    acquired = lock.acquire(blocking=blocking)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lock.release()
+
+
+def _refresh(user_id, min_valid_seconds, blocking):
+    """
+    Returns:
+        tuple: (outcome, credentials) where outcome is 'refreshed', 'valid', 'invalid',
+               'failed' or 'skipped' (locked elsewhere and blocking is False)
+    """
+    with _user_lock(user_id, blocking=blocking) as acquired:
+        if not acquired:
+            return 'skipped', None
+
+        with transaction.atomic():
+            creds_model = (
+                GoogleCalendarCredentials.objects.select_for_update(skip_locked=not blocking)
+                .filter(user_id=user_id)
+                .first()
+            )
+            if creds_model is None:
+                # Gone, or (when not blocking) being refreshed by another process
+                return 'skipped', None
+            if not creds_model.has_valid_credentials():
+                return 'invalid', None
+
+            # Another thread or process may have refreshed it while we waited for the lock
+            now = timezone.now()
+            if creds_model.token_expiry and creds_model.token_expiry - now > timedelta(seconds=min_valid_seconds):
+                return 'valid', creds_model
+
+            creds = build_credentials(creds_model)
+            try:
+                creds.refresh(Request())
+            except RefreshError as e:
+                if not _is_invalid_grant(e):
+                    logger.warning(f"Google token refresh failed for user {user_id}: {str(e)}")
+                    return 'failed', None
+                logger.warning(f"Google refresh token of user {user_id} was rejected (invalid_grant); reconnection required")
+                creds_model.invalidated_at = now
+                creds_model.save(update_fields=['invalidated_at', 'updated_at'])
+                return 'invalid', None
+            except Exception as e:
+                logger.warning(f"Google token refresh failed for user {user_id}: {str(e)}")
+                return 'failed', None
+
+            creds_model.access_token = creds.token
+            # google-auth reports the expiry as naive UTC
+            creds_model.token_expiry = (
+                creds.expiry.replace(tzinfo=dt_timezone.utc) if creds.expiry else now + timedelta(seconds=3600)
+            )
+            if creds.refresh_token and creds.refresh_token != creds_model.refresh_token:
+                # Google may rotate the refresh token
+                creds_model.refresh_token = creds.refresh_token
+            creds_model.save()
+            return 'refreshed', creds_model
+
+
+def refresh_access_token(user_id, min_valid_seconds=0):
+    """
+    Make sure a user's access token is valid for at least min_valid_seconds,
+    refreshing it if needed (waiting for a refresh already in progress).
+
+    Returns:
+        GoogleCalendarCredentials with a valid access token, or None if the
+        credentials are missing, invalid or could not be refreshed
+    """
+    _, creds_model = _refresh(user_id, min_valid_seconds, blocking=True)
+    return creds_model
+
+
+def refresh_expiring_tokens(now=None, lead_seconds=None):
+    """
+    Refresh the access tokens of connected users that expire within lead_seconds.
+    Users whose refresh is already in progress elsewhere are skipped.
+
+    Args:
+        now (datetime, optional): Reference time, defaults to timezone.now()
+        lead_seconds (int, optional): Defaults to GOOGLE_TOKEN_REFRESH_LEAD_SECONDS
+
+    Returns:
+        dict: {'refreshed': int, 'invalid': int, 'failed': int, 'skipped': int}
+    """
+    now = now or timezone.now()
+    lead_seconds = settings.GOOGLE_TOKEN_REFRESH_LEAD_SECONDS if lead_seconds is None else lead_seconds
+    due = GoogleCalendarCredentials.objects.filter(
+        Q(token_expiry__lte=now + timedelta(seconds=lead_seconds)) | Q(token_expiry__isnull=True),
+        calendar_enabled=True,
+        invalidated_at__isnull=True,
+        refresh_token__isnull=False,
+    ).values_list('user_id', flat=True)
+
+    counts = {'refreshed': 0, 'invalid': 0, 'failed': 0, 'skipped': 0}
+    for user_id in list(due):
+        outcome, _ = _refresh(user_id, lead_seconds, blocking=False)
+        # 'valid': refreshed by someone else since the scan
+        counts[outcome if outcome in counts else 'skipped'] += 1
+
+    if counts['refreshed'] or counts['invalid'] or counts['failed']:
+        logger.info(f"Google token refresh: {counts}")
+    return counts
+
+
+def start_token_refresher(interval=None):
+    """
+    Start the in-process Google token refresher on a daemon thread.
+
+    Uses GOOGLE_TOKEN_REFRESH_INTERVAL_SECONDS when no interval is given. A value of 0
+    disables the in-process refresher (use the refresh_calendar_tokens command instead).
+
+    Returns:
+        threading.Event used to stop the refresher, or None if it was not started
+    """
+    if interval is None:
+        interval = getattr(settings, 'GOOGLE_TOKEN_REFRESH_INTERVAL_SECONDS', 0)
+    return start_periodic_thread('google-token-refresher', refresh_expiring_tokens, interval, 'Google token refresher')
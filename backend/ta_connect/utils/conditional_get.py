@@ -0,0 +1,63 @@
+"""
+Conditional GET helpers for polled list endpoints.
+
+A collection's version is fingerprinted with one aggregate query
+(row count + newest updated_at of the rows and their related rows, users
+included) and sent as an ETag. When the client repeats the request with a matching
+If-None-Match header, the view returns 304 without building the list.
+"""
+import hashlib
+import json
+from django.db.models import Count, Max
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def collection_etag(queryset, request, timestamp_fields=('updated_at',), extra_version=None):
+    """
+    Compute a strong ETag for the rows of `queryset` as seen by this request.
+
+    Args:
+        queryset: The unpaginated queryset backing the response
+        request: The current request (path, query string and user are part of the tag)
+        timestamp_fields: updated_at lookups whose maximum changes when a row changes
+        extra_version: Version of a row rendered next to the collection, e.g. the
+            updated_at of the instructor whose slots are listed
+
+    Returns:
+        str: Quoted ETag value
+    """
+    aggregates = {f'max_{i}': Max(field) for i, field in enumerate(timestamp_fields)}
+    aggregates['count'] = Count('pk')
+    version = queryset.order_by().aggregate(**aggregates)
+
+    raw = json.dumps(
+        [request.get_full_path(), request.user.pk, version, extra_version],
+        sort_keys=True,
+        default=str,
+    ).encode('utf-8')
+    return f'"{hashlib.sha1(raw).hexdigest()}"'
+
+
+def is_not_modified(request, etag):
+    """Return True if the request's If-None-Match header matches `etag`."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    # If-None-Match uses weak comparison, so ignore any W/ prefix
+    etags = [tag[2:] if tag.startswith('W/') else tag for tag in parse_etags(header)]
+    return '*' in etags or etag in etags
+
+
+def set_etag(response, etag):
+    """Attach the ETag and make clients revalidate before reusing a cached copy."""
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    response['Access-Control-Expose-Headers'] = 'ETag'
+    return response
+
+
+def not_modified_response(etag):
+    """Empty 304 response carrying the current ETag."""
+    return set_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
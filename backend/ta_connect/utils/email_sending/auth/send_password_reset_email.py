@@ -20,5 +20,6 @@ def send_password_reset_email(user):
         subject='Reset your TAConnect password',
         template_name='password_reset_email.html',
         context=context,
-        recipient_email=user.email
+        recipient_email=user.email,
+        priority=True
     )
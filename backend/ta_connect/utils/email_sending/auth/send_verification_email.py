@@ -20,6 +20,7 @@ def send_verification_email(user):
         subject='Activate your TAConnect account',
         template_name='activate_mail_send.html',
         context=context,
-        recipient_email=user.email
+        recipient_email=user.email,
+        priority=True
     )
 
@@ -0,0 +1,124 @@
+"""
+Batched rendering of mass emails.
+
+Mass booking emails render the same template for hundreds of recipients whose
+contexts only differ in a few fields (student name, date, time); the instructor,
+course, room and reason are the same for every booking of a slot. render_to_string
+per recipient looks the template up and builds a fresh context from the full
+dict each time.
+
+render_many() loads the template once, pushes the shared fragment onto a single
+Context and renders each recipient by pushing only their own fields on top.
+
+MassEmailBatch collects messages (grouped by template and shared fragment),
+renders them this way and sends them through the email rate limiter over the
+pooled connection. A group whose template fails to load is reported as failed
+for its recipients; the other groups are still sent.
+"""
+import logging
+from django.core.mail import EmailMultiAlternatives
+from django.template import Context
+from django.template.loader import get_template
+from .rate_limiter import send_or_queue
+
+logger = logging.getLogger(__name__)
+
+
+def render_many(template_name, contexts, shared_context=None):
+    """
+    Render a template once per recipient context, sharing the common fragment.
+
+    Args:
+        template_name: Template to render
+        contexts: List of per-recipient context dicts (their keys override shared ones)
+        shared_context: Context fragment identical for every recipient
+
+    Returns:
+        list: (True, html) or (False, error message) per context, in order; every
+              context fails with the same error if the template cannot be loaded
+    """
+    contexts = list(contexts)
+    try:
+        template = get_template(template_name)
+        # The backend template wraps the compiled django.template.base.Template
+        compiled = getattr(template, 'template', template)
+        context = Context(shared_context or {}, autoescape=compiled.engine.autoescape)
+    except Exception as e:
+        return [(False, str(e))] * len(contexts)
+
+    results = []
+    for recipient_context in contexts:
+        try:
+            with context.push(recipient_context):
+                results.append((True, compiled.render(context)))
+        except Exception as e:
+            results.append((False, str(e)))
+    return results
+
+
+class MassEmailBatch:
+    """
+    Collects HTML emails and sends them with one render pass per (template, shared fragment).
+
+    Usage:
+        batch = MassEmailBatch()
+        shared = {...}  # e.g. one dict per slot, reused for all its bookings
+        batch.add(subject, template_name, recipient_email, {...}, shared_context=shared)
+        result = batch.send()
+    """
+
+    def __init__(self, sender_email='taconnect.team@gmail.com'):
+        self.sender_email = sender_email
+        self._groups = {}
+
+    def add(self, subject, template_name, recipient_email, context, shared_context=None):
+        # The same shared dict object marks recipients that can be rendered together
+        key = (template_name, id(shared_context))
+        group = self._groups.setdefault(key, {'template_name': template_name, 'shared_context': shared_context, 'items': []})
+        group['items'].append((subject, recipient_email, context))
+
+    def __len__(self):
+        return sum(len(group['items']) for group in self._groups.values())
+
+    def render(self):
+        """
+        Returns:
+            tuple: (list of EmailMultiAlternatives, list of {'recipient', 'error'} failures)
+        """
+        messages, failed = [], []
+        for group in self._groups.values():
+            items = group['items']
+            rendered = render_many(group['template_name'], [context for _, _, context in items], group['shared_context'])
+            for (subject, recipient_email, context), (ok, output) in zip(items, rendered):
+                if not ok:
+                    logger.error(f"Failed to prepare email for {recipient_email}: {output}")
+                    failed.append({'recipient': recipient_email, 'error': output})
+                    continue
+                message = EmailMultiAlternatives(subject, '', self.sender_email, [recipient_email])
+                message.attach_alternative(output, 'text/html')
+                messages.append(message)
+        return messages, failed
+
+    def send(self):
+        """
+        Render and send every collected email over one pooled connection.
+        Emails over the rate limit are queued and sent later.
+
+        Returns:
+            dict: {'success': bool, 'sent_count': int, 'queued_count': int, 'failed': list}
+        """
+        if not len(self):
+            return {'success': True, 'sent_count': 0, 'queued_count': 0, 'failed': []}
+
+        messages, failed = self.render()
+        sent_count = queued_count = 0
+        if messages:
+            try:
+                result = send_or_queue(messages)
+                sent_count, queued_count = result['sent'], result['queued']
+                logger.info(f"Bulk email: {sent_count} emails sent successfully, {queued_count} queued")
+            except Exception as e:
+                logger.error(f"Failed to send bulk emails: {str(e)}")
+                return {'success': False, 'sent_count': 0, 'queued_count': 0, 'failed': failed}
+
+        return {'success': sent_count + queued_count > 0, 'sent_count': sent_count, 'queued_count': queued_count, 'failed': failed}
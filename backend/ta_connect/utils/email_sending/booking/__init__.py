@@ -2,10 +2,14 @@ from .send_booking_confirmation import send_booking_confirmation_email
 from .send_booking_cancellation import send_booking_cancelled_email
 from .send_booking_update import send_booking_update_email
 from .send_booking_pending_email import send_booking_pending_email
+from .send_booking_digest_email import send_booking_digest_email
+from .send_booking_reminder_email import send_booking_reminder_email
 
 __all__ = [
     'send_booking_confirmation_email',
     'send_booking_cancelled_email',
     'send_booking_update_email',
     'send_booking_pending_email',
+    'send_booking_digest_email',
+    'send_booking_reminder_email',
 ]
@@ -3,7 +3,7 @@ from ..send_email import send_email
 from utils.datetime_formatter import format_datetime_for_display
 
 
-def send_booking_cancelled_email(student, instructor, slot, booking_date, booking_time):
+def send_booking_cancelled_email(student, instructor, slot, booking_date, booking_time, notify_student=True, notify_instructor=True):
     """
     Send booking cancellation notification emails to both student and instructor.
     
@@ -13,6 +13,8 @@ def send_booking_cancelled_email(student, instructor, slot, booking_date, bookin
         slot: OfficeHourSlot object
         booking_date: Date object or string (YYYY-MM-DD)
         booking_time: DateTimeField (timezone-aware UTC) or Time object or string (HH:MM)
+        notify_student: False to leave the student out (e.g. they receive a digest)
+        notify_instructor: False to leave the instructor out (e.g. they receive a digest)
     
     Returns:
         dict: {'success': bool, 'student_sent': bool, 'instructor_sent': bool, 'errors': []}
@@ -28,6 +30,12 @@ def send_booking_cancelled_email(student, instructor, slot, booking_date, bookin
     if instructor.instructor_profile.email_notifications_on_cancellation is False:
         instructor_sent = True
 
+    # Recipients in digest mode get this booking in their digest instead
+    if not notify_student:
+        student_sent = True
+    if not notify_instructor:
+        instructor_sent = True
+
     # Format date and time - handle both DateTimeField and separate date/time
     if hasattr(booking_time, 'isoformat'):  # DateTimeField
         formatted_date, formatted_time = format_datetime_for_display(booking_time)
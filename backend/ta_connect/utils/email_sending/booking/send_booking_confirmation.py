@@ -2,7 +2,7 @@ from ta_connect.settings import frontend_url
 from ..send_email import send_email
 from utils.datetime_formatter import format_datetime_for_display
 
-def send_booking_confirmation_email(student, instructor, slot, booking_date, booking_time):
+def send_booking_confirmation_email(student, instructor, slot, booking_date, booking_time, notify_student=True, notify_instructor=True):
     """
     Send booking confirmation emails to both student and instructor.
     This function is sent when instructor confirms the booking.
@@ -13,6 +13,8 @@ def send_booking_confirmation_email(student, instructor, slot, booking_date, boo
         slot: OfficeHourSlot object
         booking_date: Date object or string (YYYY-MM-DD)
         booking_time: DateTimeField (timezone-aware UTC) or Time object or string (HH:MM)
+        notify_student: False to leave the student out (e.g. they receive a digest)
+        notify_instructor: False to leave the instructor out (e.g. they receive a digest)
     
     Returns:
         dict: {'success': bool, 'student_sent': bool, 'instructor_sent': bool, 'errors': []}
@@ -29,6 +31,12 @@ def send_booking_confirmation_email(student, instructor, slot, booking_date, boo
     if instructor.instructor_profile.email_notifications_on_booking is False:
         instructor_sent = True
 
+    # Recipients in digest mode get this booking in their digest instead
+    if not notify_student:
+        student_sent = True
+    if not notify_instructor:
+        instructor_sent = True
+
     # Format date and time - handle both DateTimeField and separate date/time
     if hasattr(booking_time, 'isoformat'):  # DateTimeField
         formatted_date, formatted_time = format_datetime_for_display(booking_time)
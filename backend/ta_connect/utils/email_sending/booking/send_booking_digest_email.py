@@ -0,0 +1,79 @@
+from ta_connect.settings import frontend_url
+from ..send_email import send_email
+
+# (subject, title, intro) per event type and recipient role; {count} is the number of bookings
+DIGEST_EMAIL_COPY = {
+    ('pending', 'instructor'): (
+        'New Booking Requests - Action Required - TA Connect',
+        'New Booking Requests',
+        '{count} booking request(s) are waiting for your approval.',
+    ),
+    ('pending', 'student'): (
+        'Bookings Pending Approval - TA Connect',
+        'Bookings Pending Approval',
+        '{count} of your booking(s) are waiting for instructor approval.',
+    ),
+    ('confirmed', 'instructor'): (
+        'Bookings Confirmed - TA Connect',
+        'Bookings Confirmed',
+        '{count} booking(s) with you have been confirmed.',
+    ),
+    ('confirmed', 'student'): (
+        'Bookings Confirmed - TA Connect',
+        'Bookings Confirmed',
+        '{count} of your booking(s) have been confirmed.',
+    ),
+    ('cancelled', 'instructor'): (
+        'Bookings Cancelled - TA Connect',
+        'Bookings Cancelled',
+        '{count} booking(s) with you have been cancelled.',
+    ),
+    ('cancelled', 'student'): (
+        'Bookings Cancelled - TA Connect',
+        'Bookings Cancelled',
+        '{count} of your booking(s) have been cancelled.',
+    ),
+}
+
+
+def send_booking_digest_email(recipient, event_type, items):
+    """
+    Send one email listing several booking notifications of the same type.
+    Used for recipients who opted into notification digests.
+
+    Args:
+        recipient: User object (student or instructor)
+        event_type: 'pending', 'confirmed' or 'cancelled'
+        items: List of booking summaries (student_name, instructor_name, course_name,
+               booking_date, booking_time, room)
+
+    Returns:
+        dict: {'success': bool, 'errors': []}
+    """
+    role = 'instructor' if recipient.is_instructor() else 'student'
+    subject, title, intro = DIGEST_EMAIL_COPY[(event_type, role)]
+
+    if role == 'instructor':
+        action_url, action_label = f"{frontend_url}/ta/manage-bookings", '📋 Manage Bookings'
+    else:
+        action_url, action_label = f"{frontend_url}/student/manage-booked", '📋 View My Bookings'
+
+    email_context = {
+        'recipient_name': f"{recipient.first_name} {recipient.last_name}" if recipient.first_name else recipient.username,
+        'is_instructor': role == 'instructor',
+        'digest_title': title,
+        'digest_intro': intro.format(count=len(items)),
+        'items': items,
+        'action_url': action_url,
+        'action_label': action_label,
+        'frontend_url': frontend_url,
+    }
+
+    if send_email(
+        subject=subject,
+        template_name='booking_digest_email.html',
+        context=email_context,
+        recipient_email=recipient.email
+    ):
+        return {'success': True, 'errors': []}
+    return {'success': False, 'errors': [f"Failed to send {event_type} digest email to {recipient.email}"]}
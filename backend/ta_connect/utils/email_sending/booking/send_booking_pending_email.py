@@ -5,7 +5,7 @@ from ..send_email import send_email
 from utils.datetime_formatter import format_datetime_for_display
 
 
-def send_booking_pending_email(student, instructor, slot, booking_date, booking_time, booking_id):
+def send_booking_pending_email(student, instructor, slot, booking_date, booking_time, booking_id, notify_student=True, notify_instructor=True):
     """
     Send pending booking notification emails to both student and instructor.
     This function is sent when a student creates a booking that requires instructor approval.
@@ -17,6 +17,8 @@ def send_booking_pending_email(student, instructor, slot, booking_date, booking_
         booking_date: Date object or string (YYYY-MM-DD)
         booking_time: DateTimeField (timezone-aware UTC) or Time object or string (HH:MM)
         booking_id: The ID of the pending booking
+        notify_student: False to leave the student out (e.g. they receive a digest)
+        notify_instructor: False to leave the instructor out (e.g. they receive a digest)
     
     Returns:
         dict: {'success': bool, 'student_sent': bool, 'instructor_sent': bool, 'errors': []}
@@ -33,6 +35,12 @@ def send_booking_pending_email(student, instructor, slot, booking_date, booking_
     # if instructor.instructor_profile.email_notifications_on_booking is False:
     #     instructor_sent = True
 
+    # Recipients in digest mode get this booking in their digest instead
+    if not notify_student:
+        student_sent = True
+    if not notify_instructor:
+        instructor_sent = True
+
     # Format date and time - handle both DateTimeField and separate date/time
     if hasattr(booking_time, 'isoformat'):  # DateTimeField
         formatted_date, formatted_time = format_datetime_for_display(booking_time)
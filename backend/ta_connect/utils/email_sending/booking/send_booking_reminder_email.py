@@ -0,0 +1,45 @@
+from ta_connect.settings import frontend_url
+from ..send_email import send_email
+from utils.datetime_formatter import format_datetime_for_display
+
+
+def send_booking_reminder_email(student, instructor, slot, booking_time, starts_in_minutes):
+    """
+    Send a reminder email to the student shortly before a confirmed booking starts.
+
+    Args:
+        student: User object (student)
+        instructor: User object (instructor/TA)
+        slot: OfficeHourSlot object
+        booking_time: DateTimeField (timezone-aware UTC)
+        starts_in_minutes: Minutes until the session starts
+
+    Returns:
+        dict: {'success': bool, 'student_sent': bool, 'errors': []}
+    """
+    # Reminders follow the booking email preference
+    if student.student_profile.email_notifications_on_booking is False:
+        return {'success': True, 'student_sent': True, 'errors': []}
+
+    formatted_date, formatted_time = format_datetime_for_display(booking_time)
+
+    email_context = {
+        'student_name': f"{student.first_name} {student.last_name}" if student.first_name else student.username,
+        'instructor_name': f"{instructor.first_name} {instructor.last_name}" if instructor.first_name else instructor.username,
+        'course_name': slot.course_name if slot.course_name else 'N/A',
+        'booking_date': formatted_date,
+        'booking_time': formatted_time,
+        'duration': slot.duration_minutes,
+        'room': slot.room if hasattr(slot, 'room') and slot.room else None,
+        'starts_in_minutes': starts_in_minutes,
+        'frontend_url': frontend_url,
+    }
+
+    if send_email(
+        subject='Reminder: Office Hours Starting Soon - TA Connect',
+        template_name='booking_reminder_email_Student.html',
+        context=email_context,
+        recipient_email=student.email
+    ):
+        return {'success': True, 'student_sent': True, 'errors': []}
+    return {'success': False, 'student_sent': False, 'errors': [f"Failed to send booking reminder email to student: {student.email}"]}
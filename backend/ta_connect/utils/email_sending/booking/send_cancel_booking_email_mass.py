@@ -1,4 +1,6 @@
 from ta_connect.settings import frontend_url
+from utils.datetime_formatter import format_datetime_for_display
+from student.utils.booking_recipients import resolve_booking_recipients
 from ..send_email_bulk import send_email_bulk
 import logging
 
@@ -17,7 +19,7 @@ def send_cancel_booking_email_mass(bookings, cancellation_reason=None):
     Send cancellation emails in bulk for multiple bookings with improved messaging
     
     Args:
-        bookings: QuerySet or list of Booking objects
+        bookings: QuerySet, or list of Booking objects or booking IDs
         cancellation_reason: String explaining why the booking was cancelled. 
                            Can be a custom message or one of: 'slot_disabled', 'slot_deleted', 'manual', 'schedule_conflict'
                            If None, defaults to 'manual'
@@ -34,15 +36,20 @@ def send_cancel_booking_email_mass(bookings, cancellation_reason=None):
         reason = cancellation_reason
     
     email_data_list = []
+    # Context fragments shared by every booking of a slot, built once per slot
+    shared_contexts = {}
+    
+    # Students, profiles, slots and instructors of every booking in one query
+    recipients = resolve_booking_recipients(bookings)
     
     # Single loop to prepare all email data for both students and instructors
-    for booking in bookings:
-        student = booking.student
-        instructor = booking.office_hour.instructor
-        slot = booking.office_hour
+    for recipient in recipients:
+        student = recipient.student
+        instructor = recipient.instructor
+        slot = recipient.slot
         
         # Check email preferences
-        student_wants_email = student.student_profile.email_notifications_on_cancellation
+        student_wants_email = recipient.student_email_on_cancellation
         
         # Currently disabled for instructors because this function is only used when instructors cancel office hours
         instructor_wants_email = False
@@ -51,23 +58,27 @@ def send_cancel_booking_email_mass(bookings, cancellation_reason=None):
         if not student_wants_email and not instructor_wants_email:
             continue
         
-        # Format date and time once - booking.start_time is a DateTimeField (UTC)
-        from utils.datetime_formatter import format_datetime_for_display
-        formatted_date, formatted_time = format_datetime_for_display(booking.start_time)
+        shared_context = shared_contexts.get(slot.id)
+        if shared_context is None:
+            shared_context = shared_contexts[slot.id] = {
+                'instructor_name': f"{instructor.first_name} {instructor.last_name}" if instructor.first_name else instructor.username,
+                'instructor_email': instructor.email,
+                'course_name': slot.course_name if slot.course_name else 'N/A',
+                'duration': slot.duration_minutes,
+                'room': slot.room if hasattr(slot, 'room') and slot.room else None,
+                'frontend_url': frontend_url,
+                'cancellation_reason': reason,
+            }
+        
+        # Format date and time once - start_time is a DateTimeField (UTC)
+        formatted_date, formatted_time = format_datetime_for_display(recipient.start_time)
         
-        # Prepare shared email context
+        # Only the per-booking fields; the slot fragment is shared
         email_context = {
             'student_name': f"{student.first_name} {student.last_name}" if student.first_name else student.username,
             'student_email': student.email,
-            'instructor_name': f"{instructor.first_name} {instructor.last_name}" if instructor.first_name else instructor.username,
-            'instructor_email': instructor.email,
-            'course_name': slot.course_name if slot.course_name else 'N/A',
             'booking_date': formatted_date,
             'booking_time': formatted_time,
-            'duration': slot.duration_minutes,
-            'room': slot.room if hasattr(slot, 'room') and slot.room else None,
-            'frontend_url': frontend_url,
-            'cancellation_reason': reason,
         }
         
         # Add student email if they want notifications
@@ -76,6 +87,7 @@ def send_cancel_booking_email_mass(bookings, cancellation_reason=None):
                 'subject': 'Office Hours Session Cancelled - TA Connect',
                 'template_name': 'booking_bulk_cancellation_email_Student.html',
                 'context': email_context,
+                'shared_context': shared_context,
                 'recipient_email': student.email
             })
         
@@ -85,6 +97,7 @@ def send_cancel_booking_email_mass(bookings, cancellation_reason=None):
                 'subject': 'Booking Cancellation Confirmation - TA Connect',
                 'template_name': 'booking_cancellation_email_TA.html',
                 'context': email_context,
+                'shared_context': shared_context,
                 'recipient_email': instructor.email
             })
     
@@ -100,7 +113,7 @@ def send_cancel_booking_email_mass(bookings, cancellation_reason=None):
     result = send_email_bulk(email_data_list)
     
     if result['success']:
-        logger.info(f"Sent {result['sent_count']} cancellation emails for {len(bookings)} bookings (Reason: {cancellation_reason or 'manual'})")
+        logger.info(f"Sent {result['sent_count']} cancellation emails for {len(recipients)} bookings (Reason: {cancellation_reason or 'manual'})")
     else:
         logger.warning(f"Bulk cancellation emails completed with {len(result['failed'])} failures")
     
@@ -1,4 +1,6 @@
 from ta_connect.settings import frontend_url
+from utils.datetime_formatter import format_datetime_for_display
+from student.utils.booking_recipients import resolve_booking_recipients
 from ..send_email_bulk import send_email_bulk
 import logging
 
@@ -14,7 +16,7 @@ def send_update_booking_email_mass(bookings, update_reason='room_update'):
     Send update emails in bulk for multiple bookings with improved messaging
     
     Args:
-        bookings: QuerySet or list of Booking objects
+        bookings: QuerySet, or list of Booking objects or booking IDs
         update_reason: String explaining why the booking was updated. 
                       Can be a custom message or one of: 'room_update'
                       If None, defaults to 'room_update'
@@ -31,15 +33,20 @@ def send_update_booking_email_mass(bookings, update_reason='room_update'):
         reason = update_reason
     
     email_data_list = []
+    # Context fragments shared by every booking of a slot, built once per slot
+    shared_contexts = {}
+    
+    # Students, profiles, slots and instructors of every booking in one query
+    recipients = resolve_booking_recipients(bookings)
     
     # Single loop to prepare all email data for both students and instructors
-    for booking in bookings:
-        student = booking.student
-        instructor = booking.office_hour.instructor
-        slot = booking.office_hour
+    for recipient in recipients:
+        student = recipient.student
+        instructor = recipient.instructor
+        slot = recipient.slot
         
         # Check email preferences
-        student_wants_email = student.student_profile.email_notifications_on_update
+        student_wants_email = recipient.student_email_on_update
         
         # Currently disabled for instructors because this function is only used when instructors update office hours
         instructor_wants_email = False
@@ -48,23 +55,27 @@ def send_update_booking_email_mass(bookings, update_reason='room_update'):
         if not student_wants_email and not instructor_wants_email:
             continue
         
-        # Format date and time once - booking.start_time is a DateTimeField (UTC)
-        from utils.datetime_formatter import format_datetime_for_display
-        formatted_date, formatted_time = format_datetime_for_display(booking.start_time)
+        shared_context = shared_contexts.get(slot.id)
+        if shared_context is None:
+            shared_context = shared_contexts[slot.id] = {
+                'instructor_name': f"{instructor.first_name} {instructor.last_name}" if instructor.first_name else instructor.username,
+                'instructor_email': instructor.email,
+                'course_name': slot.course_name if slot.course_name else 'N/A',
+                'duration': slot.duration_minutes,
+                'room': slot.room if hasattr(slot, 'room') and slot.room else None,
+                'frontend_url': frontend_url,
+                'update_reason': reason,
+            }
+        
+        # Format date and time once - start_time is a DateTimeField (UTC)
+        formatted_date, formatted_time = format_datetime_for_display(recipient.start_time)
         
-        # Prepare shared email context
+        # Only the per-booking fields; the slot fragment is shared
         email_context = {
             'student_name': f"{student.first_name} {student.last_name}" if student.first_name else student.username,
             'student_email': student.email,
-            'instructor_name': f"{instructor.first_name} {instructor.last_name}" if instructor.first_name else instructor.username,
-            'instructor_email': instructor.email,
-            'course_name': slot.course_name if slot.course_name else 'N/A',
             'booking_date': formatted_date,
             'booking_time': formatted_time,
-            'duration': slot.duration_minutes,
-            'room': slot.room if hasattr(slot, 'room') and slot.room else None,
-            'frontend_url': frontend_url,
-            'update_reason': reason,
         }
         
         # Add student email if they want notifications
@@ -73,6 +84,7 @@ def send_update_booking_email_mass(bookings, update_reason='room_update'):
                 'subject': 'Office Hours Session Updated - TA Connect',
                 'template_name': 'booking_room_update_email_Student.html',
                 'context': email_context,
+                'shared_context': shared_context,
                 'recipient_email': student.email
             })
         
@@ -82,6 +94,7 @@ def send_update_booking_email_mass(bookings, update_reason='room_update'):
                 'subject': 'Booking Update Confirmation - TA Connect',
                 'template_name': 'booking_update_email_TA.html',
                 'context': email_context,
+                'shared_context': shared_context,
                 'recipient_email': instructor.email
             })
     
@@ -97,7 +110,7 @@ def send_update_booking_email_mass(bookings, update_reason='room_update'):
     result = send_email_bulk(email_data_list)
     
     if result['success']:
-        logger.info(f"Sent {result['sent_count']} update emails for {len(bookings)} bookings (Reason: {update_reason or 'room_update'})")
+        logger.info(f"Sent {result['sent_count']} update emails for {len(recipients)} bookings (Reason: {update_reason or 'room_update'})")
     else:
         logger.warning(f"Bulk update emails completed with {len(result['failed'])} failures")
     
@@ -0,0 +1,147 @@
+"""
+Process-wide pool of open email backend connections.
+
+send_mail() opens a connection per call, which for SMTP means a TCP connect,
+STARTTLS handshake and login to smtp.gmail.com for every email, and each booking
+action sends two. The pool keeps up to SMTP_POOL_SIZE authenticated connections
+open and hands them to send_email and send_email_bulk in turn:
+
+- connections idle for longer than SMTP_IDLE_TIMEOUT_SECONDS are closed instead
+  of reused (the server drops idle sessions anyway),
+- connections idle for longer than SMTP_HEALTH_CHECK_SECONDS are checked with
+  NOOP before reuse,
+- a send that fails on a dropped connection is retried once on a newly opened
+  connection (not another idle one, which may have been dropped as well).
+
+Each connection is used by one thread at a time.
+"""
+import atexit
+import logging
+import smtplib
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning the connection itself is unusable, as opposed to a rejected message
+CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    ConnectionError,
+    TimeoutError,
+    ssl.SSLError,
+)
+
+
+class _PooledConnection:
+    def __init__(self, backend):
+        self.backend = backend
+        self.backend_path = settings.EMAIL_BACKEND
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.backend.close()
+        except Exception:
+            # Closing a dead connection may raise; it is discarded either way
+            pass
+
+
+class EmailConnectionPool:
+    """A LIFO pool of open email backend connections (LIFO keeps the warmest ones in use)."""
+
+    def __init__(self):
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _is_healthy(self, pooled):
+        smtp = getattr(pooled.backend, 'connection', None)
+        if smtp is None:
+            # Non-SMTP backends (console, locmem) have no session to check
+            return True
+        try:
+            return smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _open(self):
+        backend = get_connection(fail_silently=False)
+        backend.open()
+        return _PooledConnection(backend)
+
+    def acquire(self):
+        """Return a healthy open connection, reusing an idle one when possible."""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                pooled = self._idle.pop() if self._idle else None
+            if pooled is None:
+                return self._open()
+
+            idle_for = now - pooled.last_used
+            if pooled.backend_path != settings.EMAIL_BACKEND or idle_for > settings.SMTP_IDLE_TIMEOUT_SECONDS:
+                pooled.close()
+                continue
+            if idle_for > settings.SMTP_HEALTH_CHECK_SECONDS and not self._is_healthy(pooled):
+                pooled.close()
+                continue
+            return pooled
+
+    def release(self, pooled, broken=False):
+        """Return a connection to the pool, or close it if it is broken or the pool is full."""
+        pooled.last_used = time.monotonic()
+        if not broken:
+            with self._lock:
+                if len(self._idle) < settings.SMTP_POOL_SIZE:
+                    self._idle.append(pooled)
+                    return
+        pooled.close()
+
+    @contextmanager
+    def connection(self, fresh=False):
+        """Borrow a connection for the duration of the block; fresh=True opens a new one."""
+        pooled = self._open() if fresh else self.acquire()
+        broken = False
+        try:
+            yield pooled.backend
+        except CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    def send_messages(self, messages):
+        """
+        Send EmailMessage objects over a pooled connection.
+        A dropped connection is replaced and the send retried once.
+
+        Returns:
+            int: Number of messages sent
+        """
+        try:
+            with self.connection() as backend:
+                return backend.send_messages(messages) or 0
+        except CONNECTION_ERRORS as e:
+            logger.warning(f"Email connection failed ({e}); retrying on a new connection")
+            with self.connection(fresh=True) as backend:
+                return backend.send_messages(messages) or 0
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            pooled.close()
+
+
+email_connection_pool = EmailConnectionPool()
+atexit.register(email_connection_pool.close_all)
+
+
+def send_messages(messages):
+    """Send EmailMessage objects through the shared connection pool."""
+    return email_connection_pool.send_messages(messages)
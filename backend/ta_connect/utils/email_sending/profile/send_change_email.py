@@ -38,5 +38,6 @@ def send_change_email(user, email):
         subject='Verify your new email address',
         template_name='activate_mail_change_send.html',
         context=context,
-        recipient_email=email
+        recipient_email=email,
+        priority=True
     )
@@ -0,0 +1,185 @@
+"""
+Quota-aware rate limiting for outgoing email.
+
+All mail goes out through one Gmail account, which rejects sends beyond its
+per-minute and per-day limits. send_email and send_email_bulk pass their
+messages through send_or_queue(), which takes one token per message from token
+buckets shared by every worker process (EmailRateBucket rows):
+
+- EMAIL_RATE_PER_MINUTE tokens, refilled continuously over a minute,
+- EMAIL_RATE_PER_DAY tokens, refilled continuously over a day.
+
+A limit of 0 disables its bucket. Messages that get no token are not dropped:
+they are queued on the outbox under EMAIL_QUEUED and sent by the outbox worker
+once the buckets have refilled. While messages are queued, new ones join the
+queue behind them so the queue is not starved.
+
+Transactional mail a user is waiting for (verification codes, password resets,
+email-change confirmations) is sent with priority: it never waits behind the
+queue and is sent at once, still drawing its tokens so the buckets can go into
+debt and bulk mail waits that much longer.
+
+get_email_rate_metrics() reports the remaining budget and the queue depth
+(also printed by the email_rate_status command).
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import EmailRateBucket
+from student.models import OutboxMessage
+from student.utils.outbox import DeferMessage, enqueue_many, outbox_handler
+from .connection_pool import send_messages
+
+logger = logging.getLogger(__name__)
+
+EMAIL_QUEUED = 'email.queued'
+
+
+def _bucket_limits():
+    """(name, capacity, tokens refilled per second) of each enabled bucket."""
+    limits = []
+    if settings.EMAIL_RATE_PER_MINUTE > 0:
+        limits.append(('minute', settings.EMAIL_RATE_PER_MINUTE, settings.EMAIL_RATE_PER_MINUTE / 60))
+    if settings.EMAIL_RATE_PER_DAY > 0:
+        limits.append(('day', settings.EMAIL_RATE_PER_DAY, settings.EMAIL_RATE_PER_DAY / 86400))
+    return limits
+
+
+def _refilled(bucket, capacity, rate, now):
+    elapsed = max((now - bucket.updated_at).total_seconds(), 0)
+    return min(capacity, bucket.tokens + elapsed * rate)
+
+
+def acquire(count, force=False):
+    """
+    Take up to `count` tokens from every bucket at once.
+
+    Args:
+        count: Tokens wanted
+        force: Take all `count` tokens even if the buckets go below zero (priority mail)
+
+    Returns:
+        int: Number of messages that may be sent now (0 to count)
+    """
+    limits = _bucket_limits()
+    if not limits or count <= 0:
+        return count
+
+    now = timezone.now()
+    for name, capacity, rate in limits:
+        # A new bucket starts full
+        EmailRateBucket.objects.get_or_create(name=name, defaults={'tokens': capacity, 'updated_at': now})
+
+    with transaction.atomic():
+        buckets = {
+            bucket.name: bucket
+            for bucket in EmailRateBucket.objects.select_for_update().filter(name__in=[name for name, _, _ in limits])
+        }
+        now = timezone.now()
+        tokens = {name: _refilled(buckets[name], capacity, rate, now) for name, capacity, rate in limits}
+        granted = count if force else max(min(count, int(min(tokens.values()))), 0)
+        for name, bucket in buckets.items():
+            bucket.tokens = tokens[name] - granted
+            bucket.updated_at = now
+            bucket.save(update_fields=['tokens', 'updated_at'])
+    return granted
+
+
+def seconds_until_available():
+    """Seconds until every bucket holds at least one token again."""
+    now = timezone.now()
+    buckets = {bucket.name: bucket for bucket in EmailRateBucket.objects.all()}
+    wait = 0
+    for name, capacity, rate in _bucket_limits():
+        bucket = buckets.get(name)
+        if bucket is not None:
+            missing = 1 - _refilled(bucket, capacity, rate, now)
+            wait = max(wait, missing / rate)
+    return wait
+
+
+def _queued():
+    return OutboxMessage.objects.filter(topic=EMAIL_QUEUED, status__in=['pending', 'processing'])
+
+
+def _serialize(message):
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': list(message.to),
+        'alternatives': [[content, mimetype] for content, mimetype in getattr(message, 'alternatives', [])],
+    }
+
+
+def _deserialize(payload):
+    message = EmailMultiAlternatives(payload['subject'], payload['body'], payload['from_email'], payload['to'])
+    for content, mimetype in payload['alternatives']:
+        message.attach_alternative(content, mimetype)
+    return message
+
+
+def queue_messages(messages):
+    """Queue messages on the outbox to be sent once the rate limit allows."""
+    available_at = timezone.now() + timedelta(seconds=seconds_until_available())
+    enqueue_many([(EMAIL_QUEUED, _serialize(message)) for message in messages], available_at=available_at)
+    logger.warning(f"Email rate limit reached: {len(messages)} emails queued until {available_at}")
+
+
+def send_or_queue(messages, priority=False):
+    """
+    Send the messages the rate limit allows now and queue the rest.
+
+    Args:
+        messages: EmailMessage objects
+        priority: Send all of them now, ahead of queued mail (transactional mail)
+
+    Returns:
+        dict: {'sent': int, 'queued': int}
+    """
+    messages = list(messages)
+    if not messages:
+        return {'sent': 0, 'queued': 0}
+
+    if priority:
+        granted = acquire(len(messages), force=True)
+    elif _bucket_limits() and _queued().exists():
+        # Queue behind messages already waiting instead of taking the tokens they wait for
+        granted = 0
+    else:
+        granted = acquire(len(messages))
+    sent = send_messages(messages[:granted]) if granted else 0
+    if granted < len(messages):
+        queue_messages(messages[granted:])
+    return {'sent': sent, 'queued': len(messages) - granted}
+
+
+@outbox_handler(EMAIL_QUEUED)
+def deliver_queued_email(payload):
+    if not acquire(1):
+        raise DeferMessage(max(seconds_until_available(), 1))
+    send_messages([_deserialize(payload)])
+
+
+def get_email_rate_metrics():
+    """
+    Current email budget and queue.
+
+    Returns:
+        dict: {'buckets': {name: {'tokens': float, 'capacity': int}},
+               'queue_depth': int, 'oldest_queued_at': datetime or None}
+    """
+    now = timezone.now()
+    stored = {bucket.name: bucket for bucket in EmailRateBucket.objects.all()}
+    buckets = {}
+    for name, capacity, rate in _bucket_limits():
+        bucket = stored.get(name)
+        tokens = _refilled(bucket, capacity, rate, now) if bucket else capacity
+        buckets[name] = {'tokens': round(tokens, 2), 'capacity': capacity}
+
+    queued = _queued()
+    oldest = queued.order_by('created_at').values_list('created_at', flat=True).first()
+    return {'buckets': buckets, 'queue_depth': queued.count(), 'oldest_queued_at': oldest}
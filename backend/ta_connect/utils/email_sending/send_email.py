@@ -1,10 +1,11 @@
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
+from .rate_limiter import send_or_queue
 import logging
 
 logger = logging.getLogger(__name__)
 
-def send_email(subject, template_name, context, recipient_email, sender_email='taconnect.team@gmail.com'):
+def send_email(subject, template_name, context, recipient_email, sender_email='taconnect.team@gmail.com', priority=False):
     """
     Generic helper function to send emails
     
@@ -14,17 +15,20 @@ def send_email(subject, template_name, context, recipient_email, sender_email='t
         context: Context dictionary for template rendering
         recipient_email: Recipient's email address
         sender_email: Sender's email address (defaults to taconnect.team@gmail.com)
+        priority: True for transactional mail the user is waiting for (codes, resets);
+            it is sent at once instead of waiting behind rate-limited bulk mail
+
+    Returns:
+        bool: True if the email was sent, or queued because the rate limit was reached
     """
     try:
         message = render_to_string(template_name, context)
-        send_mail(
-            subject, 
-            '', 
-            sender_email, 
-            [recipient_email], 
-            html_message=message,
-            fail_silently=False
-        )
+        email = EmailMultiAlternatives(subject, '', sender_email, [recipient_email])
+        email.attach_alternative(message, 'text/html')
+        # Sent over a pooled connection within the email rate limit, or queued when it is reached
+        if send_or_queue([email], priority=priority)['queued']:
+            logger.info(f"Email '{subject}' to {recipient_email} queued by the rate limiter")
+            return True
         logger.info(f"Email '{subject}' sent to {recipient_email}")
         print(f"Email '{subject}' sent to {recipient_email}")
         return True
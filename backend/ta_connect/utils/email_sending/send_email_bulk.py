@@ -1,6 +1,8 @@
 from django.core.mail import get_connection, EmailMultiAlternatives
-from django.template.loader import render_to_string
+from .rate_limiter import send_or_queue
+from .batch_renderer import MassEmailBatch
 import logging
+import smtplib
 
 logger = logging.getLogger(__name__)
 
@@ -15,23 +17,36 @@ def send_mass_html_mail(datatuple, fail_silently=False, user=None, password=None
     If auth_user and auth_password are set, they're used to log in.
     If auth_user is None, the EMAIL_HOST_USER setting is used.
     If auth_password is None, the EMAIL_HOST_PASSWORD setting is used.
+    With no connection or credentials given, the messages go through the email rate
+    limiter and the shared connection pool; messages over the limit are queued and
+    counted as sent. With fail_silently, a failed send returns 0 instead of raising.
     
     Source: https://stackoverflow.com/a/10215091/2142093
     Posted by semente, modified by community
     Retrieved 2025-11-29
     """
-    connection = connection or get_connection(
-        username=user, password=password, fail_silently=fail_silently)
     messages = []
     for subject, text, html, from_email, recipient in datatuple:
         message = EmailMultiAlternatives(subject, text, from_email, recipient)
         message.attach_alternative(html, 'text/html')
         messages.append(message)
+    if connection is None and user is None and password is None:
+        try:
+            result = send_or_queue(messages)
+        except (smtplib.SMTPException, OSError) as e:
+            # The same errors Django's SMTP backend swallows with fail_silently
+            if not fail_silently:
+                raise
+            logger.error(f"Failed to send mass HTML mail: {str(e)}")
+            return 0
+        return result['sent'] + result['queued']
+    connection = connection or get_connection(
+        username=user, password=password, fail_silently=fail_silently)
     return connection.send_messages(messages)
 
 def send_email_bulk(email_data_list, sender_email='taconnect.team@gmail.com'):
     """
-    Generic helper function to send bulk emails using send_mass_html_mail
+    Generic helper function to send bulk emails, rendered in batches (see batch_renderer.py)
     
     Args:
         email_data_list: List of dictionaries, each containing:
@@ -39,69 +54,37 @@ def send_email_bulk(email_data_list, sender_email='taconnect.team@gmail.com'):
             - template_name: Name of the HTML template to render
             - context: Context dictionary for template rendering
             - recipient_email: Recipient's email address
+            - shared_context: (optional) Context fragment shared with other emails; pass the
+              same dict object to every email it applies to so they render together
         sender_email: Sender's email address (defaults to taconnect.team@gmail.com)
     
     Returns:
-        dict: {'success': bool, 'sent_count': int, 'failed': list}
+        dict: {'success': bool, 'sent_count': int, 'queued_count': int, 'failed': list}
+        Emails over the rate limit are queued and sent later (queued_count).
     """
-    if not email_data_list:
-        return {
-            'success': True,
-            'sent_count': 0,
-            'failed': []
-        }
-    
     failed = []
-    datatuple = []
+    batch = MassEmailBatch(sender_email)
     
-    # Single loop to prepare all email data
     for email_data in email_data_list:
         try:
-            subject = email_data['subject']
-            template_name = email_data['template_name']
-            context = email_data['context']
-            recipient_email = email_data['recipient_email']
-            
-            html_content = render_to_string(template_name, context)
-            
-            # Add to datatuple: (subject, text_content, html_content, from_email, recipient_list)
-            datatuple.append((
-                subject,
-                '',  # Plain text content (empty for HTML-only emails)
-                html_content,
-                sender_email,
-                [recipient_email]
-            ))
-            
-        except Exception as e:
-            error_msg = f"Failed to prepare email for {email_data.get('recipient_email', 'unknown')}: {str(e)}"
+            batch.add(
+                email_data['subject'],
+                email_data['template_name'],
+                email_data['recipient_email'],
+                email_data['context'],
+                shared_context=email_data.get('shared_context'),
+            )
+        except KeyError as e:
+            error_msg = f"Failed to prepare email for {email_data.get('recipient_email', 'unknown')}: missing {str(e)}"
             logger.error(error_msg)
-            print(error_msg)
             failed.append({
                 'recipient': email_data.get('recipient_email', 'unknown'),
-                'error': str(e)
+                'error': error_msg
             })
     
-    sent_count = 0
-    if datatuple:
-        try:
-            # Send all emails in one connection - most efficient
-            sent_count = send_mass_html_mail(datatuple, fail_silently=False)
-            logger.info(f"Bulk email: {sent_count} emails sent successfully")
-            print(f"Bulk email: {sent_count} emails sent successfully")
-            
-        except Exception as e:
-            error_msg = f"Failed to send bulk emails: {str(e)}"
-            logger.error(error_msg)
-            print(error_msg)
-            return {
-                'success': False,
-                'sent_count': 0,
-                'failed': failed
-            }
-    
-    return {
-        'success': sent_count > 0,
-        'sent_count': sent_count,
-        'failed': failed
-    }
+    # Render once per template/shared fragment, then send over one pooled connection
+    result = batch.send()
+    result['failed'] = failed + result['failed']
+    if failed and not result['sent_count'] and not result['queued_count']:
+        result['success'] = False
+    return result
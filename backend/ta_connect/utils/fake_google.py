@@ -0,0 +1,405 @@
+"""
+Local fake of the Google Calendar v3 API and the Google OAuth2 token endpoint.
+
+The calendar integration (utils/google_calendar.py, utils/calendar_batch.py,
+utils/calendar_tokens.py, utils/calendar_sync.py and the connect flow in
+accounts/auth/google_calendar_management.py) cannot be load-tested against
+Google. FakeGoogleServer is a real HTTP server on 127.0.0.1, so requests go
+through the same googleapiclient/httplib2 and google-auth transports as in
+production. Point the app at it with the settings it returns:
+
+    with FakeGoogleServer(latency=0.05) as google, override_settings(**google.settings()):
+        access_token = google.issue_token('refresh-token')
+        ...  # store GoogleCalendarCredentials with these tokens, run the flow
+        google.events('refresh-token')
+
+Each account is identified by its refresh token and has one calendar
+('primary'). Supported:
+
+- POST /token: refresh_token and authorization_code grants; revoked refresh
+  tokens get invalid_grant,
+- GET /oauth2/v3/userinfo,
+- /calendar/v3/calendars/primary/events: list (pages, syncToken, showDeleted),
+  insert, get, update, patch and delete,
+- POST /batch/calendar/v3: multipart batches, each part authorized with its own
+  Authorization header,
+- latency: seconds added to every HTTP request (a batch is one request),
+- fail(): error injection for matching requests or batch parts.
+
+request_count counts HTTP round-trips; operations records every calendar call,
+batch parts included.
+"""
+import email
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+EVENTS_PATH = re.compile(r'^/calendar/v3/calendars/(?P<calendar>[^/]+)/events(?:/(?P<event>[^/]+))?$')
+BATCH_PATH = '/batch/calendar/v3'
+TOKEN_PATH = '/token'
+USERINFO_PATH = '/oauth2/v3/userinfo'
+STATUS_REASONS = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 401: 'Unauthorized',
+                  403: 'Forbidden', 404: 'Not Found', 410: 'Gone', 429: 'Too Many Requests',
+                  500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def _error(status, message):
+    return status, {'error': {'code': status, 'message': message, 'errors': [{'message': message}]}}
+
+
+def _merge(target, patch):
+    """events.patch semantics: nested objects are merged, other values replaced."""
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+
+
+class _FailureRule:
+    def __init__(self, status, method, path, times):
+        self.status = status
+        self.method = method
+        self.path = path
+        self.times = times
+
+    def matches(self, method, path):
+        if self.times is not None and self.times <= 0:
+            return False
+        return (self.method is None or self.method == method) and (self.path is None or self.path in path)
+
+
+class FakeGoogleServer:
+    """An in-process fake Google Calendar and OAuth2 server (see the module docstring)."""
+
+    def __init__(self, latency=0, token_lifetime=3600):
+        self.latency = latency
+        self.token_lifetime = token_lifetime
+        self.request_count = 0
+        self.operations = []
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._revoked = set()
+        self._emails = {}
+        self._calendars = {}
+        self._sequence = 0
+        self._min_sync_sequence = {}
+        self._failures = []
+        self._server = None
+        self._thread = None
+
+    # Server lifecycle
+
+    def start(self):
+        handler = type('FakeGoogleHandler', (_Handler,), {'google': self})
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-google', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/"
+
+    def settings(self):
+        """Settings pointing the calendar integration at this server."""
+        return {'GOOGLE_API_ROOT_URL': self.url, 'GOOGLE_OAUTH_TOKEN_URI': f"{self.url}token"}
+
+    # Test controls
+
+    def issue_token(self, refresh_token, email=None):
+        """Create an account (if needed) and return a valid access token for it."""
+        with self._lock:
+            self._calendars.setdefault(refresh_token, {})
+            if email:
+                self._emails[refresh_token] = email
+            access_token = f"fake-access-{uuid.uuid4().hex}"
+            self._tokens[access_token] = refresh_token
+            return access_token
+
+    def revoke(self, refresh_token):
+        """Reject the refresh token (invalid_grant) and its access tokens from now on."""
+        with self._lock:
+            self._revoked.add(refresh_token)
+            self._tokens = {token: account for token, account in self._tokens.items() if account != refresh_token}
+
+    def expire_sync_tokens(self, refresh_token):
+        """Make sync tokens issued so far answer 410 Gone, forcing a full listing."""
+        with self._lock:
+            self._min_sync_sequence[refresh_token] = self._sequence + 1
+
+    def fail(self, status=500, method=None, path=None, times=1):
+        """
+        Answer matching requests (or batch parts) with an error.
+
+        Args:
+            status: HTTP status to return
+            method: Only match this HTTP method (e.g. 'PATCH'), any when None
+            path: Only match paths containing this string (e.g. an event ID, or '/token')
+            times: Number of matching requests to fail, every one when None
+        """
+        with self._lock:
+            self._failures.append(_FailureRule(status, method, path, times))
+
+    def events(self, refresh_token, include_deleted=False):
+        """The account's events by ID."""
+        with self._lock:
+            calendar = self._calendars.get(refresh_token, {})
+            return {
+                event_id: {key: value for key, value in event.items() if not key.startswith('_')}
+                for event_id, event in calendar.items()
+                if include_deleted or event['status'] != 'cancelled'
+            }
+
+    def delete_event(self, refresh_token, event_id):
+        """Delete an event as if the user did it in their calendar."""
+        with self._lock:
+            self._delete(self._calendars[refresh_token], event_id)
+
+    def reset(self, failures=False):
+        """Zero request_count and operations; also drop pending injected failures when failures is True."""
+        with self._lock:
+            self.request_count = 0
+            self.operations = []
+            if failures:
+                self._failures = []
+
+    # Request handling
+
+    def _injected_failure(self, method, path):
+        for rule in self._failures:
+            if rule.matches(method, path):
+                if rule.times is not None:
+                    rule.times -= 1
+                return _error(rule.status, 'Injected failure')
+        return None
+
+    def _account(self, headers):
+        authorization = headers.get('authorization') or headers.get('Authorization') or ''
+        if not authorization.lower().startswith('bearer '):
+            return None
+        return self._tokens.get(authorization[7:].strip())
+
+    def handle_token(self, form):
+        with self._lock:
+            self.request_count += 1
+            failure = self._injected_failure('POST', TOKEN_PATH)
+            if failure:
+                return failure
+
+            grant_type = form.get('grant_type')
+            if grant_type == 'refresh_token':
+                refresh_token = form.get('refresh_token')
+                if not refresh_token or refresh_token in self._revoked or refresh_token not in self._calendars:
+                    return 400, {'error': 'invalid_grant', 'error_description': 'Token has been expired or revoked.'}
+            elif grant_type == 'authorization_code' and form.get('code'):
+                refresh_token = f"fake-refresh-{form['code']}"
+                self._calendars.setdefault(refresh_token, {})
+                self._revoked.discard(refresh_token)
+            else:
+                return 400, {'error': 'unsupported_grant_type'}
+
+            access_token = f"fake-access-{uuid.uuid4().hex}"
+            self._tokens[access_token] = refresh_token
+            response = {
+                'access_token': access_token,
+                'expires_in': self.token_lifetime,
+                'token_type': 'Bearer',
+                'scope': 'https://www.googleapis.com/auth/calendar.events',
+            }
+            if grant_type == 'authorization_code':
+                response['refresh_token'] = refresh_token
+            return 200, response
+
+    def handle_userinfo(self, headers):
+        with self._lock:
+            self.request_count += 1
+            account = self._account(headers)
+            if account is None:
+                return _error(401, 'Invalid Credentials')
+            return 200, {'email': self._emails.get(account, f"{account}@example.com")}
+
+    def handle_calendar(self, method, target, headers, body):
+        """Answer one Calendar API call (a request or a batch part)."""
+        url = urlparse(target)
+        with self._lock:
+            self.operations.append((method, url.path))
+            failure = self._injected_failure(method, url.path)
+            if failure:
+                return failure
+
+            account = self._account(headers)
+            if account is None:
+                return _error(401, 'Invalid Credentials')
+            match = EVENTS_PATH.match(url.path)
+            if not match or match.group('calendar') != 'primary':
+                return _error(404, 'Not Found')
+
+            calendar = self._calendars[account]
+            event_id = match.group('event')
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            data = json.loads(body) if body else {}
+
+            if event_id is None:
+                if method == 'GET':
+                    return self._list(account, calendar, params)
+                if method == 'POST':
+                    return self._insert(calendar, data)
+                return _error(405, 'Method Not Allowed')
+
+            event = calendar.get(event_id)
+            if event is None:
+                return _error(404, 'Not Found')
+            if method == 'DELETE':
+                if event['status'] == 'cancelled':
+                    return _error(410, 'Resource has been deleted')
+                self._delete(calendar, event_id)
+                return 204, None
+            if event['status'] == 'cancelled':
+                return _error(404, 'Not Found')
+            if method == 'GET':
+                return 200, self._public(event)
+            if method in ('PUT', 'PATCH'):
+                if method == 'PUT':
+                    kept = {key: event[key] for key in ('id', 'created', '_sequence')}
+                    event.clear()
+                    event.update(kept)
+                    event.update(data)
+                    event['status'] = data.get('status', 'confirmed')
+                else:
+                    _merge(event, data)
+                self._touch(event)
+                return 200, self._public(event)
+            return _error(405, 'Method Not Allowed')
+
+    def _touch(self, event):
+        self._sequence += 1
+        event['_sequence'] = self._sequence
+        event['updated'] = time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+        event['etag'] = f'"{self._sequence}"'
+
+    def _public(self, event):
+        return {key: value for key, value in event.items() if not key.startswith('_')}
+
+    def _insert(self, calendar, data):
+        event = dict(data)
+        event.update({'kind': 'calendar#event', 'id': uuid.uuid4().hex, 'status': 'confirmed',
+                      'created': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())})
+        self._touch(event)
+        calendar[event['id']] = event
+        return 200, self._public(event)
+
+    def _delete(self, calendar, event_id):
+        event = calendar[event_id]
+        event['status'] = 'cancelled'
+        self._touch(event)
+
+    def _list(self, account, calendar, params):
+        sync_token = params.get('syncToken')
+        if sync_token:
+            since = int(sync_token)
+            if since < self._min_sync_sequence.get(account, 0):
+                return _error(410, 'Sync token is no longer valid, a full sync is required.')
+            events = [event for event in calendar.values() if event['_sequence'] > since]
+        else:
+            show_deleted = params.get('showDeleted') == 'true'
+            events = [event for event in calendar.values() if show_deleted or event['status'] != 'cancelled']
+        events.sort(key=lambda event: event['_sequence'])
+
+        start = int(params.get('pageToken') or 0)
+        page_size = int(params.get('maxResults') or 250)
+        page = events[start:start + page_size]
+        response = {'kind': 'calendar#events', 'items': [self._public(event) for event in page]}
+        if start + page_size < len(events):
+            response['nextPageToken'] = str(start + page_size)
+        else:
+            response['nextSyncToken'] = str(self._sequence)
+        return 200, response
+
+    def handle_batch(self, content_type, body):
+        """Split a multipart batch, answer each part and build the multipart response."""
+        with self._lock:
+            self.request_count += 1
+        message = email.message_from_string(f"Content-Type: {content_type}\r\n\r\n{body}")
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for part in message.get_payload():
+            request = part.get_payload().replace('\r\n', '\n')
+            head, _, part_body = request.partition('\n\n')
+            request_line, *header_lines = head.split('\n')
+            method, target, _ = request_line.split(' ', 2)
+            headers = dict(line.split(': ', 1) for line in header_lines if ': ' in line)
+            headers = {key.lower(): value for key, value in headers.items()}
+            status, payload = self.handle_calendar(method, target, headers, part_body.strip())
+            content = json.dumps(payload) if payload is not None else ''
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'].strip('<>')}>\r\n\r\n"
+                f"HTTP/1.1 {status} {STATUS_REASONS.get(status, 'Error')}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n"
+                f"Content-Length: {len(content.encode())}\r\n\r\n{content}\r\n"
+            )
+        return f"multipart/mixed; boundary={boundary}", ''.join(parts) + f"--{boundary}--\r\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this every response waits for a delayed ACK
+    disable_nagle_algorithm = True
+    google = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length).decode() if length else ''
+
+    def _send(self, status, payload=None, content_type='application/json; charset=UTF-8', raw=None):
+        content = (raw if raw is not None else (json.dumps(payload) if payload is not None else '')).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _handle(self):
+        google = self.google
+        if google.latency:
+            time.sleep(google.latency)
+        body = self._body()
+        path = urlparse(self.path).path
+
+        if path == TOKEN_PATH and self.command == 'POST':
+            form = {key: values[-1] for key, values in parse_qs(body).items()}
+            return self._send(*google.handle_token(form))
+        if path == USERINFO_PATH:
+            return self._send(*google.handle_userinfo(self.headers))
+        if path == BATCH_PATH and self.command == 'POST':
+            content_type, raw = google.handle_batch(self.headers['Content-Type'], body)
+            return self._send(200, content_type=content_type, raw=raw)
+
+        with google._lock:
+            google.request_count += 1
+        status, payload = google.handle_calendar(self.command, self.path, self.headers, body)
+        self._send(status, payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
@@ -7,26 +7,32 @@ for booking appointments between students and instructors.
 
 from datetime import datetime, timedelta
 from django.utils import timezone
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from decouple import config
-
-# Google OAuth2 settings
-GOOGLE_CLIENT_ID = config('GOOGLE_CLIENT_ID', default='')
-GOOGLE_CLIENT_SECRET = config('GOOGLE_CLIENT_SECRET', default='')
+from django.db.models import QuerySet
+from accounts.models import GoogleCalendarCredentials
+from student.models import Booking
+from utils.calendar_batch import DELETED_STATUSES, CalendarBatch
+from utils.calendar_service_cache import build_calendar_service, calendar_service_cache
+from utils.calendar_tokens import GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, build_credentials, refresh_access_token
 
 # Calendar event colors (Google Calendar color IDs)
 # https://developers.google.com/calendar/api/v3/reference/colors
 EVENT_COLOR_PENDING = '5'  # Banana/Yellow
 EVENT_COLOR_CONFIRMED = '10'  # Basil/Green
 
+# Private extended properties marking the events we create
+BOOKING_ID_PROPERTY = 'taconnect_booking_id'
+BOOKING_ROLE_PROPERTY = 'taconnect_role'
+
 
 def get_calendar_service(user):
     """
     Get Google Calendar API service for a user.
     
+    The service is reused from calendar_service_cache while the user's credentials
+    are unchanged and their access token has not expired; only then are the tokens
+    decrypted and a new service built.
+    
     Args:
         user: User object with google_calendar_credentials
         
@@ -34,45 +40,43 @@ def get_calendar_service(user):
         Google Calendar API service object or None if credentials are invalid or calendar is disabled
     """
     try:
+        # Read the credentials' state without loading (and decrypting) the tokens
+        state = GoogleCalendarCredentials.objects.filter(user_id=user.id).values_list(
+            'updated_at', 'token_expiry', 'calendar_enabled'
+        ).first()
+        
         # Check if user has calendar credentials
-        if not hasattr(user, 'google_calendar_credentials'):
+        if state is None:
             print(f"User {user.username} has no Google Calendar credentials")
             return None
-            
-        creds_model = user.google_calendar_credentials
+        updated_at, token_expiry, calendar_enabled = state
         
         # Check if calendar integration is enabled
-        if not creds_model.calendar_enabled:
+        if not calendar_enabled:
             print(f"User {user.username} has Google Calendar integration disabled")
             return None
         
+        if token_expiry and timezone.now() < token_expiry:
+            service = calendar_service_cache.get(user.id, updated_at)
+            if service is not None:
+                return service
+        
+        creds_model = GoogleCalendarCredentials.objects.get(user_id=user.id)
+        
         if not creds_model.has_valid_credentials():
             print(f"User {user.username} has no valid calendar credentials")
             return None
         
-        # Build credentials object
-        creds = Credentials(
-            token=creds_model.access_token,
-            refresh_token=creds_model.refresh_token,
-            token_uri='https://oauth2.googleapis.com/token',
-            client_id=GOOGLE_CLIENT_ID,
-            client_secret=GOOGLE_CLIENT_SECRET,
-        )
-        
-        # Refresh token if expired
-        if creds_model.is_expired() and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-                # Update stored credentials
-                creds_model.access_token = creds.token
-                creds_model.token_expiry = timezone.now() + timedelta(seconds=3600)
-                creds_model.save()
-            except Exception as e:
-                print(f"Failed to refresh token for {user.username}: {e}")
+        # Refresh token if expired (normally the token refresher has renewed it already)
+        if creds_model.is_expired():
+            creds_model = refresh_access_token(user.id)
+            if creds_model is None:
+                print(f"Failed to refresh token for {user.username}")
                 return None
         
-        # Build and return the Calendar service
-        service = build('calendar', 'v3', credentials=creds)
+        # Build the Calendar service and keep it for this version of the credentials
+        service = build_calendar_service(build_credentials(creds_model))
+        calendar_service_cache.put(user.id, creds_model.updated_at, service)
         return service
         
     except Exception as e:
@@ -80,6 +84,87 @@ def get_calendar_service(user):
         return None
 
 
+def build_booking_event(booking, is_instructor=False):
+    """
+    Build the calendar event body of a booking.
+    
+    Args:
+        booking: Booking model instance
+        is_instructor: Boolean indicating if the event is for the instructor's calendar
+        
+    Returns:
+        dict: Event resource for events.insert
+    """
+    slot = booking.office_hour
+    
+    # Build event datetime from booking date and start_time
+    # booking.start_time is a DateTimeField, so we can use it directly
+    start_datetime = booking.start_time
+    end_datetime = booking.end_time or (start_datetime + timedelta(minutes=slot.duration_minutes))
+    
+    # Build summary and description based on who owns this calendar
+    if is_instructor:
+        summary = f"Office Hours: {booking.student.full_name} - {slot.course_name}"
+        description = (
+            f"Student: {booking.student.full_name}\n"
+            f"Email: {booking.student.email}\n"
+            f"Course: {slot.course_name}\n"
+        )
+        if slot.section:
+            description += f"Section: {slot.section}\n"
+        if booking.book_description:
+            description += f"\nNotes:\n{booking.book_description}"
+    else:
+        instructor_name = slot.instructor.full_name
+        summary = f"Office Hours with {instructor_name} - {slot.course_name}"
+        description = (
+            f"Instructor: {instructor_name}\n"
+            f"Email: {slot.instructor.email}\n"
+            f"Course: {slot.course_name}\n"
+        )
+        if slot.section:
+            description += f"Section: {slot.section}\n"
+        if slot.room:
+            description += f"Location Room: {slot.room}\n"
+        if booking.book_description:
+            description += f"\nNotes:\n{booking.book_description}"
+    
+    # Build the event body
+    event = {
+        'summary': summary,
+        'description': description,
+        'start': {
+            'dateTime': start_datetime.isoformat(),
+            'timeZone': 'UTC',
+        },
+        'end': {
+            'dateTime': end_datetime.isoformat(),
+            'timeZone': 'UTC',
+        },
+        'colorId': EVENT_COLOR_CONFIRMED,
+        # Lets calendar reconciliation (utils/calendar_sync.py) find the booking of an event
+        'extendedProperties': {
+            'private': {
+                BOOKING_ID_PROPERTY: str(booking.id),
+                BOOKING_ROLE_PROPERTY: 'instructor' if is_instructor else 'student',
+            },
+        },
+        'reminders': {
+            'useDefault': False,
+            'overrides': [
+                {'method': 'email', 'minutes': 60},  # 1 hour before
+                {'method': 'popup', 'minutes': 30},  # 30 minutes before
+            ],
+        },
+    }
+    
+    # Add location if available
+    if slot.room:
+        event['location'] = slot.room
+    
+    return event
+
+
 def create_booking_event(user, booking, is_instructor=False):
     """
     Create a calendar event for a booking.
@@ -97,65 +182,7 @@ def create_booking_event(user, booking, is_instructor=False):
         if not service:
             return None
             
-        slot = booking.office_hour
-        
-        # Build event datetime from booking date and start_time
-        # booking.start_time is a DateTimeField, so we can use it directly
-        start_datetime = booking.start_time
-        end_datetime = booking.end_time or (start_datetime + timedelta(minutes=slot.duration_minutes))
-        
-        # Build summary and description based on who owns this calendar
-        if is_instructor:
-            summary = f"Office Hours: {booking.student.full_name} - {slot.course_name}"
-            description = (
-                f"Student: {booking.student.full_name}\n"
-                f"Email: {booking.student.email}\n"
-                f"Course: {slot.course_name}\n"
-            )
-            if slot.section:
-                description += f"Section: {slot.section}\n"
-            if booking.book_description:
-                description += f"\nNotes:\n{booking.book_description}"
-        else:
-            instructor_name = slot.instructor.full_name
-            summary = f"Office Hours with {instructor_name} - {slot.course_name}"
-            description = (
-                f"Instructor: {instructor_name}\n"
-                f"Email: {slot.instructor.email}\n"
-                f"Course: {slot.course_name}\n"
-            )
-            if slot.section:
-                description += f"Section: {slot.section}\n"
-            if slot.room:
-                description += f"Location Room: {slot.room}\n"
-            if booking.book_description:
-                description += f"\nNotes:\n{booking.book_description}"
-        
-        # Build the event body
-        event = {
-            'summary': summary,
-            'description': description,
-            'start': {
-                'dateTime': start_datetime.isoformat(),
-                'timeZone': 'UTC',
-            },
-            'end': {
-                'dateTime': end_datetime.isoformat(),
-                'timeZone': 'UTC',
-            },
-            'colorId': EVENT_COLOR_CONFIRMED,
-            'reminders': {
-                'useDefault': False,
-                'overrides': [
-                    {'method': 'email', 'minutes': 60},  # 1 hour before
-                    {'method': 'popup', 'minutes': 30},  # 30 minutes before
-                ],
-            },
-        }
-        
-        # Add location if available
-        if slot.room:
-            event['location'] = slot.room
+        event = build_booking_event(booking, is_instructor=is_instructor)
         
         # Create the event
         created_event = service.events().insert(
@@ -202,8 +229,8 @@ def delete_booking_event(user, event_id):
         return True
         
     except HttpError as e:
-        # 404 means event was already deleted or doesn't exist
-        if e.resp.status == 404:
+        # 404/410 mean the event was already deleted or doesn't exist
+        if e.resp.status in DELETED_STATUSES:
             print(f"Calendar event not found for {user.username}: {event_id}")
             return True
         print(f"Google Calendar API error deleting event for {user.username}: {e}")
@@ -213,47 +240,68 @@ def delete_booking_event(user, event_id):
         return False
 
 
+def has_connected_calendar(user):
+    """True if the user has a connected, enabled calendar whose credentials were not revoked."""
+    return GoogleCalendarCredentials.objects.filter(
+        user_id=user.id,
+        calendar_enabled=True,
+        invalidated_at__isnull=True,
+        refresh_token__isnull=False,
+    ).exists()
+
+
 def add_booking_to_calendars(booking):
     """
     Add booking events to both student's and instructor's Google Calendars.
     
+    A calendar that already has the booking's event keeps it, so retrying a partly
+    failed confirmation only adds the missing events. Rescheduling a booking clears
+    its event IDs (student/serializers/update_book_serializer.py), so confirming the
+    new time creates new events.
+    
     Args:
         booking: Booking model instance
         
     Returns:
         Tuple of (student_event_id, instructor_event_id)
     """
-    student_event_id = None
-    instructor_event_id = None
+    student_event_id = booking.student_calendar_event_id
+    instructor_event_id = booking.instructor_calendar_event_id
+    created = False
     
     # Add to student's calendar
-    try:
-        student_event_id = create_booking_event(
-            user=booking.student,
-            booking=booking,
-            is_instructor=False
-        )
-        if student_event_id:
-            booking.student_calendar_event_id = student_event_id
-    except Exception as e:
-        print(f"Failed to add event to student's calendar: {e}")
+    if not student_event_id:
+        try:
+            student_event_id = create_booking_event(
+                user=booking.student,
+                booking=booking,
+                is_instructor=False
+            )
+            if student_event_id:
+                booking.student_calendar_event_id = student_event_id
+                created = True
+        except Exception as e:
+            print(f"Failed to add event to student's calendar: {e}")
     
     # Add to instructor's calendar
-    try:
-        instructor = booking.office_hour.instructor
-        instructor_event_id = create_booking_event(
-            user=instructor,
-            booking=booking,
-            is_instructor=True
-        )
-        if instructor_event_id:
-            booking.instructor_calendar_event_id = instructor_event_id
-    except Exception as e:
-        print(f"Failed to add event to instructor's calendar: {e}")
+    if not instructor_event_id:
+        try:
+            instructor = booking.office_hour.instructor
+            instructor_event_id = create_booking_event(
+                user=instructor,
+                booking=booking,
+                is_instructor=True
+            )
+            if instructor_event_id:
+                booking.instructor_calendar_event_id = instructor_event_id
+                created = True
+        except Exception as e:
+            print(f"Failed to add event to instructor's calendar: {e}")
     
-    # Save the event IDs to the booking
-    if student_event_id or instructor_event_id:
-        booking.save(update_fields=['student_calendar_event_id', 'instructor_calendar_event_id'])
+    # Save the event IDs to the booking; updated_at tells calendar reconciliation
+    # (utils/calendar_sync.py) that the IDs are newer than a listing in progress
+    if created:
+        booking.save(update_fields=['student_calendar_event_id', 'instructor_calendar_event_id', 'updated_at'])
     
     return student_event_id, instructor_event_id
 
@@ -323,20 +371,11 @@ def update_booking_event_location(user, event_id, new_location):
         if not service:
             return False
         
-        # Get the existing event
-        event = service.events().get(
-            calendarId='primary',
-            eventId=event_id
-        ).execute()
-        
-        # Update the location
-        event['location'] = new_location
-        
-        # Update the event
-        updated_event = service.events().update(
+        # Patch only the location instead of fetching and re-sending the whole event
+        service.events().patch(
             calendarId='primary',
             eventId=event_id,
-            body=event
+            body={'location': new_location}
         ).execute()
         
         print(f"Calendar event location updated for {user.username}: {event_id} -> {new_location}")
@@ -394,33 +433,110 @@ def update_booking_calendar_locations(booking, new_room):
     return student_updated, instructor_updated
 
 
+def _with_users(bookings):
+    """Load the student and instructor of each booking up front when given a QuerySet."""
+    if isinstance(bookings, QuerySet):
+        bookings = bookings.select_related('student', 'office_hour__instructor')
+    return list(bookings)
+
+
 def update_bookings_calendar_locations_mass(bookings, new_room):
     """
     Update calendar event locations for multiple bookings in bulk.
     
+    The location of every event is changed with events.patch, sent in batch
+    requests (see utils/calendar_batch.py) instead of a get and an update per event.
+    
     Args:
         bookings: QuerySet or list of Booking objects
         new_room: New room/location string
         
     Returns:
-        dict: {'success': bool, 'updated_count': int, 'failed_count': int}
+        dict: {'success': bool, 'updated_count': int, 'failed_count': int,
+               'results': {booking_id: (student_updated, instructor_updated)}}
     """
+    bookings = _with_users(bookings)
+    batch = CalendarBatch()
+    body = {'location': new_room}
+    for booking in bookings:
+        if booking.student_calendar_event_id:
+            batch.patch(booking.student, booking.id, 'student', booking.student_calendar_event_id, body)
+        if booking.instructor_calendar_event_id:
+            batch.patch(booking.office_hour.instructor, booking.id, 'instructor', booking.instructor_calendar_event_id, body)
+    
+    try:
+        batch_results = batch.execute()
+    except Exception as e:
+        print(f"Failed to update calendar locations for {len(bookings)} bookings: {e}")
+        batch_results = {}
+    
     updated_count = 0
     failed_count = 0
-    
+    results = {}
     for booking in bookings:
-        try:
-            student_updated, instructor_updated = update_booking_calendar_locations(booking, new_room)
-            if student_updated or instructor_updated:
-                updated_count += 1
-            else:
-                failed_count += 1
-        except Exception as e:
-            print(f"Failed to update calendar locations for booking {booking.id}: {e}")
+        student_updated = _succeeded(batch_results, booking.id, 'student')
+        instructor_updated = _succeeded(batch_results, booking.id, 'instructor')
+        results[booking.id] = (student_updated, instructor_updated)
+        if student_updated or instructor_updated:
+            updated_count += 1
+        else:
             failed_count += 1
     
     return {
         'success': failed_count == 0,
         'updated_count': updated_count,
-        'failed_count': failed_count
+        'failed_count': failed_count,
+        'results': results,
     }
+
+
+def remove_bookings_from_calendars_mass(bookings):
+    """
+    Remove the calendar events of many bookings with batched deletes.
+    
+    Event IDs of deleted events (or events already gone) are cleared on the
+    given booking objects and saved in one query.
+    
+    Args:
+        bookings: QuerySet or list of Booking objects
+        
+    Returns:
+        dict: {booking_id: (student_deleted, instructor_deleted)}
+    """
+    bookings = _with_users(bookings)
+    batch = CalendarBatch()
+    for booking in bookings:
+        if booking.student_calendar_event_id:
+            batch.delete(booking.student, booking.id, 'student', booking.student_calendar_event_id)
+        if booking.instructor_calendar_event_id:
+            batch.delete(booking.office_hour.instructor, booking.id, 'instructor', booking.instructor_calendar_event_id)
+    
+    try:
+        batch_results = batch.execute()
+    except Exception as e:
+        print(f"Failed to remove calendar events for {len(bookings)} bookings: {e}")
+        batch_results = {}
+    
+    results = {}
+    changed = []
+    for booking in bookings:
+        student_deleted = _succeeded(batch_results, booking.id, 'student')
+        instructor_deleted = _succeeded(batch_results, booking.id, 'instructor')
+        results[booking.id] = (student_deleted, instructor_deleted)
+        if student_deleted:
+            booking.student_calendar_event_id = None
+        if instructor_deleted:
+            booking.instructor_calendar_event_id = None
+        if student_deleted or instructor_deleted:
+            changed.append(booking)
+    
+    # Save the cleared event IDs
+    if changed:
+        Booking.objects.bulk_update(changed, ['student_calendar_event_id', 'instructor_calendar_event_id'])
+    
+    return results
+
+
+def _succeeded(batch_results, booking_id, role):
+    result = batch_results.get((booking_id, role))
+    return bool(result and result.ok)
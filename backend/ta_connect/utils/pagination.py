@@ -0,0 +1,137 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Rows are ordered by a fixed tuple of columns ending in the primary key, and the
+cursor stores the ordering values of the last row returned. The next page is
+fetched with a "row comes after the cursor" filter instead of an OFFSET, so
+page N costs the same index range scan as page 1 and cursors stay valid when
+rows are inserted before them.
+
+Pagination is opt-in: a request without cursor or page_size gets the whole
+ordered list, as the endpoints returned before pagination, so existing clients
+that never read next_cursor are not cut off at the first page.
+"""
+import base64
+import json
+from django.db.models import Q
+from drf_yasg import openapi
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor query parameter cannot be decoded."""
+
+
+class KeysetPagination:
+    """
+    Paginate a queryset on `ordering` (all ascending or all descending, last field unique).
+    Requests without cursor or page_size are not paginated.
+
+    Usage:
+        paginator = KeysetPagination(ordering=('date', 'start_time', 'id'))
+        page = paginator.paginate_queryset(queryset, request)
+        next_cursor = paginator.next_cursor
+    """
+    page_size = 100
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, ordering, page_size=None):
+        descending = {field.startswith('-') for field in ordering}
+        if len(descending) != 1:
+            raise ValueError("Keyset ordering fields must all share the same direction")
+        self.ordering = tuple(ordering)
+        self.descending = descending.pop()
+        self.fields = tuple(field.lstrip('-') for field in ordering)
+        if page_size:
+            self.page_size = page_size
+        self.next_cursor = None
+
+    def is_paginated(self, request):
+        """True when the request asks for a page (sends cursor or page_size)."""
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            page_size = int(value)
+        except (TypeError, ValueError):
+            raise InvalidCursor(f"{self.page_size_query_param} must be an integer")
+        if page_size < 1:
+            raise InvalidCursor(f"{self.page_size_query_param} must be at least 1")
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, row):
+        values = [getattr(row, field) for field in self.fields]
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor, model):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError("cursor has the wrong number of values")
+            return [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise InvalidCursor("Invalid cursor")
+
+    def get_after_filter(self, values):
+        """
+        Build (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ... for the cursor position.
+        """
+        lookup = 'lt' if self.descending else 'gt'
+        condition = Q()
+        for index, field in enumerate(self.fields):
+            equal = {prev: values[i] for i, prev in enumerate(self.fields[:index])}
+            condition |= Q(**equal, **{f'{field}__{lookup}': values[index]})
+        return condition
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Return the list of rows for the requested page and set self.next_cursor.
+        Raises InvalidCursor for a malformed cursor or page_size.
+        """
+        queryset = queryset.order_by(*self.ordering)
+        if not self.is_paginated(request):
+            return list(queryset)
+
+        page_size = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = self.decode_cursor(cursor, queryset.model)
+            queryset = queryset.filter(self.get_after_filter(values))
+
+        # Fetch one extra row to know whether another page exists
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if has_more and rows else None
+        return rows
+
+
+# Swagger query parameters shared by every keyset-paginated endpoint
+KEYSET_PAGINATION_PARAMETERS = [
+    openapi.Parameter(
+        'cursor',
+        openapi.IN_QUERY,
+        description='Opaque cursor from a previous response\'s next_cursor. Omit for the first page; omit both cursor and page_size for the full list.',
+        type=openapi.TYPE_STRING,
+        required=False,
+    ),
+    openapi.Parameter(
+        'page_size',
+        openapi.IN_QUERY,
+        description=f'Number of items per page (default {KeysetPagination.page_size} when a cursor is sent, max {KeysetPagination.max_page_size}).',
+        type=openapi.TYPE_INTEGER,
+        required=False,
+    ),
+]
@@ -0,0 +1,126 @@
+"""
+Periodic background jobs.
+
+The booking sweeper, reminder scheduler, outbox worker, Google token refresher
+and calendar reconciler each run one function over and over: on a daemon thread
+started from wsgi.py/asgi.py, or in the foreground with their management
+command's --loop option. run_periodically is that loop, start_periodic_thread
+starts it once per process, and PeriodicCommandMixin gives a command the
+--loop/--interval options.
+"""
+import logging
+import threading
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_threads = {}
+_threads_lock = threading.Lock()
+
+
+def run_periodically(function, interval, stop_event, label, is_busy=None):
+    """
+    Call function() every `interval` seconds until stop_event is set.
+    Errors are logged and the loop keeps going so one bad run doesn't stop the job.
+
+    Args:
+        function: The job's single run
+        interval: Seconds to wait between runs
+        stop_event: threading.Event that ends the loop
+        label: Name of the job in log messages, e.g. 'Booking sweeper'
+        is_busy: Optional check of a run's result; when given, the loop only waits
+            after runs it reports as not busy (a worker draining a queue)
+    """
+    while not stop_event.is_set():
+        busy = False
+        try:
+            close_old_connections()
+            result = function()
+            busy = bool(is_busy and is_busy(result))
+        except Exception as e:
+            logger.error(f"{label} run failed: {str(e)}")
+        finally:
+            close_old_connections()
+        if not busy:
+            stop_event.wait(interval)
+
+
+def start_periodic_thread(name, function, interval, label, is_busy=None):
+    """
+    Run run_periodically on a daemon thread called `name`, at most one per process.
+
+    An interval of 0 (or None) leaves the job to its management command or cron.
+
+    Returns:
+        threading.Event used to stop the thread, or None if it was not started
+    """
+    if not interval or interval <= 0:
+        return None
+
+    with _threads_lock:
+        thread = _threads.get(name)
+        if thread is not None and thread.is_alive():
+            return thread.stop_event
+
+        stop_event = threading.Event()
+        thread = threading.Thread(
+            target=run_periodically,
+            args=(function, interval, stop_event, label, is_busy),
+            name=name,
+            daemon=True,
+        )
+        thread.stop_event = stop_event
+        _threads[name] = thread
+        thread.start()
+
+    logger.info(f"{label} started (every {interval}s)")
+    return stop_event
+
+
+class PeriodicCommandMixin:
+    """
+    --loop/--interval options for a management command whose job runs once by default.
+
+    Subclasses set the attributes below and implement get_job() and report();
+    commands with options of their own call super().add_arguments(parser) first.
+    """
+    job_label = None          # Log label, e.g. 'Booking sweeper'
+    loop_message = None       # Printed when --loop starts, e.g. 'Sweeping ended bookings'
+    default_interval = 60
+    interval_help = 'Seconds between runs when running with --loop'
+    is_busy = None            # staticmethod passed to run_periodically
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and repeat every --interval seconds instead of running once.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=self.default_interval,
+            help=f'{self.interval_help} (default: {self.default_interval}).',
+        )
+
+    def get_job(self, options):
+        """Return the callable that performs one run."""
+        raise NotImplementedError
+
+    def report(self, result):
+        """Write the result of a single run."""
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        job = self.get_job(options)
+        if options['loop']:
+            interval = max(options['interval'], 1)
+            self.stdout.write(f"{self.loop_message} every {interval}s (Ctrl+C to stop)")
+            stop_event = threading.Event()
+            try:
+                run_periodically(job, interval, stop_event, self.job_label, self.is_busy)
+            except KeyboardInterrupt:
+                stop_event.set()
+            return
+
+        self.report(job())
@@ -5,12 +5,14 @@ from utils.datetime_formatter import format_datetime_for_display
 
 logger = logging.getLogger(__name__)
 
-def send_booking_cancelled_push(student, instructor, slot, booking_date, booking_time, booking_id, cancelled_by='instructor'):
+def send_booking_cancelled_push(student, instructor, slot, booking_date, booking_time, booking_id, cancelled_by='instructor', notify_student=True, notify_instructor=True):
     """
     Send push notification when a booking is cancelled.
     
     Args:
         cancelled_by: 'instructor' or 'student' - determines who gets notified
+        notify_student: False to leave the student out (e.g. they receive a digest)
+        notify_instructor: False to leave the instructor out (e.g. they receive a digest)
     """
     # Format date and time - handle both DateTimeField and separate date/time
     if hasattr(booking_time, 'isoformat'):  # DateTimeField
@@ -34,7 +36,12 @@ def send_booking_cancelled_push(student, instructor, slot, booking_date, booking
     student_sent = False
     instructor_sent = False
     
-    if cancelled_by == 'instructor':
+    # Recipients in digest mode get this booking in their digest instead
+    if cancelled_by == 'instructor' and not notify_student:
+        student_sent = True
+    elif cancelled_by != 'instructor' and not notify_instructor:
+        instructor_sent = True
+    elif cancelled_by == 'instructor':
         # Notify student that instructor cancelled
         student_payload = {
             "head": "❌ Booking Cancelled",
@@ -1,6 +1,7 @@
 import logging
 from ta_connect.settings import frontend_url
-from ..send_push_notification import send_push_notification_bulk
+from student.utils.booking_recipients import resolve_booking_recipients
+from ..push_fanout import send_push_fanout
 
 logger = logging.getLogger(__name__)
 
@@ -12,16 +13,16 @@ REASON_MESSAGES = {
     'schedule_conflict': 'Due to a scheduling conflict',
 }
 
-def format_booking_data(booking):
-    """Extract and format booking data for notifications."""
+def format_booking_data(recipient):
+    """Extract and format booking data for notifications from a BookingRecipient record."""
     from utils.datetime_formatter import format_datetime_for_display
     
-    student = booking.student
-    instructor = booking.office_hour.instructor
-    slot = booking.office_hour
+    student = recipient.student
+    instructor = recipient.instructor
+    slot = recipient.slot
     
     # Use 'start_time' which is a DateTimeField (UTC) - convert to Cairo timezone
-    formatted_date, formatted_time = format_datetime_for_display(booking.start_time)
+    formatted_date, formatted_time = format_datetime_for_display(recipient.start_time)
     
     student_name = f"{student.first_name} {student.last_name}".strip() or student.username
     instructor_name = f"{instructor.first_name} {instructor.last_name}".strip() or instructor.username
@@ -35,7 +36,7 @@ def format_booking_data(booking):
         'course_name': course_name,
         'formatted_date': formatted_date,
         'formatted_time': formatted_time,
-        'booking_id': booking.id,
+        'booking_id': recipient.booking_id,
     }
 
 
@@ -44,20 +45,21 @@ def send_booking_cancelled_push_mass(bookings, cancellation_reason=None):
     Send push notifications to all students and instructors for cancelled bookings.
     
     Args:
-        bookings: List of Booking objects that were cancelled
+        bookings: QuerySet, or list of Booking objects or booking IDs that were cancelled
         cancellation_reason: Optional reason for cancellation
     
     Returns:
-        dict: {'success': bool, 'sent_count': int, 'failed_count': int}
+        dict: {'success': bool, 'sent_count': int, 'failed_count': int, 'results': {user_id: {...}}}
     """
     reason_text = REASON_MESSAGES.get(cancellation_reason, cancellation_reason) if cancellation_reason else 'The session has been cancelled'
     
     student_notifications = []
     instructor_notifications = []
     
-    for booking in bookings:
+    # Students, slots and instructors of every booking in one query
+    for recipient in resolve_booking_recipients(bookings):
         try:
-            data = format_booking_data(booking)
+            data = format_booking_data(recipient)
             
             # Prepare student notification
             student_notifications.append({
@@ -85,23 +87,10 @@ def send_booking_cancelled_push_mass(bookings, cancellation_reason=None):
                 }
             })
         except Exception as e:
-            logger.error(f"Error preparing cancellation push for booking {booking.id}: {str(e)}")
+            logger.error(f"Error preparing cancellation push for booking {recipient.booking_id}: {str(e)}")
     
-    # Send notifications in bulk
-    all_notifications = student_notifications + instructor_notifications
-    users = [n['user'] for n in all_notifications]
-    
-    # Since each user gets a unique payload, we need to send individually but can use bulk pattern
-    sent_count = 0
-    failed_count = 0
-    
-    for notification in all_notifications:
-        result = send_push_notification_bulk([notification['user']], notification['payload'])
-        sent_count += result['sent_count']
-        failed_count += result['failed_count']
-    
-    return {
-        'success': failed_count == 0,
-        'sent_count': sent_count,
-        'failed_count': failed_count
-    }
+    # Each user gets a unique payload; send them all concurrently
+    return send_push_fanout(
+        (notification['user'], notification['payload'])
+        for notification in student_notifications + instructor_notifications
+    )
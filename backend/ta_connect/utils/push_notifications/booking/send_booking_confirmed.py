@@ -5,10 +5,17 @@ from utils.datetime_formatter import format_datetime_for_display
 
 logger = logging.getLogger(__name__)
 
-def send_booking_confirmed_push(student, instructor, slot, booking_date, booking_time, booking_id):
+def send_booking_confirmed_push(student, instructor, slot, booking_date, booking_time, booking_id, notify_student=True):
     """
     Send push notification to student when booking is confirmed.
+
+    Args:
+        notify_student: False to skip the push (e.g. the student receives a digest)
     """
+    if not notify_student:
+        # Recipients in digest mode get this booking in their digest instead
+        return {'success': True, 'student_sent': True}
+
     # Format date and time - handle both DateTimeField and separate date/time
     if hasattr(booking_time, 'isoformat'):  # DateTimeField
         formatted_date, formatted_time = format_datetime_for_display(booking_time)
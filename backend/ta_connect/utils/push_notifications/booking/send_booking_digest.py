@@ -0,0 +1,54 @@
+import logging
+from ta_connect.settings import frontend_url
+from ..send_push_notification import send_push_notification
+
+logger = logging.getLogger(__name__)
+
+# Notification title per event type and recipient role
+DIGEST_PUSH_HEADS = {
+    ('pending', 'instructor'): '⚡ {count} New Booking Requests',
+    ('pending', 'student'): '{count} Bookings Pending Approval',
+    ('confirmed', 'instructor'): '{count} Bookings Confirmed',
+    ('confirmed', 'student'): '✅ {count} Bookings Confirmed',
+    ('cancelled', 'instructor'): '{count} Bookings Cancelled',
+    ('cancelled', 'student'): '❌ {count} Bookings Cancelled',
+}
+
+# Bookings listed in the body before the rest are summarised as "and N more"
+MAX_LISTED = 3
+
+
+def send_booking_digest_push(recipient, event_type, items):
+    """
+    Send one push notification summarising several booking notifications of the same type.
+    Used for recipients who opted into notification digests.
+
+    Args:
+        recipient: User object (student or instructor)
+        event_type: 'pending', 'confirmed' or 'cancelled'
+        items: List of booking summaries (student_name, instructor_name, course_name,
+               booking_date, booking_time)
+
+    Returns:
+        dict: {'success': bool, 'message': str}
+    """
+    role = 'instructor' if recipient.is_instructor() else 'student'
+
+    lines = []
+    for item in items[:MAX_LISTED]:
+        who = item.get('student_name') if role == 'instructor' else item.get('instructor_name')
+        lines.append(f"{who} - {item.get('course_name')} on {item.get('booking_date')} at {item.get('booking_time')}")
+    if len(items) > MAX_LISTED:
+        lines.append(f"and {len(items) - MAX_LISTED} more")
+
+    payload = {
+        "head": DIGEST_PUSH_HEADS[(event_type, role)].format(count=len(items)),
+        "body": "\n".join(lines),
+        "icon": f"{frontend_url}/Logo.png",
+        "url": f"{frontend_url}/ta/manage-bookings" if role == 'instructor' else f"{frontend_url}/student/manage-booked",
+        # One tag per event type so a newer digest replaces the previous one on the device
+        "tag": f"booking-digest-{event_type}",
+        "requireInteraction": event_type == 'pending' and role == 'instructor'
+    }
+
+    return send_push_notification(recipient, payload)
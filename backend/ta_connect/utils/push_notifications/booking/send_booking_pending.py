@@ -5,7 +5,7 @@ from utils.datetime_formatter import format_datetime_for_display
 
 logger = logging.getLogger(__name__)
 
-def send_booking_pending_push(student, instructor, slot, booking_date, booking_time, booking_id):
+def send_booking_pending_push(student, instructor, slot, booking_date, booking_time, booking_id, notify_student=True, notify_instructor=True):
     """
     Send push notifications for a pending booking to both student and instructor.
     
@@ -16,6 +16,8 @@ def send_booking_pending_push(student, instructor, slot, booking_date, booking_t
         booking_date: Date object or string
         booking_time: DateTimeField (timezone-aware UTC) or Time object or string
         booking_id: The ID of the pending booking
+        notify_student: False to leave the student out (e.g. they receive a digest)
+        notify_instructor: False to leave the instructor out (e.g. they receive a digest)
     
     Returns:
         dict: {'success': bool, 'student_sent': bool, 'instructor_sent': bool}
@@ -52,8 +54,12 @@ def send_booking_pending_push(student, instructor, slot, booking_date, booking_t
         "requireInteraction": False
     }
     
-    result = send_push_notification(student, student_payload)
-    student_sent = result['success']
+    if notify_student:
+        result = send_push_notification(student, student_payload)
+        student_sent = result['success']
+    else:
+        # Recipients in digest mode get this booking in their digest instead
+        student_sent = True
     
     # Send to instructor
     instructor_payload = {
@@ -65,8 +71,11 @@ def send_booking_pending_push(student, instructor, slot, booking_date, booking_t
         "requireInteraction": True
     }
     
-    result = send_push_notification(instructor, instructor_payload)
-    instructor_sent = result['success']
+    if notify_instructor:
+        result = send_push_notification(instructor, instructor_payload)
+        instructor_sent = result['success']
+    else:
+        instructor_sent = True
     
     return {
         'success': student_sent or instructor_sent,
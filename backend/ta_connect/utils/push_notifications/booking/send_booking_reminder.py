@@ -0,0 +1,37 @@
+import logging
+from ta_connect.settings import frontend_url
+from ..send_push_notification import send_push_notification
+from utils.datetime_formatter import format_datetime_for_display
+
+logger = logging.getLogger(__name__)
+
+def send_booking_reminder_push(student, instructor, slot, booking_time, booking_id, starts_in_minutes):
+    """
+    Send a push reminder to the student shortly before a confirmed booking starts.
+
+    Args:
+        student: User object (student)
+        instructor: User object (instructor/TA)
+        slot: OfficeHourSlot object
+        booking_time: DateTimeField (timezone-aware UTC)
+        booking_id: The ID of the booking
+        starts_in_minutes: Minutes until the session starts
+
+    Returns:
+        dict: {'success': bool, 'message': str}
+    """
+    _, formatted_time = format_datetime_for_display(booking_time)
+    instructor_name = f"{instructor.first_name} {instructor.last_name}".strip() or instructor.username
+    course_name = slot.course_name if slot.course_name else 'Office Hours'
+    room = f" in {slot.room}" if slot.room else ''
+
+    student_payload = {
+        "head": "⏰ Office Hours Starting Soon",
+        "body": f"Your {course_name} session with {instructor_name} starts in {starts_in_minutes} minutes ({formatted_time}){room}.",
+        "icon": f"{frontend_url}/Logo.png",
+        "url": f"{frontend_url}/student/manage-booked",
+        "tag": f"booking-reminder-{booking_id}",
+        "requireInteraction": False
+    }
+
+    return send_push_notification(student, student_payload)
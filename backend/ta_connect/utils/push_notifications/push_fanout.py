@@ -0,0 +1,130 @@
+"""
+Concurrent web push fan-out.
+
+Mass notifications (a cancelled or moved slot) reach many users, each with one
+subscription per browser/device. Sending them one after another makes one HTTPS
+round trip to the push service per endpoint in series, so the request time grows
+with the number of recipients.
+
+send_push_fanout() loads every recipient's subscriptions in one query and posts
+to the endpoints from a bounded thread pool (WEBPUSH_FANOUT_MAX_WORKERS) with a
+per-request timeout (WEBPUSH_TIMEOUT_SECONDS). Worker threads only do HTTP; the
+database is touched from the calling thread before and after the fan-out, when
+outcomes are handed to the subscription registry.
+"""
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from pywebpush import WebPushException, webpush
+from webpush.models import PushInformation
+from .subscription_registry import record_delivery_results
+from .vapid import get_vapid_headers
+
+logger = logging.getLogger(__name__)
+
+# Push services answer these for subscriptions that no longer exist
+GONE_STATUS_CODES = (404, 410)
+
+
+def _subscription_info(subscription):
+    return {
+        'endpoint': subscription.endpoint,
+        'keys': {'p256dh': subscription.p256dh, 'auth': subscription.auth},
+    }
+
+
+def _post(subscription, data, ttl, timeout):
+    """
+    Send one notification to one endpoint. Runs on a worker thread.
+    The VAPID header comes from the per-origin cache instead of being signed per message.
+
+    Returns:
+        tuple: (ok, status_code, error message)
+    """
+    try:
+        webpush(
+            subscription_info=_subscription_info(subscription),
+            data=data,
+            ttl=ttl,
+            timeout=timeout,
+            headers=get_vapid_headers(subscription.endpoint)
+        )
+        return True, None, ''
+    except WebPushException as e:
+        status_code = e.response.status_code if e.response is not None else None
+        return False, status_code, str(e)
+    except Exception as e:
+        # Timeouts and connection errors from requests
+        return False, None, str(e)
+
+
+def send_push_fanout(notifications, ttl=86400, max_workers=None, timeout=None):
+    """
+    Send web push notifications to many users concurrently.
+
+    Args:
+        notifications: Iterable of (user, payload) pairs; payload is the notification dict
+        ttl: Time to live in seconds (default 24 hours)
+        max_workers: Maximum concurrent requests (default WEBPUSH_FANOUT_MAX_WORKERS)
+        timeout: Seconds before a single push request is abandoned (default WEBPUSH_TIMEOUT_SECONDS)
+
+    Returns:
+        dict: {'success': bool, 'sent_count': int, 'failed_count': int,
+               'results': {user_id: {'sent': int, 'failed': int}}}
+        A notification counts as sent when none of the user's endpoints failed,
+        matching send_push_notification (a user without subscriptions is not a failure).
+    """
+    notifications = [(user, payload) for user, payload in notifications]
+    max_workers = max_workers or settings.WEBPUSH_FANOUT_MAX_WORKERS
+    timeout = timeout or settings.WEBPUSH_TIMEOUT_SECONDS
+
+    # Keyed by subscription id so an endpoint linked to a user twice is sent to once
+    subscriptions_by_user = {}
+    push_infos = PushInformation.objects.filter(
+        user_id__in={user.id for user, payload in notifications}
+    ).select_related('subscription')
+    for push_info in push_infos:
+        subscriptions_by_user.setdefault(push_info.user_id, {})[push_info.subscription_id] = push_info.subscription
+
+    # One job per (notification, endpoint)
+    jobs = []
+    for index, (user, payload) in enumerate(notifications):
+        data = json.dumps(payload)
+        for subscription in subscriptions_by_user.get(user.id, {}).values():
+            jobs.append((index, subscription, data))
+
+    outcomes = []
+    if jobs:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs)), thread_name_prefix='webpush') as pool:
+            futures = [pool.submit(_post, subscription, data, ttl, timeout) for index, subscription, data in jobs]
+            outcomes = [future.result() for future in futures]
+
+    failed_notifications = set()
+    succeeded_ids, gone_ids, failed_ids = set(), set(), set()
+    for (index, subscription, data), (ok, status_code, error) in zip(jobs, outcomes):
+        if ok:
+            succeeded_ids.add(subscription.id)
+            continue
+        if status_code in GONE_STATUS_CODES:
+            # Unsubscribed or expired device: the subscription is removed, not a delivery failure
+            gone_ids.add(subscription.id)
+            continue
+        failed_ids.add(subscription.id)
+        failed_notifications.add(index)
+        logger.warning(f"Failed to send push notification to user {notifications[index][0].id}: {error}")
+
+    record_delivery_results(succeeded_ids, gone_ids, failed_ids)
+
+    results = {}
+    for index, (user, payload) in enumerate(notifications):
+        user_result = results.setdefault(user.id, {'sent': 0, 'failed': 0})
+        user_result['failed' if index in failed_notifications else 'sent'] += 1
+
+    failed_count = len(failed_notifications)
+    return {
+        'success': failed_count == 0,
+        'sent_count': len(notifications) - failed_count,
+        'failed_count': failed_count,
+        'results': results,
+    }
@@ -1,5 +1,5 @@
 import logging
-from webpush import send_user_notification
+from .push_fanout import send_push_fanout
 
 logger = logging.getLogger(__name__)
 
@@ -22,22 +22,17 @@ def send_push_notification(user, payload, ttl=86400):
     Returns:
         dict: {'success': bool, 'message': str}
     """
-    try:
-        send_user_notification(
-            user=user,
-            payload=payload,
-            ttl=ttl
-        )
+    # Every device of the user, through the fan-out so dead endpoints are pruned
+    result = send_push_fanout([(user, payload)], ttl=ttl)
+    if result['success']:
         logger.info(f"Push notification sent to user {user.id}: {payload.get('head', 'No title')}")
         return {'success': True, 'message': 'Notification sent successfully'}
-    except Exception as e:
-        logger.warning(f"Failed to send push notification to user {user.id}: {str(e)}")
-        return {'success': False, 'message': str(e)}
+    return {'success': False, 'message': 'Failed to send notification to one or more devices'}
 
 
 def send_push_notification_bulk(users, payload, ttl=86400):
     """
-    Send web push notifications to multiple users.
+    Send the same web push notification to multiple users concurrently.
     
     Args:
         users: List or QuerySet of User objects
@@ -45,20 +40,6 @@ def send_push_notification_bulk(users, payload, ttl=86400):
         ttl: Time to live in seconds
     
     Returns:
-        dict: {'success': bool, 'sent_count': int, 'failed_count': int}
+        dict: {'success': bool, 'sent_count': int, 'failed_count': int, 'results': {user_id: {...}}}
     """
-    sent_count = 0
-    failed_count = 0
-    
-    for user in users:
-        result = send_push_notification(user, payload, ttl)
-        if result['success']:
-            sent_count += 1
-        else:
-            failed_count += 1
-    
-    return {
-        'success': failed_count == 0,
-        'sent_count': sent_count,
-        'failed_count': failed_count
-    }
+    return send_push_fanout([(user, payload) for user in users], ttl=ttl)
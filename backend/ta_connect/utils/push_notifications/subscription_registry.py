@@ -0,0 +1,144 @@
+"""
+Registry of web push subscriptions.
+
+A user may be subscribed from several browsers/devices: one SubscriptionInfo per
+endpoint, linked to the user by PushInformation. Endpoints are unique: subscribing
+an endpoint again refreshes its keys, and a browser that changes hands moves to the
+new user instead of notifying both.
+
+The fan-out reports delivery outcomes back here. Subscriptions the push service
+answers 404/410 for are deleted at once, successes are timestamped in
+PushSubscriptionHealth, and sweep_push_subscriptions() prunes endpoints that keep
+failing. A subscription nothing was sent to is never pruned: a quiet user is not a
+dead endpoint.
+"""
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from webpush.models import PushInformation, SubscriptionInfo
+from student.models import PushSubscriptionHealth
+
+logger = logging.getLogger(__name__)
+
+
+@transaction.atomic
+def register_subscription(user, endpoint, p256dh, auth, browser='unknown', user_agent=''):
+    """
+    Add or refresh a device subscription for the user. The user's other devices stay subscribed.
+
+    Returns:
+        tuple: (SubscriptionInfo, created)
+    """
+    subscriptions = list(SubscriptionInfo.objects.select_for_update().filter(endpoint=endpoint).order_by('id'))
+    created = not subscriptions
+
+    if created:
+        subscription = SubscriptionInfo.objects.create(
+            endpoint=endpoint, p256dh=p256dh, auth=auth, browser=browser, user_agent=user_agent
+        )
+    else:
+        subscription, duplicates = subscriptions[0], subscriptions[1:]
+        if duplicates:
+            # Rows left by the old one-per-user flow; keep the oldest
+            SubscriptionInfo.objects.filter(id__in=[duplicate.id for duplicate in duplicates]).delete()
+        subscription.p256dh = p256dh
+        subscription.auth = auth
+        if browser and browser != 'unknown':
+            subscription.browser = browser
+        if user_agent:
+            subscription.user_agent = user_agent
+        subscription.save()
+
+    # The endpoint belongs to whoever subscribed from the browser last
+    PushInformation.objects.filter(subscription=subscription).exclude(user=user).delete()
+    PushInformation.objects.get_or_create(user=user, subscription=subscription, group=None)
+    # New keys make earlier failures irrelevant
+    PushSubscriptionHealth.objects.update_or_create(
+        subscription=subscription,
+        defaults={'consecutive_failures': 0},
+    )
+    return subscription, created
+
+
+def _delete_subscriptions(queryset):
+    """Delete subscriptions (their links and health rows cascade); returns how many subscriptions went."""
+    return queryset.delete()[1].get(SubscriptionInfo._meta.label, 0)
+
+
+def _delete_orphans(subscription_ids):
+    """Delete the given subscriptions that no user or group is linked to any more."""
+    return _delete_subscriptions(SubscriptionInfo.objects.filter(id__in=subscription_ids, webpush_info__isnull=True))
+
+
+@transaction.atomic
+def unregister_subscriptions(user, endpoint=None):
+    """
+    Unsubscribe one device of the user (by endpoint), or all of them.
+
+    Returns:
+        int: Number of device links removed
+    """
+    links = PushInformation.objects.filter(user=user)
+    if endpoint:
+        links = links.filter(subscription__endpoint=endpoint)
+    subscription_ids = list(links.values_list('subscription_id', flat=True))
+    removed = links.delete()[0]
+    _delete_orphans(subscription_ids)
+    return removed
+
+
+def get_user_subscription_count(user):
+    """Number of devices the user receives push notifications on."""
+    return PushInformation.objects.filter(user=user, subscription__isnull=False).count()
+
+
+def record_delivery_results(succeeded_ids=(), gone_ids=(), failed_ids=()):
+    """
+    Store the outcome of a fan-out: timestamp successes, delete subscriptions the
+    push service reported gone (404/410) and count other failures.
+    """
+    now = timezone.now()
+    succeeded_ids, gone_ids, failed_ids = set(succeeded_ids), set(gone_ids), set(failed_ids)
+
+    if gone_ids:
+        removed = _delete_subscriptions(SubscriptionInfo.objects.filter(id__in=gone_ids))
+        logger.info(f"Removed {removed} expired push subscriptions")
+
+    touched = succeeded_ids | failed_ids
+    if not touched:
+        return
+
+    missing = touched - set(
+        PushSubscriptionHealth.objects.filter(subscription_id__in=touched).values_list('subscription_id', flat=True)
+    )
+    # ignore_conflicts: a concurrent fan-out may create the same rows
+    PushSubscriptionHealth.objects.bulk_create(
+        [PushSubscriptionHealth(subscription_id=subscription_id) for subscription_id in missing],
+        ignore_conflicts=True,
+    )
+    if succeeded_ids:
+        PushSubscriptionHealth.objects.filter(subscription_id__in=succeeded_ids).update(
+            last_success_at=now, consecutive_failures=0, updated_at=now
+        )
+    if failed_ids:
+        PushSubscriptionHealth.objects.filter(subscription_id__in=failed_ids).update(
+            last_failure_at=now, consecutive_failures=F('consecutive_failures') + 1, updated_at=now
+        )
+
+
+def sweep_push_subscriptions(max_failures=None):
+    """
+    Delete push subscriptions that can no longer be delivered to:
+    - subscriptions no user or group is linked to,
+    - subscriptions that failed max_failures sends in a row.
+
+    Returns:
+        dict: {'orphaned': int, 'failing': int}
+    """
+    max_failures = max_failures or settings.PUSH_SUBSCRIPTION_MAX_FAILURES
+
+    orphaned = _delete_subscriptions(SubscriptionInfo.objects.filter(webpush_info__isnull=True))
+    failing = _delete_subscriptions(SubscriptionInfo.objects.filter(health__consecutive_failures__gte=max_failures))
+    return {'orphaned': orphaned, 'failing': failing}
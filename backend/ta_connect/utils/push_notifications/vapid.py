@@ -0,0 +1,88 @@
+"""
+Cached VAPID authorization headers for web push.
+
+A VAPID header is a JWT signed (ECDSA P-256) with the server's private key. Its
+claims only depend on the push service origin ("aud"), the contact ("sub") and
+the expiry ("exp"), so one header can be reused for every message sent to the
+same push service until shortly before it expires. pywebpush signs a new one per
+message when given vapid_claims, which shows up as CPU time in mass sends.
+
+get_vapid_headers() keeps one signed header per origin in process memory and
+re-signs it VAPID_HEADER_REFRESH_SECONDS before it expires. The cache is per
+process on purpose: headers are cheap to rebuild and the parsed key is not
+something to put in a shared cache.
+"""
+import threading
+import time
+from urllib.parse import urlparse
+from django.conf import settings
+from py_vapid import Vapid
+
+_headers_by_audience = {}
+_key_cache = {}
+_lock = threading.Lock()
+
+
+def _vapid_settings():
+    webpush_settings = getattr(settings, 'WEBPUSH_SETTINGS', {})
+    return webpush_settings.get('VAPID_PRIVATE_KEY'), webpush_settings.get('VAPID_ADMIN_EMAIL')
+
+
+def _get_key(private_key):
+    """Parse the private key once per process (it is only re-read when the setting changes)."""
+    key = _key_cache.get(private_key)
+    if key is None:
+        key = _key_cache[private_key] = Vapid.from_string(private_key=private_key)
+    return key
+
+
+def get_audience(endpoint):
+    """The push service origin a subscription endpoint belongs to, e.g. https://fcm.googleapis.com."""
+    url = urlparse(endpoint)
+    return f"{url.scheme}://{url.netloc}"
+
+
+def sign_vapid_headers(endpoint, private_key=None, admin_email=None, ttl=None):
+    """Sign a new VAPID Authorization header for the endpoint's push service, without caching."""
+    if private_key is None:
+        private_key, admin_email = _vapid_settings()
+    ttl = ttl or settings.VAPID_HEADER_TTL_SECONDS
+    claims = {
+        'aud': get_audience(endpoint),
+        'sub': f"mailto:{admin_email}",
+        'exp': int(time.time()) + ttl,
+    }
+    return dict(_get_key(private_key).sign(claims)), claims['exp']
+
+
+def get_vapid_headers(endpoint):
+    """
+    Return the VAPID headers for a push endpoint, reusing the header signed for its
+    origin while it has more than VAPID_HEADER_REFRESH_SECONDS left.
+
+    Returns:
+        dict: Headers to send with the push request ({} when VAPID is not configured)
+    """
+    private_key, admin_email = _vapid_settings()
+    if not private_key:
+        return {}
+
+    cache_key = (get_audience(endpoint), private_key, admin_email)
+    now = time.time()
+    cached = _headers_by_audience.get(cache_key)
+    if cached and cached[1] - now > settings.VAPID_HEADER_REFRESH_SECONDS:
+        return dict(cached[0])
+
+    with _lock:
+        # Another thread of the fan-out may have signed it while we waited
+        cached = _headers_by_audience.get(cache_key)
+        if not cached or cached[1] - now <= settings.VAPID_HEADER_REFRESH_SECONDS:
+            cached = _headers_by_audience[cache_key] = sign_vapid_headers(endpoint, private_key, admin_email)
+    return dict(cached[0])
+
+
+def clear_vapid_headers():
+    """Forget every cached header (e.g. after rotating the VAPID key)."""
+    with _lock:
+        _headers_by_audience.clear()
+        _key_cache.clear()